@@ -0,0 +1,100 @@
+"""
+Parquet Sidecar for data/appointments.xlsx
+Keeps a columnar copy of the lookup columns next to the workbook so readers
+(e.g. the SMS webhook) can skip openpyxl's XML parse. Written only when pyarrow
+is available; readers fall back to the workbook when the sidecar is missing or stale.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pyarrow not installed, no sidecar is written
+    pyarrow = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+class _PhoneKeepTable(dict):
+    """str.translate table that deletes every character it does not list"""
+    def __missing__(self, key):
+        return None
+
+
+# Digits and '+' map to themselves; ASCII deletions are listed so the common case skips __missing__
+PHONE_TRANSLATE = _PhoneKeepTable({c: (c if chr(c) in '0123456789+' else None) for c in range(128)})
+
+# Columns the cancellation lookups need, besides the phone columns
+LOOKUP_COLUMNS = ['doctor', 'date', 'time', 'appointment_id', 'created_at']
+PHONE_NORM_COLUMN = 'patient_phone_norm'
+
+
+def sidecar_path(xlsx_path: Path) -> Path:
+    """Sidecar location for a workbook: same name, .parquet suffix"""
+    return Path(xlsx_path).with_suffix('.parquet')
+
+
+def find_phone_column(df: pd.DataFrame) -> Optional[str]:
+    """Prefer patient_phone; otherwise loosely match any phone-like column"""
+    if 'patient_phone' in df.columns:
+        return 'patient_phone'
+    for c in df.columns:
+        if 'phone' in c.lower() and c != PHONE_NORM_COLUMN:
+            return c
+    return None
+
+
+def normalize_phone_series(phones: pd.Series) -> pd.Series:
+    """Strip everything but digits and '+' from a column of phone numbers"""
+    return phones.astype(str).str.translate(PHONE_TRANSLATE)
+
+
+def write_sidecar(df: pd.DataFrame, xlsx_path: Path) -> bool:
+    """
+    Mirror the lookup columns of an appointments frame to Parquet
+
+    Call right after writing the workbook, so the sidecar's mtime is not older.
+
+    Args:
+        df: Frame that was just written to xlsx_path
+        xlsx_path: Path of the workbook
+
+    Returns:
+        True if the sidecar was written
+    """
+    if pyarrow is None:
+        return False
+    try:
+        phone_col = find_phone_column(df)
+        columns = ([phone_col] if phone_col else []) + [c for c in LOOKUP_COLUMNS if c in df.columns]
+        # Strings throughout: xlsx columns are often mixed-type, and readers str() the values anyway
+        mirror = df[columns].astype(str)
+        if phone_col:
+            mirror[PHONE_NORM_COLUMN] = normalize_phone_series(df[phone_col])
+        mirror.to_parquet(sidecar_path(xlsx_path), engine='pyarrow', compression='zstd', index=False)
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to write appointments sidecar: {e}")
+        return False
+
+
+def read_sidecar(xlsx_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Read the sidecar if it is at least as new as the workbook
+
+    Returns:
+        Sidecar DataFrame, or None when missing, stale, or unreadable
+    """
+    if pyarrow is None:
+        return None
+    path = sidecar_path(xlsx_path)
+    try:
+        if not path.exists() or path.stat().st_mtime_ns < Path(xlsx_path).stat().st_mtime_ns:
+            return None
+        return pd.read_parquet(path, engine='pyarrow')
+    except Exception as e:
+        logger.warning(f"Failed to read appointments sidecar: {e}")
+        return None
@@ -8,6 +8,7 @@ appointment slot in data/appointments.xlsx based on patient_email.
 import os
 import imaplib
 import email
+import threading
 from email.header import decode_header
 from typing import Optional
 from pathlib import Path
@@ -27,6 +28,38 @@ def _get_env(name: str, default: Optional[str] = None) -> Optional[str]:
     return val if val is not None else default
 
 
+# Logged-in IMAP session kept between checks, so each poll skips the TLS handshake and login
+_IMAP_CONN: Optional[imaplib.IMAP4_SSL] = None
+_IMAP_LOCK = threading.Lock()
+
+
+def _get_imap(user: str, pwd: str) -> imaplib.IMAP4_SSL:
+    """Return the cached inbox session if it still answers NOOP, else log in again"""
+    global _IMAP_CONN
+    if _IMAP_CONN is not None:
+        try:
+            _IMAP_CONN.noop()
+            return _IMAP_CONN
+        except Exception:
+            _drop_imap()
+    mail = imaplib.IMAP4_SSL('imap.gmail.com')
+    mail.login(user, pwd)
+    mail.select('inbox')
+    _IMAP_CONN = mail
+    return mail
+
+
+def _drop_imap():
+    """Log out of and forget the cached IMAP session"""
+    global _IMAP_CONN
+    mail, _IMAP_CONN = _IMAP_CONN, None
+    if mail is not None:
+        try:
+            mail.logout()
+        except Exception:
+            pass
+
+
 def _msg_text(msg) -> str:
     parts = []
     if msg.is_multipart():
@@ -56,14 +89,20 @@ def check_email_cancellations() -> int:
     if not user or not pwd:
         return 0
 
-    processed = 0
-    mail = imaplib.IMAP4_SSL('imap.gmail.com')
-    mail.login(user, pwd)
-    mail.select('inbox')
+    with _IMAP_LOCK:
+        return _process_unseen(_get_imap(user, pwd))
 
-    status, data = mail.search(None, '(UNSEEN)')
+
+def _process_unseen(mail: imaplib.IMAP4_SSL) -> int:
+    """Reopen slots for unread 'cancel' emails in the selected inbox; returns how many"""
+    processed = 0
+    try:
+        status, data = mail.search(None, '(UNSEEN)')
+    except Exception:
+        _drop_imap()
+        raise
     if status != 'OK':
-        mail.logout()
+        _drop_imap()
         return 0
 
     rs = ReminderSystem()
@@ -125,7 +164,6 @@ def check_email_cancellations() -> int:
             # best-effort; continue
             continue
 
-    mail.logout()
     return processed
 
 
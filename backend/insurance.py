@@ -8,7 +8,7 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import re
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 from pathlib import Path
 
@@ -94,6 +94,12 @@ class InsuranceInfo:
         
         return len(errors) == 0, errors
 
+# Successful verifications by (carrier, member ID, group number), reused for a day so
+# re-booking with the same card skips the carrier round trip
+VERIFICATION_CACHE_TTL = timedelta(hours=24)
+_VERIFICATION_CACHE: Dict[Tuple[str, str, str], Tuple[datetime, Dict[str, Any]]] = {}
+
+
 class InsuranceValidator:
     """Validates and processes insurance information"""
     
@@ -325,22 +331,45 @@ class InsuranceValidator:
         if not group_valid:
             return False, {'errors': [group_error], 'status': InsuranceVerificationStatus.INVALID}
         
+        # Same card verified within the TTL: reuse that result (already stored in the database).
+        # The carrier is keyed as given, since verification treats "Medicare" and "medicare" differently
+        cache_key = (
+            insurance_info.carrier,
+            insurance_info.member_id,
+            insurance_info.group_number or ''
+        )
+        cached = _VERIFICATION_CACHE.get(cache_key)
+        if cached is not None:
+            verified_at, verification_result = cached
+            if datetime.now() - verified_at < VERIFICATION_CACHE_TTL:
+                self._apply_verification(insurance_info, verification_result, verified_at)
+                return True, dict(verification_result)
+            del _VERIFICATION_CACHE[cache_key]
+        
         # Simulate verification (in production, this would call insurance API)
         verification_result = self._simulate_verification(insurance_info)
+        verified_at = datetime.now()
+        _VERIFICATION_CACHE[cache_key] = (verified_at, verification_result)
         
         # Update insurance info with verification results
-        insurance_info.verification_status = verification_result['status']
-        insurance_info.verification_date = datetime.now()
-        insurance_info.copay_amount = verification_result.get('copay')
-        insurance_info.deductible_met = verification_result.get('deductible_met')
-        insurance_info.coverage_details = verification_result.get('coverage')
+        self._apply_verification(insurance_info, verification_result, verified_at)
         
         # Store in database
         verification_id = f"{insurance_info.carrier}_{insurance_info.member_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         self.insurance_db[verification_id] = insurance_info.to_dict()
         self.save_insurance_db()
         
-        return True, verification_result
+        return True, dict(verification_result)
+    
+    @staticmethod
+    def _apply_verification(insurance_info: InsuranceInfo, verification_result: Dict[str, Any],
+                            verified_at: datetime):
+        """Copy a verification result onto the insurance info"""
+        insurance_info.verification_status = verification_result['status']
+        insurance_info.verification_date = verified_at
+        insurance_info.copay_amount = verification_result.get('copay')
+        insurance_info.deductible_met = verification_result.get('deductible_met')
+        insurance_info.coverage_details = verification_result.get('coverage')
     
     def _simulate_verification(self, insurance_info: InsuranceInfo) -> Dict[str, Any]:
         """
@@ -20,13 +20,20 @@ Handles calendar slot management, booking, and availability checking
 import os
 import json
 import requests
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 import pandas as pd
 from pathlib import Path
 import logging
+import threading
 from dotenv import load_dotenv
 
+try:
+    from backend.appointment_sidecar import write_sidecar
+except ModuleNotFoundError:
+    from appointment_sidecar import write_sidecar
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,6 +62,16 @@ class CalendlyService:
         self.mock_calendar_file = Path("data/doctor_schedules.json")
         self.appointments_file = Path("data/appointments.json")
         self.doctor_schedules_xlsx = Path("data/appointments.xlsx")  # Use separate file for appointments
+        # One service may be shared across threads (e.g. Streamlit sessions): _lock makes each
+        # read-modify-write of the data files atomic, and batch_writes() holds it for the whole
+        # batch so no other thread's booking lands in (or is lost from) a pending frame
+        self._lock = threading.RLock()
+        # Write-back state for batch_writes(): the workbook frame is held in memory and written once on exit
+        self._batch_depth = 0
+        self._batch_df: Optional[pd.DataFrame] = None
+        self._batch_dirty = False
+        # (workbook mtime_ns, parsed frame): repeated slot searches skip the xlsx parse until the file changes
+        self._frame_cache: Optional[Tuple[int, pd.DataFrame]] = None
         
         # Initialize mock data if needed
         if self.use_mock:
@@ -162,42 +179,44 @@ class CalendlyService:
         # Build a list of dates from date_from to date_to
         day = date_from
         collected: List[Dict] = []
-        while day <= date_to and len(collected) < 50:
-            # For each day, find slots based on duration (derive patient type for duration)
-            ptype = PatientType.NEW if duration_minutes >= 60 else PatientType.RETURNING
-            slots = scheduler.find_available_slots(sched_doctor_id, day, ptype, num_slots=10)
+        # Prefills below are written to the workbook once, not per slot
+        with self.batch_writes():
+            while day <= date_to and len(collected) < 50:
+                # For each day, find slots based on duration (derive patient type for duration)
+                ptype = PatientType.NEW if duration_minutes >= 60 else PatientType.RETURNING
+                slots = scheduler.find_available_slots(sched_doctor_id, day, ptype, num_slots=10)
             
-            for s in slots:
-                # Check if this slot is already booked
-                doctor_name = scheduler.doctors.get(sched_doctor_id).doctor_name if sched_doctor_id in scheduler.doctors else 'Doctor'
-                slot_key = f"{doctor_name}_{s.start_time.strftime('%Y-%m-%d')}_{s.start_time.strftime('%H:%M')}"
+                for s in slots:
+                    # Check if this slot is already booked
+                    doctor_name = scheduler.doctors.get(sched_doctor_id).doctor_name if sched_doctor_id in scheduler.doctors else 'Doctor'
+                    slot_key = f"{doctor_name}_{s.start_time.strftime('%Y-%m-%d')}_{s.start_time.strftime('%H:%M')}"
                 
-                if slot_key in existing_bookings and not existing_bookings[slot_key]['available']:
-                    # Slot is already booked, skip it
-                    continue
+                    if slot_key in existing_bookings and not existing_bookings[slot_key]['available']:
+                        # Slot is already booked, skip it
+                        continue
                 
-                # Add to available slots
-                collected.append({
-                    'datetime': s.start_time.isoformat(),
-                    'duration_minutes': duration_minutes,
-                    'doctor_id': doctor_id,
-                    'doctor_name': doctor_name,
-                    'type': '60min_new_patient' if duration_minutes >= 60 else '30min_returning'
-                })
+                    # Add to available slots
+                    collected.append({
+                        'datetime': s.start_time.isoformat(),
+                        'duration_minutes': duration_minutes,
+                        'doctor_id': doctor_id,
+                        'doctor_name': doctor_name,
+                        'type': '60min_new_patient' if duration_minutes >= 60 else '30min_returning'
+                    })
                 
-                # Prefill Excel with available slots (available=True) if not already present
-                try:
-                    dt = s.start_time
-                    self._prefill_available_slot(
-                        doctor=doctor_name,
-                        dt=dt,
-                        location=scheduler.doctors.get(sched_doctor_id).location if sched_doctor_id in scheduler.doctors else 'Main Clinic'
-                    )
-                except Exception:
-                    pass
-                if len(collected) >= 50:
-                    break
-            day = day + timedelta(days=1)
+                    # Prefill Excel with available slots (available=True) if not already present
+                    try:
+                        dt = s.start_time
+                        self._prefill_available_slot(
+                            doctor=doctor_name,
+                            dt=dt,
+                            location=scheduler.doctors.get(sched_doctor_id).location if sched_doctor_id in scheduler.doctors else 'Main Clinic'
+                        )
+                    except Exception:
+                        pass
+                    if len(collected) >= 50:
+                        break
+                day = day + timedelta(days=1)
 
         return collected[:20]
     
@@ -209,7 +228,9 @@ class CalendlyService:
             return existing_bookings
             
         try:
-            df = pd.read_excel(self.doctor_schedules_xlsx)
+            df = self._cached_workbook_frame()
+            if df is None:
+                return existing_bookings
             # Check if the file has the expected columns
             expected_columns = ['doctor', 'date', 'time', 'available', 'patient_name', 'patient_email']
             if not all(col in df.columns for col in expected_columns):
@@ -315,34 +336,36 @@ class CalendlyService:
                                datetime_slot: str, duration_minutes: int,
                                appointment_type: str) -> Dict[str, Any]:
         """Book appointment in mock system"""
-        # Load existing appointments
-        with open(self.appointments_file, 'r') as f:
-            appointments = json.load(f)
+        # Read-modify-write of the appointments file, atomic across threads sharing this service
+        with self._lock:
+            # Load existing appointments
+            with open(self.appointments_file, 'r') as f:
+                appointments = json.load(f)
         
-        # Generate appointment ID
-        appointment_id = f"APT_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(appointments)+1:04d}"
+            # Generate appointment ID
+            appointment_id = f"APT_{datetime.now().strftime('%Y%m%d%H%M%S')}_{len(appointments)+1:04d}"
         
-        # Create appointment record
-        appointment = {
-            'appointment_id': appointment_id,
-            'patient_data': patient_data,
-            'doctor_id': doctor_id,
-            'datetime': datetime_slot,
-            'duration_minutes': duration_minutes,
-            'appointment_type': appointment_type,
-            'status': 'confirmed',
-            'booked_at': datetime.now().isoformat(),
-            'reminders_sent': [],
-            'forms_sent': False,
-            'confirmation_sent': False
-        }
+            # Create appointment record
+            appointment = {
+                'appointment_id': appointment_id,
+                'patient_data': patient_data,
+                'doctor_id': doctor_id,
+                'datetime': datetime_slot,
+                'duration_minutes': duration_minutes,
+                'appointment_type': appointment_type,
+                'status': 'confirmed',
+                'booked_at': datetime.now().isoformat(),
+                'reminders_sent': [],
+                'forms_sent': False,
+                'confirmation_sent': False
+            }
         
-        # Add to appointments list
-        appointments.append(appointment)
+            # Add to appointments list
+            appointments.append(appointment)
         
-        # Save appointments
-        with open(self.appointments_file, 'w') as f:
-            json.dump(appointments, f, indent=2, default=str)
+            # Save appointments
+            with open(self.appointments_file, 'w') as f:
+                json.dump(appointments, f, indent=2, default=str)
         
         # Get doctor info
         with open(self.mock_calendar_file, 'r') as f:
@@ -454,39 +477,91 @@ class CalendlyService:
         )
         return result
 
+    @contextmanager
+    def batch_writes(self):
+        """
+        Defer appointments workbook writes until the outermost block exits
+        
+        Reads inside the block see the pending frame, so bookings made in a batch
+        stay visible to later availability checks in the same batch. Other threads
+        wait for the block to finish before touching the workbook.
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    pending, dirty = self._batch_df, self._batch_dirty
+                    self._batch_df, self._batch_dirty = None, False
+                    if dirty:
+                        self._write_appointments_frame(pending)
+    
+    def _read_appointments_frame(self, columns: List[str]) -> pd.DataFrame:
+        """Current appointments workbook contents (the pending frame while batching)"""
+        with self._lock:
+            if self._batch_depth and self._batch_df is not None:
+                return self._batch_df
+            df = self._cached_workbook_frame() if self.doctor_schedules_xlsx.exists() else None
+            if df is None:
+                df = pd.DataFrame(columns=columns)
+            if self._batch_depth:
+                self._batch_df = df
+            return df
+    
+    def _cached_workbook_frame(self) -> Optional[pd.DataFrame]:
+        """Parsed appointments workbook, re-read only when its mtime changes; None if unreadable"""
+        try:
+            with self._lock:
+                mtime = self.doctor_schedules_xlsx.stat().st_mtime_ns
+                if self._frame_cache is None or self._frame_cache[0] != mtime:
+                    self._frame_cache = (mtime, pd.read_excel(self.doctor_schedules_xlsx))
+                # Callers mutate the frame they get back
+                return self._frame_cache[1].copy()
+        except Exception as e:
+            logger.warning(f"Failed to read appointments workbook: {e}")
+            return None
+    
+    def _write_appointments_frame(self, df: pd.DataFrame):
+        """Write the appointments workbook now, or mark it dirty while batching"""
+        with self._lock:
+            if self._batch_depth:
+                self._batch_df, self._batch_dirty = df, True
+                return
+            self.doctor_schedules_xlsx.parent.mkdir(parents=True, exist_ok=True)
+            # Drop the cache first so a failed write can't leave it looking current
+            self._frame_cache = None
+            df.to_excel(self.doctor_schedules_xlsx, index=False)
+            write_sidecar(df, self.doctor_schedules_xlsx)
+    
     def _log_booking_to_excel(self, doctor: str, dt: datetime, location: str,
                               patient_name: str, patient_email: str):
         """Append or update booking in doctor_schedules.xlsx per requirements."""
-        self.doctor_schedules_xlsx.parent.mkdir(parents=True, exist_ok=True)
-        columns = [
-            'doctor', 'date', 'time', 'location', 'available', 'patient_name', 'patient_email'
-        ]
-        if self.doctor_schedules_xlsx.exists():
-            try:
-                df = pd.read_excel(self.doctor_schedules_xlsx)
-            except Exception:
-                df = pd.DataFrame(columns=columns)
-        else:
-            df = pd.DataFrame(columns=columns)
+        with self._lock:
+            columns = [
+                'doctor', 'date', 'time', 'location', 'available', 'patient_name', 'patient_email'
+            ]
+            df = self._read_appointments_frame(columns)
 
-        date_str = dt.strftime('%Y-%m-%d')
-        time_str = dt.strftime('%H:%M')
-        match = (df['doctor'] == doctor) & (df['date'] == date_str) & (df['time'] == time_str)
-        if df.empty or not match.any():
-            new_row = {
-                'doctor': doctor,
-                'date': date_str,
-                'time': time_str,
-                'location': location,
-                'available': False,
-                'patient_name': patient_name,
-                'patient_email': patient_email,
-            }
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-        else:
-            df.loc[match, ['available', 'patient_name', 'patient_email', 'location']] = [False, patient_name, patient_email, location]
+            date_str = dt.strftime('%Y-%m-%d')
+            time_str = dt.strftime('%H:%M')
+            match = (df['doctor'] == doctor) & (df['date'] == date_str) & (df['time'] == time_str)
+            if df.empty or not match.any():
+                new_row = {
+                    'doctor': doctor,
+                    'date': date_str,
+                    'time': time_str,
+                    'location': location,
+                    'available': False,
+                    'patient_name': patient_name,
+                    'patient_email': patient_email,
+                }
+                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+            else:
+                df.loc[match, ['available', 'patient_name', 'patient_email', 'location']] = [False, patient_name, patient_email, location]
 
-        df.to_excel(self.doctor_schedules_xlsx, index=False)
+            self._write_appointments_frame(df)
     
     def _doctor_id_to_name(self, doctor_id):
         mapping = {
@@ -501,31 +576,25 @@ class CalendlyService:
 
     def _prefill_available_slot(self, doctor: str, dt: datetime, location: str):
         """Write available=True row for a slot if not present."""
-        self.doctor_schedules_xlsx.parent.mkdir(parents=True, exist_ok=True)
-        columns = ['doctor', 'date', 'time', 'location', 'available', 'patient_name', 'patient_email']
-        if self.doctor_schedules_xlsx.exists():
-            try:
-                df = pd.read_excel(self.doctor_schedules_xlsx)
-            except Exception:
-                df = pd.DataFrame(columns=columns)
-        else:
-            df = pd.DataFrame(columns=columns)
+        with self._lock:
+            columns = ['doctor', 'date', 'time', 'location', 'available', 'patient_name', 'patient_email']
+            df = self._read_appointments_frame(columns)
 
-        date_str = dt.strftime('%Y-%m-%d')
-        time_str = dt.strftime('%H:%M')
-        match = (df['doctor'] == doctor) & (df['date'] == date_str) & (df['time'] == time_str)
-        if df.empty or not match.any():
-            new_row = {
-                'doctor': doctor,
-                'date': date_str,
-                'time': time_str,
-                'location': location,
-                'available': True,
-                'patient_name': '',
-                'patient_email': '',
-            }
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            df.to_excel(self.doctor_schedules_xlsx, index=False)
+            date_str = dt.strftime('%Y-%m-%d')
+            time_str = dt.strftime('%H:%M')
+            match = (df['doctor'] == doctor) & (df['date'] == date_str) & (df['time'] == time_str)
+            if df.empty or not match.any():
+                new_row = {
+                    'doctor': doctor,
+                    'date': date_str,
+                    'time': time_str,
+                    'location': location,
+                    'available': True,
+                    'patient_name': '',
+                    'patient_email': '',
+                }
+                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+                self._write_appointments_frame(df)
     
     def cancel_appointment(self, appointment_id: str, reason: str = "") -> Dict[str, Any]:
         """
@@ -539,29 +608,30 @@ class CalendlyService:
             Cancellation confirmation
         """
         if self.use_mock:
-            # Update appointment status in mock data
-            with open(self.appointments_file, 'r') as f:
-                appointments = json.load(f)
+            with self._lock:
+                # Update appointment status in mock data
+                with open(self.appointments_file, 'r') as f:
+                    appointments = json.load(f)
             
-            for apt in appointments:
-                if apt['appointment_id'] == appointment_id:
-                    apt['status'] = 'cancelled'
-                    apt['cancellation_reason'] = reason
-                    apt['cancelled_at'] = datetime.now().isoformat()
+                for apt in appointments:
+                    if apt['appointment_id'] == appointment_id:
+                        apt['status'] = 'cancelled'
+                        apt['cancellation_reason'] = reason
+                        apt['cancelled_at'] = datetime.now().isoformat()
                     
-                    with open(self.appointments_file, 'w') as f:
-                        json.dump(appointments, f, indent=2, default=str)
+                        with open(self.appointments_file, 'w') as f:
+                            json.dump(appointments, f, indent=2, default=str)
                     
-                    return {
-                        'success': True,
-                        'message': f"Appointment {appointment_id} cancelled successfully",
-                        'reason': reason
-                    }
+                        return {
+                            'success': True,
+                            'message': f"Appointment {appointment_id} cancelled successfully",
+                            'reason': reason
+                        }
             
-            return {
-                'success': False,
-                'message': f"Appointment {appointment_id} not found"
-            }
+                return {
+                    'success': False,
+                    'message': f"Appointment {appointment_id} not found"
+                }
         else:
             # Cancel via Calendly API
             headers = {
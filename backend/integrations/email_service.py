@@ -6,6 +6,7 @@ Handles confirmation emails, form distribution, and reminder emails
 import os
 import smtplib
 import logging
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
@@ -46,6 +47,10 @@ class EmailService:
             # Mock configuration
             self.from_email = "appointments@medicalclinic.com"
         
+        # Logged-in SMTP connection reused across sends; opened on first send, dropped by close()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        
         # Email log for mock mode
         self.email_log_file = Path("data/email_log.json")
         self.email_templates = self._load_email_templates()
@@ -555,16 +560,13 @@ Medical Scheduling Team
                 for attachment in attachments:
                     self._attach_file(msg, attachment)
             
-            # Send email - handle different SMTP configurations
-            if self.smtp_port == 465:  # SSL port (e.g., SendGrid SSL)
-                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
-            else:  # TLS port (e.g., 587)
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()
-                    server.login(self.smtp_username, self.smtp_password)
-                    server.send_message(msg)
+            # Send over the persistent connection, reconnecting once if the server dropped it
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    self._smtp = None
+                    self._get_smtp().send_message(msg)
             
             logger.info(f"Email sent successfully to {to_email}")
             
@@ -580,6 +582,33 @@ Medical Scheduling Team
                 'message': f"Failed to send email: {str(e)}"
             }
     
+    def _get_smtp(self) -> smtplib.SMTP:
+        """Return the logged-in SMTP connection, opening it on first use"""
+        if self._smtp is None:
+            # Handle different SMTP configurations
+            if self.smtp_port == 465:  # SSL port (e.g., SendGrid SSL)
+                server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+            else:  # TLS port (e.g., 587)
+                server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+                server.starttls()
+            try:
+                server.login(self.smtp_username, self.smtp_password)
+            except Exception:
+                server.close()
+                raise
+            self._smtp = server
+        return self._smtp
+    
+    def close(self):
+        """Close the persistent SMTP connection, if one is open"""
+        with self._smtp_lock:
+            server, self._smtp = self._smtp, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+    
     def _attach_file(self, msg: MIMEMultipart, attachment: Dict):
         """Attach file to email message"""
         try:
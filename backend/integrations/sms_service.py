@@ -6,13 +6,6 @@ Handles 3-stage reminder system with confirmation tracking
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-try:
-    from twilio.rest import Client
-    from twilio.base.exceptions import TwilioException
-except Exception:  # Twilio not installed or import failed
-    Client = None  # type: ignore
-    class TwilioException(Exception):
-        pass
 import logging
 from dataclasses import dataclass
 from enum import Enum
@@ -21,13 +14,32 @@ from enum import Enum
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The Twilio SDK (and the requests/HTTP stack it pulls in) is imported by the first
+# real-mode SMSService; mock-mode services never load it
+Client = None  # type: ignore
+class TwilioException(Exception):
+    pass
+
+
+def _load_twilio() -> bool:
+    """Import the Twilio SDK on first use; False if it is not installed"""
+    global Client, TwilioException
+    if Client is None:
+        try:
+            from twilio.rest import Client as _Client
+            from twilio.base.exceptions import TwilioException as _TwilioException
+        except Exception:  # Twilio not installed or import failed
+            return False
+        Client, TwilioException = _Client, _TwilioException
+    return True
+
 class ReminderStage(Enum):
     """Reminder stages with specific actions"""
     FIRST = "regular"  # Standard reminder
     SECOND = "form_check"  # Check if forms are filled
     THIRD = "confirmation_check"  # Confirm attendance or get cancellation reason
 
-@dataclass
+@dataclass(slots=True)
 class SMSReminder:
     """SMS reminder data structure"""
     patient_phone: str
@@ -62,7 +74,7 @@ class SMSService:
         """
         self.mock_mode = mock_mode
         
-        if not mock_mode and Client is not None:
+        if not mock_mode and _load_twilio():
             self.account_sid = account_sid or os.environ.get('TWILIO_ACCOUNT_SID')
             self.auth_token = auth_token or os.environ.get('TWILIO_AUTH_TOKEN')
             self.from_number = from_number or os.environ.get('TWILIO_PHONE_NUMBER')
@@ -76,9 +88,9 @@ class SMSService:
                 except Exception as e:
                     logger.error(f"Failed to initialize Twilio client: {e}")
                     self.mock_mode = True
-        else:
-            if Client is None:
-                logger.warning("Twilio SDK not available. SMSService running in mock mode.")
+        elif not mock_mode:
+            logger.warning("Twilio SDK not available. SMSService running in mock mode.")
+            self.mock_mode = True
         
         # Track sent reminders
         self.sent_reminders: Dict[str, List[Dict]] = {}
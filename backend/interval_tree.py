@@ -0,0 +1,191 @@
+"""
+Interval Tree for Appointment Slots
+AVL-balanced tree of [start, end) intervals augmented with the subtree's max end,
+giving O(log n) insert/delete and O(log n + k) overlap queries
+"""
+
+from datetime import datetime
+from itertools import count
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class _Node:
+    """Tree node ordered by (start, seq); max_end covers the whole subtree"""
+    __slots__ = ('key', 'start', 'end', 'value', 'max_end', 'height', 'left', 'right')
+
+    def __init__(self, key: Tuple[datetime, int], start: datetime, end: datetime, value: Any):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.value = value
+        self.max_end = end
+        self.height = 1
+        self.left: Optional['_Node'] = None
+        self.right: Optional['_Node'] = None
+
+
+def _height(node: Optional[_Node]) -> int:
+    return node.height if node else 0
+
+
+def _update(node: _Node) -> _Node:
+    """Recompute height and max_end from the children"""
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    if node.left and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+
+def _rotate_right(node: _Node) -> _Node:
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = _update(node)
+    return _update(pivot)
+
+
+def _rotate_left(node: _Node) -> _Node:
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = _update(node)
+    return _update(pivot)
+
+
+def _rebalance(node: _Node) -> _Node:
+    _update(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """
+    Interval tree of booked time slots keyed by appointment id
+
+    Intervals are half-open: [09:00, 09:30) does not overlap [09:30, 10:00).
+    """
+
+    def __init__(self):
+        self._root: Optional[_Node] = None
+        self._keys: Dict[Any, Tuple[datetime, int]] = {}
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Any]:
+        """Yield stored values in start-time order"""
+        stack: List[_Node] = []
+        node = self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.value
+            node = node.right
+
+    def insert(self, start: datetime, end: datetime, slot: Any):
+        """
+        Insert an interval
+
+        Args:
+            start: Interval start (inclusive)
+            end: Interval end (exclusive)
+            slot: Stored value; its `appointment_id` (if any) is the key for delete()
+        """
+        key = (start, next(self._seq))
+        appointment_id = getattr(slot, 'appointment_id', None)
+        if appointment_id is not None:
+            if appointment_id in self._keys:
+                self.delete(appointment_id)
+            self._keys[appointment_id] = key
+        else:
+            self._keys[key] = key
+        self._root = self._insert(self._root, _Node(key, start, end, slot))
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        return _rebalance(node)
+
+    def delete(self, appointment_id: Any) -> Optional[Any]:
+        """
+        Remove the interval stored under an appointment id
+
+        Returns:
+            The removed value, or None if the id is unknown
+        """
+        key = self._keys.pop(appointment_id, None)
+        if key is None:
+            return None
+        removed: List[Any] = []
+        self._root = self._delete(self._root, key, removed)
+        return removed[0] if removed else None
+
+    def _delete(self, node: Optional[_Node], key: Tuple[datetime, int], removed: List[Any]) -> Optional[_Node]:
+        if node is None:
+            return None
+        if key < node.key:
+            node.left = self._delete(node.left, key, removed)
+        elif key > node.key:
+            node.right = self._delete(node.right, key, removed)
+        else:
+            removed.append(node.value)
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            # Replace with in-order successor
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.key, node.start, node.end, node.value = (
+                successor.key, successor.start, successor.end, successor.value
+            )
+            node.right = self._delete(node.right, successor.key, [])
+        return _rebalance(node)
+
+    def query(self, start: datetime, end: datetime) -> List[Any]:
+        """
+        Find all stored values overlapping [start, end)
+
+        Returns:
+            Overlapping values in start-time order
+        """
+        return list(self.iter_overlaps(start, end))
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Whether any stored interval overlaps [start, end); stops at the first hit"""
+        return next(self.iter_overlaps(start, end), None) is not None
+
+    def iter_overlaps(self, start: datetime, end: datetime) -> Iterator[Any]:
+        """Lazily yield stored values overlapping [start, end) in start-time order"""
+        stack: List[_Node] = []
+        node = self._root
+        # In-order walk, pruning subtrees that end too early or start too late
+        while stack or node:
+            while node and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break
+            if node.end > start:
+                yield node.value
+            node = node.right
@@ -4,20 +4,38 @@ Patient database management using patients.csv
 Handles new vs returning patient detection
 """
 
+import logging
+import threading
 import pandas as pd
 from pathlib import Path
 from typing import Optional, Dict, List
 from datetime import datetime
 
+try:
+    import pyarrow  # noqa: F401
+except ImportError:  # pyarrow not installed, the CSV is parsed on every load
+    pyarrow = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
 
 class PatientDatabase:
     def __init__(self, db_path: str = "data/patients.csv"):
         """Initialize patient database"""
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # (stripped, lowercased name, DOB) -> index label of the first matching row; built on first
+        # lookup and dropped whenever rows are added or a Name/DOB changes
+        self._key_index: Optional[Dict[tuple, int]] = None
+        # One instance is shared across threads (Streamlit sessions, the agent's workers);
+        # writers hold this so concurrent mutations and CSV saves don't interleave
+        self._write_lock = threading.RLock()
 
         if self.db_path.exists():
-            self.df = pd.read_csv(self.db_path)
+            self.df = self._read_parquet_cache()
+            if self.df is None:
+                self.df = pd.read_csv(self.db_path)
+                self._write_parquet_cache()
         else:
             # Create empty DataFrame if file not found
             self.df = pd.DataFrame(columns=[
@@ -26,9 +44,48 @@ class PatientDatabase:
             ])
             self.save()
 
+    def _find_row(self, name: str, dob: str) -> Optional[int]:
+        """Index label of the first row matching Name (case- and outer-whitespace-insensitive) + DOB, or None"""
+        if self._key_index is None:
+            key_index: Dict[tuple, int] = {}
+            for idx, row_name, row_dob in zip(self.df.index, self.df["Name"], self.df["DOB"]):
+                if isinstance(row_name, str):
+                    key_index.setdefault((row_name.strip().lower(), row_dob), idx)
+            self._key_index = key_index
+        return self._key_index.get((name.strip().lower(), dob))
+
     def save(self):
         """Save DataFrame to CSV"""
         self.df.to_csv(self.db_path, index=False)
+        self._write_parquet_cache()
+
+    @property
+    def _parquet_path(self) -> Path:
+        return self.db_path.with_suffix(".parquet")
+
+    def _read_parquet_cache(self) -> Optional[pd.DataFrame]:
+        """Load the Parquet copy of the CSV if it is at least as new as the CSV"""
+        if pyarrow is None:
+            return None
+        try:
+            cache = self._parquet_path
+            if not cache.exists() or cache.stat().st_mtime_ns < self.db_path.stat().st_mtime_ns:
+                return None
+            return pd.read_parquet(cache, engine="pyarrow")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable patient cache: {e}")
+            return None
+
+    def _write_parquet_cache(self):
+        """Mirror the DataFrame to Parquet so the next load skips CSV parsing"""
+        if pyarrow is None:
+            return
+        try:
+            self.df.to_parquet(self._parquet_path, engine="pyarrow", index=False)
+        except Exception as e:
+            # Mixed-type columns can't be stored; drop any old copy so it is never read stale
+            logger.warning(f"Failed to write patient cache: {e}")
+            self._parquet_path.unlink(missing_ok=True)
 
     def search_patient(
         self,
@@ -43,12 +100,9 @@ class PatientDatabase:
 
         # Match by Name + DOB
         if name and dob:
-            matches = self.df[
-                (self.df["Name"].str.lower() == name.lower()) &
-                (self.df["DOB"] == dob)
-            ]
-            if not matches.empty:
-                return matches.iloc[0].to_dict()
+            idx = self._find_row(name, dob)
+            if idx is not None:
+                return self.df.loc[idx].to_dict()
 
         # Match by email
         if email:
@@ -86,42 +140,63 @@ class PatientDatabase:
             "Visit_Count": 0,
             "Status": "new"
         }
-        self.df = pd.concat([self.df, pd.DataFrame([new_patient])], ignore_index=True)
-        self.save()
+        with self._write_lock:
+            self.df = pd.concat([self.df, pd.DataFrame([new_patient])], ignore_index=True)
+            self._key_index = None
+            self.save()
 
     def update_patient(self, name: str, dob: str, updates: Dict) -> bool:
         """Update patient record by Name + DOB"""
-        mask = (self.df["Name"].str.lower() == name.lower()) & (self.df["DOB"] == dob)
-        if not mask.any():
-            return False
+        with self._write_lock:
+            idx = self._find_row(name, dob)
+            if idx is None:
+                return False
+
+            for key, value in updates.items():
+                if key in self.df.columns:
+                    self.df.at[idx, key] = value
+            if "Name" in updates or "DOB" in updates:
+                self._key_index = None
 
-        idx = self.df[mask].index[0]
-        for key, value in updates.items():
-            if key in self.df.columns:
-                self.df.at[idx, key] = value
+            self.save()
+            return True
+
+    def update_and_increment_visit(self, name: str, dob: str, updates: Dict) -> bool:
+        """Apply updates and increment the visit count in one lookup and one save"""
+        with self._write_lock:
+            idx = self._find_row(name, dob)
+            if idx is None:
+                return False
+
+            visits = self.df.at[idx, "Visit_Count"]
+            self.df.at[idx, "Visit_Count"] = (0 if pd.isna(visits) else int(visits)) + 1
+            for key, value in updates.items():
+                if key in self.df.columns and key != "Visit_Count":
+                    self.df.at[idx, key] = value
+            if "Name" in updates or "DOB" in updates:
+                self._key_index = None
 
-        self.save()
-        return True
+            self.save()
+            return True
 
     def increment_visit(self, name: str, dob: str) -> bool:
         """Increment visit count and set status to returning"""
-        mask = (self.df["Name"].str.lower() == name.lower()) & (self.df["DOB"] == dob)
-        if not mask.any():
-            return False
+        with self._write_lock:
+            idx = self._find_row(name, dob)
+            if idx is None:
+                return False
 
-        idx = self.df[mask].index[0]
-        self.df.at[idx, "Visit_Count"] = int(self.df.at[idx, "Visit_Count"]) + 1
-        self.df.at[idx, "Status"] = "returning"
-        self.save()
-        return True
+            self.df.at[idx, "Visit_Count"] = int(self.df.at[idx, "Visit_Count"]) + 1
+            self.df.at[idx, "Status"] = "returning"
+            self.save()
+            return True
 
     def get_visit_count(self, name: str, dob: str) -> int:
         """Get current visit count for a patient"""
-        mask = (self.df["Name"].str.lower() == name.lower()) & (self.df["DOB"] == dob)
-        if not mask.any():
+        idx = self._find_row(name, dob)
+        if idx is None:
             return 0
         
-        idx = self.df[mask].index[0]
         return int(self.df.at[idx, "Visit_Count"])
 
     def get_statistics(self) -> Dict:
@@ -136,6 +211,15 @@ class PatientDatabase:
         }
 
 
+# Databases shared by every caller in the process, one per CSV path
+_INSTANCES: Dict[str, PatientDatabase] = {}
+_INSTANCES_LOCK = threading.Lock()
 
 
-
+def get_patient_db(db_path: str = "data/patients.csv") -> PatientDatabase:
+    """Return the process-wide PatientDatabase for a CSV, loading it on first use"""
+    key = str(Path(db_path).resolve())
+    with _INSTANCES_LOCK:
+        if key not in _INSTANCES:
+            _INSTANCES[key] = PatientDatabase(db_path)
+        return _INSTANCES[key]
@@ -4,40 +4,77 @@ Implements 3-stage automated reminder workflow with confirmations
 """
 
 from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
 from datetime import datetime, timedelta
-from enum import Enum
+from enum import IntEnum
 import json
+import re
+import heapq
 import asyncio
+import threading
 from dataclasses import dataclass, asdict
 import logging
 import pandas as pd
 from pathlib import Path
+try:
+    import orjson
+except ImportError:  # orjson not installed, fall back to stdlib json
+    orjson = None  # type: ignore
+
+try:
+    from backend.appointment_sidecar import write_sidecar
+except ModuleNotFoundError:
+    from appointment_sidecar import write_sidecar
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class ReminderType(Enum):
+class _LabelledIntEnum(IntEnum):
+    """
+    IntEnum whose lowercase member name is used as its display label
+    
+    Members are ints in memory only; the log stores labels. Each enum uses its own
+    value range, so members of two different enums never compare equal.
+    """
+    
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+    
+    @classmethod
+    def from_label(cls, value):
+        """Parse a stored label (e.g. 'form_check') or an int written by older builds"""
+        if isinstance(value, str):
+            return cls[value.upper()]
+        try:
+            return cls(value)
+        except ValueError:
+            # Older builds numbered every enum from 1
+            return cls(min(cls) - 1 + value)
+
+class ReminderType(_LabelledIntEnum):
     """Types of reminders"""
-    STANDARD = "standard"  # 1st reminder - just informational
-    FORM_CHECK = "form_check"  # 2nd reminder - check if forms filled
-    CONFIRMATION = "confirmation"  # 3rd reminder - confirm or cancel
+    STANDARD = 101  # 1st reminder - just informational
+    FORM_CHECK = 102  # 2nd reminder - check if forms filled
+    CONFIRMATION = 103  # 3rd reminder - confirm or cancel
 
-class ReminderStatus(Enum):
+class ReminderStatus(_LabelledIntEnum):
     """Status of reminder sending"""
-    PENDING = "pending"
-    SENT = "sent"
-    CONFIRMED = "confirmed"
-    FAILED = "failed"
-    CANCELLED = "cancelled"
+    PENDING = 1
+    SENT = 2
+    CONFIRMED = 3
+    FAILED = 4
+    CANCELLED = 5
+    EXPIRED = 6  # still pending when its send time passed while nothing was running
 
-class AppointmentStatus(Enum):
+class AppointmentStatus(_LabelledIntEnum):
     """Appointment confirmation status"""
-    CONFIRMED = "confirmed"
-    PENDING = "pending"
-    CANCELLED = "cancelled"
-    RESCHEDULED = "rescheduled"
-    NO_SHOW = "no_show"
+    CONFIRMED = 201
+    PENDING = 202
+    CANCELLED = 203
+    RESCHEDULED = 204
+    NO_SHOW = 205
 
 @dataclass
 class Reminder:
@@ -61,8 +98,8 @@ class Reminder:
         data['appointment_datetime'] = self.appointment_datetime.isoformat()
         data['scheduled_time'] = self.scheduled_time.isoformat()
         data['sent_time'] = self.sent_time.isoformat() if self.sent_time else None
-        data['reminder_type'] = self.reminder_type.value
-        data['status'] = self.status.value
+        data['reminder_type'] = self.reminder_type.label
+        data['status'] = self.status.label
         return data
 
 @dataclass
@@ -87,6 +124,9 @@ class AppointmentReminder:
 class ReminderSystem:
     """Manages the 3-stage reminder workflow"""
     
+    # Keywords recognised in patient replies ("cancelled", "confirmed" etc. still match)
+    _RESPONSE_RE = re.compile(r'\b(confirm|cancel|reschedule|yes\b|no\b)', re.IGNORECASE)
+    
     def __init__(self, email_service=None, sms_service=None):
         """
         Initialize reminder system
@@ -100,26 +140,182 @@ class ReminderSystem:
         self.appointments: Dict[str, AppointmentReminder] = {}
         self.reminder_queue: List[Reminder] = []
         self.reminder_log_path = Path("data/exports/reminder_log.json")
-        self.load_reminder_log()
+        # The log is parsed lazily on first use so construction stays cheap
+        self._log_loaded = False
+        # Running aggregates for get_reminder_statistics, updated on every state change
+        self._reset_stats()
+        # Ids of appointments still PENDING, plus a min-heap of (appointment_datetime, appointment_id)
+        # over them; heap entries whose id has left the set are skipped when popped
+        self._pending_ids: set = set()
+        self._pending_by_time: List[Tuple[datetime, str]] = []
+        # The scheduler marks no-shows in a worker thread while reminders are sent on the
+        # event loop: _state_lock guards status/counter updates, _write_lock orders log writes
+        self._state_lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        
+    def _reset_stats(self):
+        """Zero the running counters behind get_reminder_statistics"""
+        # Keyed by label so get_reminder_statistics can hand them out directly
+        self._reminder_status_counts = Counter({status.label: 0 for status in ReminderStatus})
+        self._appointment_status_counts = Counter({status.label: 0 for status in AppointmentStatus})
+        self._type_totals = {rtype: 0 for rtype in ReminderType}
+        self._type_responses = {rtype: 0 for rtype in ReminderType}
+    
+    def _count_appointment(self, appointment: AppointmentReminder, delta: int = 1):
+        """Add (delta=1) or remove (delta=-1) an appointment and its reminders from the counters"""
+        self._appointment_status_counts[appointment.appointment_status.label] += delta
+        # Bind the counters once; this runs for every appointment while the log loads
+        status_counts = self._reminder_status_counts
+        type_totals = self._type_totals
+        type_responses = self._type_responses
+        for reminder in appointment.reminders:
+            status_counts[reminder.status.label] += delta
+            type_totals[reminder.reminder_type] += delta
+            type_responses[reminder.reminder_type] += delta * bool(reminder.response)
+    
+    def _store_appointment(self, appointment: AppointmentReminder, track_no_show: bool = True):
+        """
+        Register an appointment, replacing any earlier one with the same id
         
+        Args:
+            appointment: Appointment to store
+            track_no_show: Whether a PENDING appointment goes on the heap mark_no_shows checks
+        """
+        with self._state_lock:
+            previous = self.appointments.get(appointment.appointment_id)
+            if previous is not None:
+                self._count_appointment(previous, -1)
+                self._pending_ids.discard(previous.appointment_id)
+                stale = {id(r) for r in previous.reminders}
+                self.reminder_queue = [r for r in self.reminder_queue if id(r) not in stale]
+            self.appointments[appointment.appointment_id] = appointment
+            self._count_appointment(appointment)
+            if track_no_show and appointment.appointment_status == AppointmentStatus.PENDING:
+                self._pending_ids.add(appointment.appointment_id)
+                heapq.heappush(self._pending_by_time,
+                               (appointment.appointment_datetime, appointment.appointment_id))
+    
+    def _compact_pending_heap(self):
+        """Rebuild the pending heap once stale (non-pending) entries outnumber live ones"""
+        with self._state_lock:
+            if len(self._pending_by_time) <= 2 * len(self._pending_ids) + 64:
+                return
+            self._pending_by_time = [
+                (self.appointments[appointment_id].appointment_datetime, appointment_id)
+                for appointment_id in self._pending_ids
+            ]
+            heapq.heapify(self._pending_by_time)
+    
+    def _set_reminder_status(self, reminder: Reminder, status: ReminderStatus):
+        with self._state_lock:
+            self._reminder_status_counts[reminder.status.label] -= 1
+            self._reminder_status_counts[status.label] += 1
+            reminder.status = status
+    
+    def _set_appointment_status(self, appointment: AppointmentReminder, status: AppointmentStatus):
+        with self._state_lock:
+            self._appointment_status_counts[appointment.appointment_status.label] -= 1
+            self._appointment_status_counts[status.label] += 1
+            appointment.appointment_status = status
+            if status != AppointmentStatus.PENDING:
+                self._pending_ids.discard(appointment.appointment_id)
+    
+    def _record_response(self, reminder: Reminder, response: Optional[str]):
+        with self._state_lock:
+            self._type_responses[reminder.reminder_type] += bool(response) - bool(reminder.response)
+            reminder.response = response
+    
+    def _ensure_loaded(self):
+        """Load the reminder log once, on first access to appointment state"""
+        if not self._log_loaded:
+            self.load_reminder_log()
+    
     def load_reminder_log(self):
         """Load existing reminder log from file"""
+        self._log_loaded = True
         if self.reminder_log_path.exists():
             try:
-                with open(self.reminder_log_path, 'r') as f:
-                    data = json.load(f)
-                    # Reconstruct appointments from log
-                    logger.info(f"Loaded {len(data)} appointment reminders from log")
+                if orjson is not None:
+                    data = orjson.loads(self.reminder_log_path.read_bytes())
+                else:
+                    data = json.loads(self.reminder_log_path.read_text())
+                # Reconstruct appointments from log. Reminders whose send time passed while
+                # nothing was running are expired rather than sent late, and appointments
+                # already in the past are not tracked for no-shows (nobody reminded them)
+                now = datetime.now()
+                for entry in data:
+                    appointment = self._appointment_from_dict(entry)
+                    if appointment.appointment_id in self.appointments:
+                        continue
+                    for reminder in appointment.reminders:
+                        if reminder.status == ReminderStatus.PENDING and reminder.scheduled_time <= now:
+                            reminder.status = ReminderStatus.EXPIRED
+                    self._store_appointment(appointment, track_no_show=appointment.appointment_datetime > now)
+                    self.reminder_queue.extend(
+                        r for r in appointment.reminders
+                        if r.status == ReminderStatus.PENDING
+                    )
+                logger.info(f"Loaded {len(data)} appointment reminders from log")
             except Exception as e:
                 logger.error(f"Error loading reminder log: {e}")
     
+    @staticmethod
+    def _appointment_from_dict(data: Dict[str, Any]) -> AppointmentReminder:
+        """Rebuild an AppointmentReminder from its serialized log entry"""
+        reminders = [
+            Reminder(
+                reminder_id=r['reminder_id'],
+                appointment_id=r['appointment_id'],
+                patient_name=r['patient_name'],
+                patient_email=r['patient_email'],
+                patient_phone=r['patient_phone'],
+                appointment_datetime=datetime.fromisoformat(r['appointment_datetime']),
+                reminder_type=ReminderType.from_label(r['reminder_type']),
+                scheduled_time=datetime.fromisoformat(r['scheduled_time']),
+                status=ReminderStatus.from_label(r['status']),
+                message_content=r['message_content'],
+                response=r.get('response'),
+                sent_time=datetime.fromisoformat(r['sent_time']) if r.get('sent_time') else None
+            )
+            for r in data.get('reminders', [])
+        ]
+        return AppointmentReminder(
+            appointment_id=data['appointment_id'],
+            patient_name=data['patient_name'],
+            patient_email=data['patient_email'],
+            patient_phone=data['patient_phone'],
+            appointment_datetime=datetime.fromisoformat(data['appointment_datetime']),
+            doctor_name=data['doctor_name'],
+            location=data['location'],
+            appointment_status=AppointmentStatus.from_label(data['appointment_status']),
+            forms_completed=data.get('forms_completed', False),
+            cancellation_reason=data.get('cancellation_reason'),
+            reminders=reminders
+        )
+    
     def save_reminder_log(self):
         """Save reminder log to file"""
+        self._ensure_loaded()
         try:
             # Ensure directory exists
             self.reminder_log_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Convert to serializable format
+            with self._write_lock:
+                log_data = self._serialize_log()
+                if orjson is not None:
+                    self.reminder_log_path.write_bytes(orjson.dumps(log_data, option=orjson.OPT_INDENT_2))
+                else:
+                    with open(self.reminder_log_path, 'w') as f:
+                        json.dump(log_data, f, indent=2)
+            
+            logger.info(f"Saved {len(log_data)} appointment reminders to log")
+            
+        except Exception as e:
+            logger.error(f"Error saving reminder log: {e}")
+    
+    def _serialize_log(self) -> List[Dict[str, Any]]:
+        """Snapshot appointments into the JSON-ready log format"""
+        with self._state_lock:
             log_data = []
             for appointment in self.appointments.values():
                 appointment_dict = {
@@ -130,20 +326,13 @@ class ReminderSystem:
                     'appointment_datetime': appointment.appointment_datetime.isoformat(),
                     'doctor_name': appointment.doctor_name,
                     'location': appointment.location,
-                    'appointment_status': appointment.appointment_status.value,
+                    'appointment_status': appointment.appointment_status.label,
                     'forms_completed': appointment.forms_completed,
                     'cancellation_reason': appointment.cancellation_reason,
                     'reminders': [r.to_dict() for r in appointment.reminders]
                 }
                 log_data.append(appointment_dict)
-            
-            with open(self.reminder_log_path, 'w') as f:
-                json.dump(log_data, f, indent=2)
-            
-            logger.info(f"Saved {len(log_data)} appointment reminders to log")
-            
-        except Exception as e:
-            logger.error(f"Error saving reminder log: {e}")
+            return log_data
     
     def schedule_appointment_reminders(self, appointment_data: Dict[str, Any]) -> AppointmentReminder:
         """
@@ -152,9 +341,10 @@ class ReminderSystem:
         R2: Appointment - 1 day
         R3: Appointment - 2 hours
         """
+        self._ensure_loaded()
+        now = datetime.now()
         # Parse appointment data
-        appointment_id = appointment_data.get('appointment_id', 
-                                             datetime.now().strftime("%Y%m%d%H%M%S"))
+        appointment_id = appointment_data.get('appointment_id') or now.strftime("%Y%m%d%H%M%S")
         appointment_datetime = appointment_data['appointment_datetime']
         if isinstance(appointment_datetime, str):
             appointment_datetime = datetime.fromisoformat(appointment_datetime)
@@ -174,18 +364,18 @@ class ReminderSystem:
         duration_minutes = appointment_data.get('appointment_duration', 30)
         duration_text = f"{duration_minutes} minutes" if duration_minutes == 30 else f"{duration_minutes // 60} hour" if duration_minutes == 60 else f"{duration_minutes} minutes"
         
-        # Build and send Reminder 1 immediately (confirmation + intake forms)
-        r1 = Reminder(
-            reminder_id=f"{appointment_id}_{ReminderType.STANDARD.value}",
+        # Build all three reminders from the fields they share
+        common = dict(
             appointment_id=appointment_id,
             patient_name=appointment.patient_name,
             patient_email=appointment.patient_email,
             patient_phone=appointment.patient_phone,
             appointment_datetime=appointment_datetime,
-            reminder_type=ReminderType.STANDARD,
-            scheduled_time=datetime.now(),
-            status=ReminderStatus.PENDING,
-            message_content=(
+            status=ReminderStatus.PENDING
+        )
+        stages = [
+            # R1: immediate confirmation + intake forms
+            (ReminderType.STANDARD, now, (
                 f"Dear {appointment.patient_name},\n\n"
                 f"Your appointment is confirmed.\n\n"
                 f"Patient: {appointment.patient_name}\n"
@@ -195,9 +385,29 @@ class ReminderSystem:
                 f"Time: {appointment.appointment_datetime.strftime('%I:%M %p')}\n"
                 f"Duration: {duration_text}\n\n"
                 f"We've attached your intake forms. Please complete them before your visit."
-            )
-        )
-        appointment.reminders.append(r1)
+            )),
+            # R2: 1 day before
+            (ReminderType.FORM_CHECK, appointment_datetime - timedelta(days=1), (
+                "Have you completed your intake forms? Please do so before your visit. "
+                "Also, please confirm if you are attending. If you cannot attend, reply with 'Appointment - Cancel' to free up this slot."
+            )),
+            # R3: 2 hours before
+            (ReminderType.CONFIRMATION, appointment_datetime - timedelta(hours=2), (
+                "This is your final reminder. Please confirm your attendance. "
+                "If you are not attending, reply 'Appointment - Cancel' immediately."
+            )),
+        ]
+        for reminder_type, scheduled_time, message_content in stages:
+            appointment.reminders.append(Reminder(
+                reminder_id=f"{appointment_id}_{reminder_type.label}",
+                reminder_type=reminder_type,
+                scheduled_time=scheduled_time,
+                message_content=message_content,
+                **common
+            ))
+        r1 = appointment.reminders[0]
+        # R2 and R3 go to the queue; R1 is sent right away below
+        self.reminder_queue.extend(appointment.reminders[1:])
 
         # Attempt to send R1 now with intake_forms.pdf attachment
         try:
@@ -243,48 +453,8 @@ class ReminderSystem:
         except Exception as e:
             logger.error(f"Failed sending immediate Reminder 1: {e}")
 
-        # Schedule Reminder 2 (1 day before)
-        r2_time = appointment_datetime - timedelta(days=1)
-        r2 = Reminder(
-            reminder_id=f"{appointment_id}_{ReminderType.FORM_CHECK.value}",
-            appointment_id=appointment_id,
-            patient_name=appointment.patient_name,
-            patient_email=appointment.patient_email,
-            patient_phone=appointment.patient_phone,
-            appointment_datetime=appointment_datetime,
-            reminder_type=ReminderType.FORM_CHECK,
-            scheduled_time=r2_time,
-            status=ReminderStatus.PENDING,
-            message_content=(
-                "Have you completed your intake forms? Please do so before your visit. "
-                "Also, please confirm if you are attending. If you cannot attend, reply with 'Appointment - Cancel' to free up this slot."
-            )
-        )
-        appointment.reminders.append(r2)
-        self.reminder_queue.append(r2)
-
-        # Schedule Reminder 3 (2 hours before)
-        r3_time = appointment_datetime - timedelta(hours=2)
-        r3 = Reminder(
-            reminder_id=f"{appointment_id}_{ReminderType.CONFIRMATION.value}",
-            appointment_id=appointment_id,
-            patient_name=appointment.patient_name,
-            patient_email=appointment.patient_email,
-            patient_phone=appointment.patient_phone,
-            appointment_datetime=appointment_datetime,
-            reminder_type=ReminderType.CONFIRMATION,
-            scheduled_time=r3_time,
-            status=ReminderStatus.PENDING,
-            message_content=(
-                "This is your final reminder. Please confirm your attendance. "
-                "If you are not attending, reply 'Appointment - Cancel' immediately."
-            )
-        )
-        appointment.reminders.append(r3)
-        self.reminder_queue.append(r3)
-
         # Store appointment
-        self.appointments[appointment_id] = appointment
+        self._store_appointment(appointment)
         self.save_reminder_log()
         
         logger.info(f"Scheduled 3 reminders (R1 sent immediately) for appointment {appointment_id}")
@@ -382,48 +552,60 @@ Reply with:
         success = True
         
         try:
-            # Send email
+            # Email and SMS are independent, so both channels are sent concurrently
+            sends = []
             if self.email_service and reminder.patient_email:
                 email_subject = self._get_email_subject(reminder.reminder_type)
-                email_sent = await self.email_service.send_email(
+                sends.append(('email', self._call_channel(
+                    self.email_service.send_email,
                     to_email=reminder.patient_email,
                     subject=email_subject,
                     body=reminder.message_content
-                )
-                if not email_sent:
-                    logger.error(f"Failed to send email for reminder {reminder.reminder_id}")
-                    success = False
+                )))
             
-            # Send SMS
             if self.sms_service and reminder.patient_phone:
                 # Shorten message for SMS
                 sms_content = self._shorten_for_sms(reminder.message_content)
-                sms_sent = await self.sms_service.send_sms(
+                sends.append(('SMS', self._call_channel(
+                    self.sms_service.send_sms,
                     phone_number=reminder.patient_phone,
                     message=sms_content
-                )
-                if not sms_sent:
-                    logger.error(f"Failed to send SMS for reminder {reminder.reminder_id}")
+                )))
+            
+            results = await asyncio.gather(*(send for _, send in sends), return_exceptions=True)
+            for (channel, _), result in zip(sends, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error sending {channel} for reminder {reminder.reminder_id}: {result}")
+                    success = False
+                elif not result:
+                    logger.error(f"Failed to send {channel} for reminder {reminder.reminder_id}")
                     success = False
             
             # Update reminder status
             if success:
-                reminder.status = ReminderStatus.SENT
+                self._set_reminder_status(reminder, ReminderStatus.SENT)
                 reminder.sent_time = datetime.now()
                 logger.info(f"Successfully sent reminder {reminder.reminder_id}")
             else:
-                reminder.status = ReminderStatus.FAILED
+                self._set_reminder_status(reminder, ReminderStatus.FAILED)
                 logger.error(f"Failed to send reminder {reminder.reminder_id}")
             
-            self.save_reminder_log()
+            await asyncio.to_thread(self.save_reminder_log)
             return success
             
         except Exception as e:
             logger.error(f"Error sending reminder {reminder.reminder_id}: {e}")
-            reminder.status = ReminderStatus.FAILED
-            self.save_reminder_log()
+            self._set_reminder_status(reminder, ReminderStatus.FAILED)
+            await asyncio.to_thread(self.save_reminder_log)
             return False
     
+    @staticmethod
+    async def _call_channel(send, **kwargs):
+        """Await an async channel sender, or run a blocking one in a worker thread"""
+        if asyncio.iscoroutinefunction(send):
+            return await send(**kwargs)
+        return await asyncio.to_thread(send, **kwargs)
+    
     def _get_email_subject(self, reminder_type: ReminderType) -> str:
         """Get email subject based on reminder type"""
         subjects = {
@@ -500,6 +682,7 @@ Reply with:
                 df.loc[match, ['available', 'patient_name', 'patient_email', 'patient_phone', 'appointment_status']] = [True, '', '', '', 'cancelled']
 
             df.to_excel(schedules_path, index=False)
+            write_sidecar(df, schedules_path)
             logger.info(f"Reopened slot for {doctor} on {date} at {time} due to cancellation/no-show. (Appointment {appointment_id})")
             
             # Log the cancellation
@@ -530,9 +713,10 @@ Reply with:
             logger.error(f"Failed to process cancellation for appointment {appointment_id}: {e}")
             return False
     
-    async def process_reminder_queue(self):
-        """Process pending reminders in the queue"""
-        current_time = datetime.now()
+    async def process_reminder_queue(self, now: Optional[datetime] = None):
+        """Process pending reminders in the queue that are due as of `now` (default: current time)"""
+        self._ensure_loaded()
+        current_time = now or datetime.now()
         
         for reminder in self.reminder_queue:
             if (reminder.status == ReminderStatus.PENDING and 
@@ -547,6 +731,57 @@ Reply with:
             if r.status == ReminderStatus.PENDING
         ]
     
+    def _reopen_appointment_slot(self, appointment: AppointmentReminder):
+        """Best-effort reopen of an appointment's slot in the schedule"""
+        appt_dt = appointment.appointment_datetime
+        try:
+            self.reopen_slot(
+                appointment_id=appointment.appointment_id,
+                doctor=appointment.doctor_name,
+                date=f"{appt_dt:%Y-%m-%d}",
+                time=f"{appt_dt:%H:%M}",
+            )
+        except Exception:
+            pass
+    
+    def _forms_completed(self, appointment: AppointmentReminder, reminder: Reminder, response: str) -> Tuple[str, bool]:
+        appointment.forms_completed = True
+        return "Thank you! Forms marked as completed.", True
+    
+    def _forms_not_completed(self, appointment: AppointmentReminder, reminder: Reminder, response: str) -> Tuple[str, bool]:
+        # Trigger form resend
+        return "Forms will be resent to your email.", False
+    
+    def _confirm_appointment(self, appointment: AppointmentReminder, reminder: Reminder, response: str) -> Tuple[str, bool]:
+        self._set_appointment_status(appointment, AppointmentStatus.CONFIRMED)
+        self._set_reminder_status(reminder, ReminderStatus.CONFIRMED)
+        return "Appointment confirmed! See you soon.", True
+    
+    def _cancel_appointment(self, appointment: AppointmentReminder, reminder: Reminder, response: str) -> Tuple[str, bool]:
+        self._set_appointment_status(appointment, AppointmentStatus.CANCELLED)
+        # Extract cancellation reason if provided
+        appointment.cancellation_reason = response
+        # Reopen the slot in the schedule if possible
+        self._reopen_appointment_slot(appointment)
+        return "Appointment cancelled. Thank you for letting us know.", True
+    
+    def _request_reschedule(self, appointment: AppointmentReminder, reminder: Reminder, response: str) -> Tuple[str, bool]:
+        self._set_appointment_status(appointment, AppointmentStatus.RESCHEDULED)
+        return "Please call (555) 123-4567 to reschedule your appointment.", True
+    
+    _RESPONSE_HANDLERS = {
+        (ReminderType.FORM_CHECK, 'yes'): _forms_completed,
+        (ReminderType.FORM_CHECK, 'no'): _forms_not_completed,
+        (ReminderType.CONFIRMATION, 'confirm'): _confirm_appointment,
+        (ReminderType.CONFIRMATION, 'cancel'): _cancel_appointment,
+        (ReminderType.CONFIRMATION, 'reschedule'): _request_reschedule,
+    }
+    
+    _RESPONSE_FALLBACKS = {
+        ReminderType.FORM_CHECK: "Response not understood. Please reply YES or NO.",
+        ReminderType.CONFIRMATION: "Please reply CONFIRM, CANCEL, or RESCHEDULE.",
+    }
+    
     def process_patient_response(self, appointment_id: str, 
                                 reminder_type: ReminderType,
                                 response: str) -> Tuple[bool, str]:
@@ -561,11 +796,11 @@ Reply with:
         Returns:
             Tuple of (success, message)
         """
+        self._ensure_loaded()
         if appointment_id not in self.appointments:
             return False, "Appointment not found"
         
         appointment = self.appointments[appointment_id]
-        response_lower = response.lower().strip()
         
         # Find the specific reminder
         reminder = next(
@@ -577,54 +812,30 @@ Reply with:
         if not reminder:
             return False, "Reminder not found"
         
-        reminder.response = response
+        # Only rewrite the log when the reply actually changes stored state
+        changed = reminder.response != response
+        self._record_response(reminder, response)
         
-        # Process based on reminder type
-        if reminder_type == ReminderType.FORM_CHECK:
-            if 'yes' in response_lower:
-                appointment.forms_completed = True
-                message = "Thank you! Forms marked as completed."
-            elif 'no' in response_lower:
-                # Trigger form resend
-                message = "Forms will be resent to your email."
-            else:
-                message = "Response not understood. Please reply YES or NO."
-        
-        elif reminder_type == ReminderType.CONFIRMATION:
-            if 'confirm' in response_lower:
-                appointment.appointment_status = AppointmentStatus.CONFIRMED
-                reminder.status = ReminderStatus.CONFIRMED
-                message = "Appointment confirmed! See you soon."
-            elif 'appointment - cancel' in response_lower or 'cancel' in response_lower:
-                appointment.appointment_status = AppointmentStatus.CANCELLED
-                # Extract cancellation reason if provided
-                appointment.cancellation_reason = response
-                message = "Appointment cancelled. Thank you for letting us know."
-                # Reopen the slot in the schedule if possible
-                try:
-                    appt_dt = appointment.appointment_datetime
-                    self.reopen_slot(
-                        appointment_id=appointment.appointment_id,
-                        doctor=appointment.doctor_name,
-                        date=appt_dt.strftime('%Y-%m-%d'),
-                        time=appt_dt.strftime('%H:%M'),
-                    )
-                except Exception:
-                    pass
-            elif 'reschedule' in response_lower:
-                appointment.appointment_status = AppointmentStatus.RESCHEDULED
-                message = "Please call (555) 123-4567 to reschedule your appointment."
-            else:
-                message = "Please reply CONFIRM, CANCEL, or RESCHEDULE."
+        # Dispatch on the first keyword that is meaningful for this reminder type
+        handler = None
+        for match in self._RESPONSE_RE.finditer(response):
+            handler = self._RESPONSE_HANDLERS.get((reminder_type, match.group(1).lower()))
+            if handler:
+                break
         
-        else:  # Standard reminder
-            message = "Thank you for your response."
+        if handler:
+            message, mutated = handler(self, appointment, reminder, response)
+            changed = changed or mutated
+        else:
+            message = self._RESPONSE_FALLBACKS.get(reminder_type, "Thank you for your response.")
         
-        self.save_reminder_log()
+        if changed:
+            self.save_reminder_log()
         return True, message
     
     def get_appointment_status(self, appointment_id: str) -> Optional[AppointmentStatus]:
         """Get current status of an appointment"""
+        self._ensure_loaded()
         if appointment_id in self.appointments:
             return self.appointments[appointment_id].appointment_status
         return None
@@ -639,17 +850,15 @@ Reply with:
         Returns:
             List of pending reminders
         """
+        self._ensure_loaded()
         current_time = datetime.now()
         window_end = current_time + time_window
         
-        pending = []
-        for reminder in self.reminder_queue:
+        return [
+            reminder for reminder in self.reminder_queue
             if (reminder.status == ReminderStatus.PENDING and
-                reminder.scheduled_time >= current_time and
-                reminder.scheduled_time <= window_end):
-                pending.append(reminder)
-        
-        return pending
+                current_time <= reminder.scheduled_time <= window_end)
+        ]
     
     def cancel_appointment_reminders(self, appointment_id: str, reason: str = None) -> bool:
         """
@@ -662,17 +871,18 @@ Reply with:
         Returns:
             True if cancelled successfully
         """
+        self._ensure_loaded()
         if appointment_id not in self.appointments:
             return False
         
         appointment = self.appointments[appointment_id]
-        appointment.appointment_status = AppointmentStatus.CANCELLED
+        self._set_appointment_status(appointment, AppointmentStatus.CANCELLED)
         appointment.cancellation_reason = reason
         
         # Cancel all pending reminders
         for reminder in appointment.reminders:
             if reminder.status == ReminderStatus.PENDING:
-                reminder.status = ReminderStatus.CANCELLED
+                self._set_reminder_status(reminder, ReminderStatus.CANCELLED)
         
         # Remove from queue
         self.reminder_queue = [
@@ -687,107 +897,123 @@ Reply with:
     
     def generate_reminder_report(self) -> pd.DataFrame:
         """Generate report of all reminders for admin review"""
-        report_data = []
+        self._ensure_loaded()
+        columns = {
+            'Appointment ID': [],
+            'Patient Name': [],
+            'Appointment Date': [],
+            'Doctor': [],
+            'Reminder Type': [],
+            'Scheduled Send': [],
+            'Status': [],
+            'Sent Time': [],
+            'Patient Response': [],
+            'Forms Completed': [],
+            'Appointment Status': [],
+            'Cancellation Reason': []
+        }
         
+        # Fill parallel column lists; datetimes are formatted in one vectorized pass below.
+        # Appointment-level fields are read once and repeated for each of its reminders.
         for appointment in self.appointments.values():
-            for reminder in appointment.reminders:
-                report_data.append({
-                    'Appointment ID': appointment.appointment_id,
-                    'Patient Name': appointment.patient_name,
-                    'Appointment Date': appointment.appointment_datetime.strftime("%Y-%m-%d %H:%M"),
-                    'Doctor': appointment.doctor_name,
-                    'Reminder Type': reminder.reminder_type.value,
-                    'Scheduled Send': reminder.scheduled_time.strftime("%Y-%m-%d %H:%M"),
-                    'Status': reminder.status.value,
-                    'Sent Time': reminder.sent_time.strftime("%Y-%m-%d %H:%M") if reminder.sent_time else 'N/A',
-                    'Patient Response': reminder.response or 'None',
-                    'Forms Completed': appointment.forms_completed,
-                    'Appointment Status': appointment.appointment_status.value,
-                    'Cancellation Reason': appointment.cancellation_reason or 'N/A'
-                })
-        
-        df = pd.DataFrame(report_data)
+            reminders = appointment.reminders
+            n = len(reminders)
+            columns['Appointment ID'] += [appointment.appointment_id] * n
+            columns['Patient Name'] += [appointment.patient_name] * n
+            columns['Appointment Date'] += [appointment.appointment_datetime] * n
+            columns['Doctor'] += [appointment.doctor_name] * n
+            columns['Forms Completed'] += [appointment.forms_completed] * n
+            columns['Appointment Status'] += [appointment.appointment_status.label] * n
+            columns['Cancellation Reason'] += [appointment.cancellation_reason or 'N/A'] * n
+            for reminder in reminders:
+                columns['Reminder Type'].append(reminder.reminder_type.label)
+                columns['Scheduled Send'].append(reminder.scheduled_time)
+                columns['Status'].append(reminder.status.label)
+                columns['Sent Time'].append(reminder.sent_time)
+                columns['Patient Response'].append(reminder.response or 'None')
+        
+        for name in ('Appointment Date', 'Scheduled Send', 'Sent Time'):
+            formatted = pd.to_datetime(pd.Series(columns[name], dtype=object)).dt.strftime("%Y-%m-%d %H:%M")
+            columns[name] = formatted.fillna('N/A')
+        
+        df = pd.DataFrame(columns)
         
         # Save to Excel
         export_path = Path("data/exports/reminder_report.xlsx")
         export_path.parent.mkdir(parents=True, exist_ok=True)
         df.to_excel(export_path, index=False, sheet_name='Reminder Report')
         
-        logger.info(f"Generated reminder report with {len(report_data)} entries")
+        logger.info(f"Generated reminder report with {len(df)} entries")
         
         return df
     
     def get_reminder_statistics(self) -> Dict[str, Any]:
         """Get statistics about reminder system performance"""
+        self._ensure_loaded()
+        FORM = ReminderType.FORM_CHECK
+        CONF = ReminderType.CONFIRMATION
+        NS = AppointmentStatus.NO_SHOW.label
+        CN = AppointmentStatus.CANCELLED.label
+        
         total_appointments = len(self.appointments)
-        total_reminders = sum(len(a.reminders) for a in self.appointments.values())
+        status_counts = self._reminder_status_counts
+        appointment_status_counts = self._appointment_status_counts
+        type_totals = self._type_totals
+        type_responses = self._type_responses
+        total_reminders = sum(status_counts.values())
         
-        # Count by status
-        status_counts = {status: 0 for status in ReminderStatus}
-        appointment_status_counts = {status: 0 for status in AppointmentStatus}
+        # Calculate response rates from the running counters
+        form_total = type_totals[FORM]
+        conf_total = type_totals[CONF]
+        form_response_rate = type_responses[FORM] / form_total * 100 if form_total else 0
+        confirmation_response_rate = type_responses[CONF] / conf_total * 100 if conf_total else 0
         
-        for appointment in self.appointments.values():
-            appointment_status_counts[appointment.appointment_status] += 1
-            for reminder in appointment.reminders:
-                status_counts[reminder.status] += 1
-        
-        # Calculate response rates
-        form_check_reminders = [
-            r for a in self.appointments.values()
-            for r in a.reminders
-            if r.reminder_type == ReminderType.FORM_CHECK
-        ]
-        form_response_rate = (
-            sum(1 for r in form_check_reminders if r.response) / 
-            len(form_check_reminders) * 100
-            if form_check_reminders else 0
-        )
-        
-        confirmation_reminders = [
-            r for a in self.appointments.values()
-            for r in a.reminders
-            if r.reminder_type == ReminderType.CONFIRMATION
-        ]
-        confirmation_response_rate = (
-            sum(1 for r in confirmation_reminders if r.response) /
-            len(confirmation_reminders) * 100
-            if confirmation_reminders else 0
-        )
+        if total_appointments:
+            no_show_rate = f"{appointment_status_counts[NS] / total_appointments * 100:.1f}%"
+            cancellation_rate = f"{appointment_status_counts[CN] / total_appointments * 100:.1f}%"
+        else:
+            no_show_rate = cancellation_rate = "0%"
         
         return {
             'total_appointments': total_appointments,
             'total_reminders': total_reminders,
-            'reminder_status': {s.value: c for s, c in status_counts.items()},
-            'appointment_status': {s.value: c for s, c in appointment_status_counts.items()},
+            'reminder_status': dict(status_counts),
+            'appointment_status': dict(appointment_status_counts),
             'form_response_rate': f"{form_response_rate:.1f}%",
             'confirmation_response_rate': f"{confirmation_response_rate:.1f}%",
-            'no_show_rate': f"{(appointment_status_counts[AppointmentStatus.NO_SHOW] / total_appointments * 100):.1f}%" if total_appointments > 0 else "0%",
-            'cancellation_rate': f"{(appointment_status_counts[AppointmentStatus.CANCELLED] / total_appointments * 100):.1f}%" if total_appointments > 0 else "0%"
+            'no_show_rate': no_show_rate,
+            'cancellation_rate': cancellation_rate
         }
     
-    def mark_no_shows(self):
-        """Mark appointments as no-show if past appointment time without confirmation"""
-        current_time = datetime.now()
+    def mark_no_shows(self, now: Optional[datetime] = None):
+        """Mark appointments as no-show if past appointment time (as of `now`) without confirmation"""
+        self._ensure_loaded()
+        current_time = now or datetime.now()
+        changed = False
         
-        for appointment in self.appointments.values():
-            if (appointment.appointment_datetime < current_time and
-                appointment.appointment_status == AppointmentStatus.PENDING):
+        # Only past-due entries of the pending heap need checking
+        self._compact_pending_heap()
+        pending = self._pending_by_time
+        while True:
+            with self._state_lock:
+                if not pending or pending[0][0] >= current_time:
+                    break
+                appointment_dt, appointment_id = heapq.heappop(pending)
+                # Skip entries for appointments since confirmed, cancelled or replaced
+                if appointment_id not in self._pending_ids:
+                    continue
+                appointment = self.appointments[appointment_id]
+                if appointment.appointment_datetime != appointment_dt:
+                    continue
                 
-                appointment.appointment_status = AppointmentStatus.NO_SHOW
-                logger.info(f"Marked appointment {appointment.appointment_id} as no-show")
-                # Reopen slot
-                try:
-                    appt_dt = appointment.appointment_datetime
-                    self.reopen_slot(
-                        appointment_id=appointment.appointment_id,
-                        doctor=appointment.doctor_name,
-                        date=appt_dt.strftime('%Y-%m-%d'),
-                        time=appt_dt.strftime('%H:%M'),
-                    )
-                except Exception:
-                    pass
+                self._set_appointment_status(appointment, AppointmentStatus.NO_SHOW)
+            changed = True
+            logger.info(f"Marked appointment {appointment.appointment_id} as no-show")
+            # Reopen slot
+            self._reopen_appointment_slot(appointment)
         
-        self.save_reminder_log()
+        if changed:
+            self.save_reminder_log()
 
 
 class ReminderScheduler:
@@ -796,35 +1022,48 @@ class ReminderScheduler:
     def __init__(self, reminder_system: ReminderSystem):
         self.reminder_system = reminder_system
         self.running = False
+        # Set by stop() so sleeping ticks wake up immediately
+        self._stop_event = asyncio.Event()
         
+    async def _sleep_unless_stopped(self, seconds: float) -> bool:
+        """Sleep for up to `seconds`; return True if the scheduler was stopped meanwhile"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
     async def start(self):
         """Start the reminder scheduler"""
         self.running = True
+        self._stop_event.clear()
         logger.info("Reminder scheduler started")
         try:
             while self.running:
                 try:
-                    # Process reminder queue
-                    await self.reminder_system.process_reminder_queue()
+                    # One timestamp per tick keeps both passes consistent
+                    now = datetime.now()
                     
-                    # Mark no-shows
-                    self.reminder_system.mark_no_shows()
+                    # Send due reminders and mark no-shows side by side; no-show marking
+                    # does blocking file I/O (slot reopening, log write) so it runs in a thread
+                    results = await asyncio.gather(
+                        self.reminder_system.process_reminder_queue(now=now),
+                        asyncio.to_thread(self.reminder_system.mark_no_shows, now=now),
+                        return_exceptions=True
+                    )
+                    for result in results:
+                        if isinstance(result, Exception):
+                            raise result
                     
-                    # Sleep in short intervals to support fast shutdown
-                    total_sleep_seconds = 300
-                    interval_seconds = 1
-                    for _ in range(0, total_sleep_seconds, interval_seconds):
-                        if not self.running:
-                            break
-                        await asyncio.sleep(interval_seconds)
+                    # Wait for the next tick; stop() wakes this up immediately
+                    if await self._sleep_unless_stopped(300):
+                        break
                     
                 except Exception as e:
                     logger.error(f"Error in reminder scheduler: {e}")
                     # Short backoff and continue
-                    for _ in range(60):
-                        if not self.running:
-                            break
-                        await asyncio.sleep(1)
+                    if await self._sleep_unless_stopped(60):
+                        break
         except asyncio.CancelledError:
             # Graceful shutdown
             logger.info("Reminder scheduler task cancelled")
@@ -833,16 +1072,18 @@ class ReminderScheduler:
     def stop(self):
         """Stop the reminder scheduler"""
         self.running = False
+        self._stop_event.set()
         logger.info("Reminder scheduler stopped")
 
 
 # Utility functions for testing and simulation
 def create_test_appointment(days_ahead: int = 7) -> Dict[str, Any]:
     """Create a test appointment for simulation"""
-    appointment_time = datetime.now() + timedelta(days=days_ahead)
+    now = datetime.now()
+    appointment_time = now + timedelta(days=days_ahead)
     
     return {
-        'appointment_id': datetime.now().strftime("%Y%m%d%H%M%S"),
+        'appointment_id': now.strftime("%Y%m%d%H%M%S"),
         'patient_name': 'John Doe',
         'patient_email': 'john.doe@example.com',
         'patient_phone': '+1234567890',
@@ -878,23 +1119,19 @@ async def simulate_reminder_workflow():
     # Create scheduler
     scheduler = ReminderScheduler(reminder_system)
     
-    # Run scheduler for simulation
-    scheduler_task = asyncio.create_task(scheduler.start())
-    
-    # Simulate for a short period
-    await asyncio.sleep(10)
-    
-    # Stop scheduler and wait for graceful exit
-    scheduler.stop()
-    try:
-        await scheduler_task
-    except asyncio.CancelledError:
-        pass
+    # Run scheduler for a short period; the task group waits for it to exit after stop()
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(scheduler.start())
+        await asyncio.sleep(10)
+        scheduler.stop()
     
     # Generate report
     stats = reminder_system.get_reminder_statistics()
     print("\nReminder System Statistics:")
-    print(json.dumps(stats, indent=2))
+    if orjson is not None:
+        print(orjson.dumps(stats, option=orjson.OPT_INDENT_2).decode())
+    else:
+        print(json.dumps(stats, indent=2))
     
     # Generate Excel report
     report_df = reminder_system.generate_reminder_report()
@@ -4,18 +4,58 @@ Implements business logic: 60 min for new patients, 30 min for returning patient
 """
 
 import pandas as pd
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta, time, date
 from typing import Dict, List, Optional, Tuple
 import json
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from bisect import bisect_left, insort
+from itertools import accumulate
+from operator import attrgetter, itemgetter
 from enum import Enum
 import os
+import atexit
+import threading
+import numpy as np
+try:
+    from numba import njit
+except ImportError:  # numba not installed, the slot kernel runs as plain Python
+    njit = None  # type: ignore
+try:
+    import xlsxwriter
+except ImportError:  # xlsxwriter not installed, exports go through pandas/openpyxl
+    xlsxwriter = None  # type: ignore
+
+try:
+    from backend.interval_tree import IntervalTree
+except ModuleNotFoundError:
+    from interval_tree import IntervalTree
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_start_time = attrgetter('start_time')
+_start_time_key = itemgetter('start_time')
+
+# Indexed by datetime.weekday(); avoids strftime('%A') on the slot-search path
+_DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+@lru_cache(maxsize=1024)
+def _day_anchors(day: date, start_hour: time, end_hour: time,
+                 lunch_start: time, lunch_end: time) -> Tuple[datetime, datetime, datetime, datetime]:
+    """Working-day boundaries for a date: (work_start, work_end, lunch_start, lunch_end)"""
+    return (
+        datetime.combine(day, start_hour),
+        datetime.combine(day, end_hour),
+        datetime.combine(day, lunch_start),
+        datetime.combine(day, lunch_end),
+    )
+
 class PatientType(Enum):
     """Patient classification for appointment duration"""
     NEW = "new"
@@ -28,7 +68,7 @@ class AppointmentStatus(Enum):
     BLOCKED = "blocked"
     CANCELLED = "cancelled"
 
-@dataclass
+@dataclass(slots=True)
 class TimeSlot:
     """Represents a time slot for appointments"""
     start_time: datetime
@@ -41,13 +81,17 @@ class TimeSlot:
     
     def to_dict(self) -> Dict:
         """Convert to dictionary for serialization"""
-        result = asdict(self)
-        result['start_time'] = self.start_time.isoformat()
-        result['end_time'] = self.end_time.isoformat()
-        result['status'] = self.status.value
-        return result
+        return {
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat(),
+            'duration_minutes': self.duration_minutes,
+            'status': self.status.value,
+            'patient_id': self.patient_id,
+            'doctor_id': self.doctor_id,
+            'appointment_id': self.appointment_id
+        }
 
-@dataclass
+@dataclass(slots=True)
 class DoctorSchedule:
     """Doctor's availability and schedule"""
     doctor_id: str
@@ -57,7 +101,276 @@ class DoctorSchedule:
     working_days: List[str]  # ['Monday', 'Tuesday', etc.]
     working_hours: Dict[str, Tuple[time, time]]  # {'Monday': (time(9,0), time(17,0))}
     lunch_break: Tuple[time, time]  # (time(12,0), time(13,0))
-    booked_slots: List[TimeSlot]
+    # Booked slots partitioned by day (each list sorted by start time), plus lookup by appointment ID
+    booked_by_date: Dict[date, List[TimeSlot]] = field(default_factory=dict)
+    slot_index: Dict[str, TimeSlot] = field(default_factory=dict)
+    # Running total of booked minutes per day, kept in step with booked_by_date
+    booked_minutes_by_date: Dict[date, int] = field(default_factory=dict)
+    # Interval tree over all booked slots for O(log n) conflict checks
+    slot_tree: IntervalTree = field(default_factory=IntervalTree, repr=False, compare=False)
+    # Bit i set when _DAY_NAMES[i] is a working day; derived from working_days at construction
+    working_days_mask: int = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.working_days_mask = sum(1 << i for i, name in enumerate(_DAY_NAMES) if name in self.working_days)
+    
+    def works_on(self, weekday: int) -> bool:
+        """Whether the doctor works on a datetime.weekday() index"""
+        return bool(self.working_days_mask >> weekday & 1)
+    
+    def add_booking(self, slot: TimeSlot):
+        """Record a booked slot"""
+        day = slot.start_time.date()
+        insort(self.booked_by_date.setdefault(day, []), slot, key=_start_time)
+        self.booked_minutes_by_date[day] = self.booked_minutes_by_date.get(day, 0) + slot.duration_minutes
+        self.slot_index[slot.appointment_id] = slot
+        self.slot_tree.insert(slot.start_time, slot.end_time, slot)
+    
+    def remove_booking(self, appointment_id: str) -> Optional[TimeSlot]:
+        """Remove a booked slot by appointment ID, returning it if found"""
+        slot = self.slot_index.pop(appointment_id, None)
+        if slot is not None:
+            self.slot_tree.delete(appointment_id)
+            day = slot.start_time.date()
+            day_slots = self.booked_by_date[day]
+            self.booked_minutes_by_date[day] -= slot.duration_minutes
+            # Identity match from the first slot with this start time: dataclass __eq__ would compare every field
+            for i in range(bisect_left(day_slots, slot.start_time, key=_start_time), len(day_slots)):
+                if day_slots[i] is slot:
+                    del day_slots[i]
+                    break
+            if not day_slots:
+                del self.booked_by_date[day]
+                del self.booked_minutes_by_date[day]
+        return slot
+    
+    def slots_on(self, day: date) -> List[TimeSlot]:
+        """Booked slots on a given day, sorted by start time"""
+        return self.booked_by_date.get(day, [])
+    
+    def conflicts(self, start: datetime, end: datetime) -> List[TimeSlot]:
+        """Booked slots overlapping [start, end)"""
+        return self.slot_tree.query(start, end)
+    
+    def is_booked(self, start: datetime, end: datetime) -> bool:
+        """Whether any booked slot overlaps [start, end)"""
+        return self.slot_tree.overlaps(start, end)
+
+
+def _free_slot_kernel(work_start, work_end, lunch_start, lunch_end,
+                      starts, max_ends, duration, buffer, now, out):
+    """
+    Integer core of the free-slot walk (all times in epoch microseconds)
+    
+    Writes slot starts into `out` and returns how many were found. Candidate
+    times only move forward, so the booking pointer advances monotonically
+    instead of bisecting on every step.
+    """
+    found = 0
+    j = 0
+    n = len(starts)
+    current_time = work_start
+    
+    while current_time < work_end and found < len(out):
+        slot_end = current_time + duration
+        
+        # Skip lunch break, then carry on with the moved window in this same iteration
+        if current_time < lunch_end and slot_end > lunch_start:
+            current_time = lunch_end
+            slot_end = current_time + duration
+        
+        # Skip if slot extends beyond working hours
+        if slot_end > work_end:
+            break
+        
+        # Latest booking starting before slot_end; max_ends covers everything up to it
+        while j < n and starts[j] < slot_end:
+            j += 1
+        if j > 0 and max_ends[j - 1] > current_time:
+            current_time = max_ends[j - 1] + buffer
+        else:
+            # Check if slot is in the past
+            if current_time > now:
+                out[found] = current_time
+                found += 1
+            current_time = slot_end + buffer
+    
+    return found
+
+
+if njit is not None:
+    _free_slot_kernel = njit(cache=True)(_free_slot_kernel)
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+_US_PER_MINUTE = 60 * 1_000_000
+_MINUTES_PER_DAY = 24 * 60
+# 'HH:MM' for each minute of the day, indexed by minute
+_HHMM = [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(_MINUTES_PER_DAY)]
+
+
+def _hhmm(moment) -> str:
+    """strftime('%H:%M') for a time or datetime, by table lookup"""
+    return _HHMM[moment.hour * 60 + moment.minute]
+
+
+def _to_us(moment: datetime) -> int:
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+@lru_cache(maxsize=256)
+def _empty_day_grid(work_end: int, lunch_start: int, lunch_end: int,
+                    duration: int, buffer: int) -> np.ndarray:
+    """
+    Slot starts for a day with no bookings, as offsets from work start (microseconds)
+    
+    Depends only on the working-hours shape, so one grid serves every date with that shape.
+    """
+    out = np.empty(max(work_end // duration + 1, 0), dtype=np.int64)
+    found = _free_slot_kernel(0, work_end, lunch_start, lunch_end,
+                              np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                              duration, buffer, -1, out)
+    grid = out[:found].copy()
+    grid.flags.writeable = False
+    return grid
+
+
+def _scan_free_slots(doctor_id: str, work_start: datetime, work_end: datetime,
+                     lunch_start: datetime, lunch_end: datetime,
+                     starts: List[datetime], max_ends: List[datetime],
+                     duration: int, buffer_delta: timedelta,
+                     num_slots: int, now: datetime) -> List[TimeSlot]:
+    """Walk one working day and collect free slots (module-level so process pool workers can run it)"""
+    duration_delta = timedelta(minutes=duration)
+    work_start_us = _to_us(work_start)
+    now_us = _to_us(now)
+    
+    if not starts:
+        # Nothing booked: the walk is the cached grid, minus starts that are already past
+        grid = _empty_day_grid(
+            _to_us(work_end) - work_start_us, _to_us(lunch_start) - work_start_us,
+            _to_us(lunch_end) - work_start_us, duration_delta // _MICROSECOND,
+            buffer_delta // _MICROSECOND
+        ) + work_start_us
+        slot_starts = grid[grid > now_us][:max(num_slots, 0)]
+    else:
+        starts_us = [_to_us(moment) for moment in starts]
+        ends_us = [_to_us(moment) for moment in max_ends]
+        if njit is not None:
+            starts_us = np.array(starts_us, dtype=np.int64)
+            ends_us = np.array(ends_us, dtype=np.int64)
+        out = np.empty(max(num_slots, 0), dtype=np.int64)
+        
+        found = _free_slot_kernel(
+            work_start_us, _to_us(work_end), _to_us(lunch_start), _to_us(lunch_end),
+            starts_us, ends_us, duration_delta // _MICROSECOND, buffer_delta // _MICROSECOND,
+            now_us, out
+        )
+        slot_starts = out[:found]
+    
+    available_slots = []
+    for start_us in slot_starts.tolist():
+        slot_start = _EPOCH + timedelta(microseconds=start_us)
+        available_slots.append(TimeSlot(
+            start_time=slot_start,
+            end_time=slot_start + duration_delta,
+            duration_minutes=duration,
+            status=AppointmentStatus.AVAILABLE,
+            doctor_id=doctor_id
+        ))
+    return available_slots
+
+
+_SEARCH_POOL: Optional[ProcessPoolExecutor] = None
+_SEARCH_POOL_LOCK = threading.Lock()
+
+
+def _get_search_pool() -> ProcessPoolExecutor:
+    """Process pool shared by multi-doctor searches, created on first use and shut down at exit"""
+    global _SEARCH_POOL
+    with _SEARCH_POOL_LOCK:
+        if _SEARCH_POOL is None:
+            # Spawn, not fork: host processes (APScheduler, Streamlit, Flask) already run threads
+            _SEARCH_POOL = ProcessPoolExecutor(mp_context=get_context('spawn'))
+            atexit.register(_SEARCH_POOL.shutdown)
+        return _SEARCH_POOL
+
+
+# Sample schedules (restricted to 5 doctors), built once at import
+_SAMPLE_DOCTORS = [
+    {
+        'doctor_id': 'dr_mehta',
+        'doctor_name': 'Dr. Mehta',
+        'specialization': 'Orthopedics',
+        'location': 'Main Clinic - Ortho',
+        'working_days': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'],
+        'working_hours': {
+            'Monday': (time(9, 0), time(17, 0)),
+            'Tuesday': (time(9, 0), time(17, 0)),
+            'Wednesday': (time(9, 0), time(17, 0)),
+            'Thursday': (time(9, 0), time(17, 0)),
+            'Friday': (time(9, 0), time(15, 0))
+        },
+        'lunch_break': (time(12, 0), time(13, 0))
+    },
+    {
+        'doctor_id': 'dr_reddy',
+        'doctor_name': 'Dr. Reddy',
+        'specialization': 'Pediatrics',
+        'location': 'Children\'s Wing',
+        'working_days': ['Monday', 'Wednesday', 'Friday'],
+        'working_hours': {
+            'Monday': (time(8, 0), time(16, 0)),
+            'Wednesday': (time(8, 0), time(16, 0)),
+            'Friday': (time(8, 0), time(14, 0))
+        },
+        'lunch_break': (time(12, 30), time(13, 30))
+    },
+    {
+        'doctor_id': 'dr_kapoor',
+        'doctor_name': 'Dr. Kapoor',
+        'specialization': 'Dermatology',
+        'location': 'Skin Center',
+        'working_days': ['Tuesday', 'Wednesday', 'Thursday', 'Friday'],
+        'working_hours': {
+            'Tuesday': (time(10, 0), time(18, 0)),
+            'Wednesday': (time(10, 0), time(18, 0)),
+            'Thursday': (time(10, 0), time(18, 0)),
+            'Friday': (time(10, 0), time(16, 0))
+        },
+        'lunch_break': (time(13, 0), time(14, 0))
+    },
+    {
+        'doctor_id': 'dr_sharma',
+        'doctor_name': 'Dr. Sharma',
+        'specialization': 'General Medicine',
+        'location': 'Main Clinic - GM',
+        'working_days': ['Monday', 'Tuesday', 'Thursday', 'Friday'],
+        'working_hours': {
+            'Monday': (time(9, 0), time(17, 0)),
+            'Tuesday': (time(9, 0), time(17, 0)),
+            'Thursday': (time(9, 0), time(17, 0)),
+            'Friday': (time(9, 0), time(15, 0))
+        },
+        'lunch_break': (time(12, 0), time(13, 0))
+    },
+    {
+        'doctor_id': 'dr_iyer',
+        'doctor_name': 'Dr. Iyer',
+        'specialization': 'Cardiology',
+        'location': 'Heart Center',
+        'working_days': ['Monday', 'Wednesday', 'Friday'],
+        'working_hours': {
+            'Monday': (time(8, 0), time(16, 0)),
+            'Wednesday': (time(8, 0), time(16, 0)),
+            'Friday': (time(8, 0), time(14, 0))
+        },
+        'lunch_break': (time(12, 30), time(13, 30))
+    }
+]
+
 
 class Scheduler:
     """
@@ -71,6 +384,21 @@ class Scheduler:
     RETURNING_PATIENT_DURATION = 30  # minutes
     BUFFER_TIME = 5  # minutes between appointments
     
+    # Lookup tables derived from the rules above, so hot paths skip branching and timedelta construction
+    _DURATION: Dict[PatientType, int] = {
+        PatientType.NEW: NEW_PATIENT_DURATION,
+        PatientType.RETURNING: RETURNING_PATIENT_DURATION,
+    }
+    _DURATION_DELTA: Dict[PatientType, timedelta] = {
+        patient_type: timedelta(minutes=minutes) for patient_type, minutes in _DURATION.items()
+    }
+    _BUFFER_DELTA = timedelta(minutes=BUFFER_TIME)
+    # Smallest gap worth reporting: one returning-patient visit plus its buffer
+    _MIN_GAP_DELTA = timedelta(minutes=RETURNING_PATIENT_DURATION + BUFFER_TIME)
+    
+    # Below this many working doctors, find_available_slots_all(parallel=True) still searches in-process
+    PARALLEL_SEARCH_MIN_DOCTORS = 5
+    
     def __init__(self, schedule_file: Optional[str] = None):
         """
         Initialize scheduler with doctor schedules
@@ -80,6 +408,9 @@ class Scheduler:
         """
         self.doctors: Dict[str, DoctorSchedule] = {}
         self.appointments: Dict[str, Dict] = {}
+        self._appts_df: Optional[pd.DataFrame] = None  # summary frame, rebuilt lazily after book/cancel
+        # Active appointment records per (doctor_id, day), sorted by start time
+        self._apts_by_doctor_date: Dict[Tuple[str, date], List[Dict]] = {}
         self.schedule_file = schedule_file or "data/doctor_schedules.xlsx"
         
         # Load or create schedules
@@ -118,9 +449,7 @@ class Scheduler:
         Returns:
             Duration in minutes
         """
-        if patient_type == PatientType.NEW:
-            return self.NEW_PATIENT_DURATION
-        return self.RETURNING_PATIENT_DURATION
+        return self._DURATION[patient_type]
     
     def find_available_slots(self, doctor_id: str, date: datetime, 
                            patient_type: PatientType,
@@ -142,66 +471,66 @@ class Scheduler:
             return []
         
         doctor = self.doctors[doctor_id]
-        duration = self.get_appointment_duration(patient_type)
-        
-        # Check if doctor works on this day
-        day_name = date.strftime('%A')
-        if day_name not in doctor.working_days:
-            logger.info(f"Doctor {doctor_id} doesn't work on {day_name}")
+        args = self._slot_search_args(doctor, date, patient_type, num_slots)
+        if args is None:
+            logger.info(f"Doctor {doctor_id} doesn't work on {_DAY_NAMES[date.weekday()]}")
             return []
+        return _scan_free_slots(*args)
+    
+    def _slot_search_args(self, doctor: DoctorSchedule, date: datetime,
+                          patient_type: PatientType, num_slots: int) -> Optional[Tuple]:
+        """Plain, picklable inputs for _scan_free_slots, or None on a non-working day"""
+        weekday = date.weekday()
+        if not doctor.works_on(weekday):
+            return None
         
         # Get working hours for the day
-        start_hour, end_hour = doctor.working_hours.get(day_name, (time(9, 0), time(17, 0)))
+        start_hour, end_hour = doctor.working_hours.get(_DAY_NAMES[weekday], (time(9, 0), time(17, 0)))
         
         # Create datetime objects for the working day
-        work_start = datetime.combine(date.date(), start_hour)
-        work_end = datetime.combine(date.date(), end_hour)
-        lunch_start = datetime.combine(date.date(), doctor.lunch_break[0])
-        lunch_end = datetime.combine(date.date(), doctor.lunch_break[1])
-        
-        # Get all booked slots for this day
-        booked_on_date = [
-            slot for slot in doctor.booked_slots 
-            if slot.start_time.date() == date.date()
-        ]
-        
-        available_slots = []
-        current_time = work_start
-        
-        while current_time < work_end and len(available_slots) < num_slots:
-            slot_end = current_time + timedelta(minutes=duration)
-            
-            # Skip if slot extends beyond working hours
-            if slot_end > work_end:
-                break
-            
-            # Skip lunch break
-            if (current_time < lunch_end and slot_end > lunch_start):
-                current_time = lunch_end
-                continue
-            
-            # Check if slot conflicts with booked appointments
-            is_available = True
-            for booked in booked_on_date:
-                if (current_time < booked.end_time and slot_end > booked.start_time):
-                    is_available = False
-                    current_time = booked.end_time + timedelta(minutes=self.BUFFER_TIME)
-                    break
-            
-            if is_available:
-                # Check if slot is in the past
-                if current_time > datetime.now():
-                    available_slots.append(TimeSlot(
-                        start_time=current_time,
-                        end_time=slot_end,
-                        duration_minutes=duration,
-                        status=AppointmentStatus.AVAILABLE,
-                        doctor_id=doctor_id
-                    ))
-                
-                current_time = slot_end + timedelta(minutes=self.BUFFER_TIME)
+        anchors = _day_anchors(date.date(), start_hour, end_hour, *doctor.lunch_break)
+        
+        # Day's bookings sorted by start; the running max of end times gives the blocking end directly
+        day_slots = doctor.slots_on(date.date())
+        starts = [booked.start_time for booked in day_slots]
+        max_ends = list(accumulate((booked.end_time for booked in day_slots), max))
+        
+        return (doctor.doctor_id, *anchors, starts, max_ends,
+                self._DURATION[patient_type], self._BUFFER_DELTA, num_slots, datetime.now())
+    
+    def find_available_slots_all(self, date: datetime, patient_type: PatientType,
+                                 num_slots: int = 5, parallel: bool = False) -> Dict[str, List[TimeSlot]]:
+        """
+        Find available slots for every doctor on a date
+        
+        Searches run serially unless `parallel` is set, in which case they go to a
+        process pool once there are enough doctors to outweigh the pool overhead.
+        
+        Args:
+            date: Date to check availability
+            patient_type: Type of patient (for duration calculation)
+            num_slots: Maximum number of slots per doctor
+            parallel: Use the shared process pool for large searches
             
-        return available_slots
+        Returns:
+            Dictionary of doctor ID to available TimeSlot objects
+        """
+        results: Dict[str, List[TimeSlot]] = {doctor_id: [] for doctor_id in self.doctors}
+        jobs = {
+            doctor_id: args for doctor_id, doctor in self.doctors.items()
+            if (args := self._slot_search_args(doctor, date, patient_type, num_slots)) is not None
+        }
+        
+        if not parallel or len(jobs) < self.PARALLEL_SEARCH_MIN_DOCTORS:
+            for doctor_id, args in jobs.items():
+                results[doctor_id] = _scan_free_slots(*args)
+            return results
+        
+        futures = {_get_search_pool().submit(_scan_free_slots, *args): doctor_id
+                   for doctor_id, args in jobs.items()}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+        return results
     
     def book_appointment(self, doctor_id: str, patient_id: str, 
                         patient_type: PatientType,
@@ -224,13 +553,12 @@ class Scheduler:
             return False, "Doctor not found", {}
         
         doctor = self.doctors[doctor_id]
-        duration = self.get_appointment_duration(patient_type)
-        slot_end = slot_start + timedelta(minutes=duration)
+        duration = self._DURATION[patient_type]
+        slot_end = slot_start + self._DURATION_DELTA[patient_type]
         
         # Check if slot is available
-        for booked in doctor.booked_slots:
-            if (slot_start < booked.end_time and slot_end > booked.start_time):
-                return False, "Slot is already booked", {}
+        if doctor.is_booked(slot_start, slot_end):
+            return False, "Slot is already booked", {}
         
         # Generate appointment ID
         appointment_id = f"APT_{datetime.now().strftime('%Y%m%d%H%M%S')}_{patient_id[:4]}"
@@ -247,7 +575,7 @@ class Scheduler:
         )
         
         # Add to doctor's booked slots
-        doctor.booked_slots.append(new_slot)
+        doctor.add_booking(new_slot)
         
         # Store appointment details
         appointment_details = {
@@ -260,8 +588,8 @@ class Scheduler:
             'specialization': doctor.specialization,
             'location': doctor.location,
             'date': slot_start.date().isoformat(),
-            'start_time': slot_start.time().strftime('%H:%M'),
-            'end_time': slot_end.time().strftime('%H:%M'),
+            'start_time': _hhmm(slot_start),
+            'end_time': _hhmm(slot_end),
             'duration_minutes': duration,
             'status': AppointmentStatus.BOOKED.value,
             'booked_at': datetime.now().isoformat(),
@@ -271,6 +599,8 @@ class Scheduler:
         }
         
         self.appointments[appointment_id] = appointment_details
+        self._index_record(appointment_details)
+        self._appts_df = None
         
         logger.info(f"Appointment {appointment_id} booked successfully")
         return True, appointment_id, appointment_details
@@ -295,19 +625,35 @@ class Scheduler:
         if doctor_id in self.doctors:
             doctor = self.doctors[doctor_id]
             # Remove from booked slots
-            doctor.booked_slots = [
-                slot for slot in doctor.booked_slots 
-                if slot.appointment_id != appointment_id
-            ]
+            doctor.remove_booking(appointment_id)
+        
+        self._unindex_record(appointment)
         
         # Update appointment status
         appointment['status'] = AppointmentStatus.CANCELLED.value
         appointment['cancelled_at'] = datetime.now().isoformat()
         appointment['cancellation_reason'] = reason
+        self._appts_df = None
         
         logger.info(f"Appointment {appointment_id} cancelled")
         return True, "Appointment cancelled successfully"
     
+    def _index_record(self, record: Dict):
+        """Add an active appointment record to the (doctor_id, day) index"""
+        key = (record['doctor_id'], date.fromisoformat(record['date']))
+        insort(self._apts_by_doctor_date.setdefault(key, []), record, key=_start_time_key)
+    
+    def _unindex_record(self, record: Dict):
+        """Remove an appointment record from the (doctor_id, day) index, if present"""
+        key = (record['doctor_id'], date.fromisoformat(record['date']))
+        day_records = self._apts_by_doctor_date.get(key, [])
+        for i, indexed in enumerate(day_records):
+            if indexed is record:
+                del day_records[i]
+                if not day_records:
+                    del self._apts_by_doctor_date[key]
+                break
+    
     def reschedule_appointment(self, appointment_id: str, 
                              new_slot_start: datetime) -> Tuple[bool, str, Dict]:
         """
@@ -318,14 +664,38 @@ class Scheduler:
             new_slot_start: New appointment start time
             
         Returns:
-            Tuple of (success, message, updated_appointment)
+            Tuple of (success, appointment ID or error message, updated_appointment)
         """
         if appointment_id not in self.appointments:
             return False, "Appointment not found", {}
         
         appointment = self.appointments[appointment_id]
+        doctor = self.doctors.get(appointment['doctor_id'])
+        slot = doctor.slot_index.get(appointment_id) if doctor else None
+        
+        if slot is not None:
+            # Active booking: move it in place, ignoring its own current interval in the conflict check
+            new_slot_end = new_slot_start + timedelta(minutes=slot.duration_minutes)
+            if any(booked is not slot for booked in doctor.conflicts(new_slot_start, new_slot_end)):
+                return False, "Failed to reschedule", {}
+            
+            self._unindex_record(appointment)
+            doctor.remove_booking(appointment_id)
+            slot.start_time = new_slot_start
+            slot.end_time = new_slot_end
+            doctor.add_booking(slot)
+            
+            appointment['date'] = new_slot_start.date().isoformat()
+            appointment['start_time'] = _hhmm(new_slot_start)
+            appointment['end_time'] = _hhmm(new_slot_end)
+            appointment['rescheduled_at'] = datetime.now().isoformat()
+            self._index_record(appointment)
+            self._appts_df = None
+            
+            logger.info(f"Appointment {appointment_id} rescheduled to {new_slot_start.isoformat()}")
+            return True, appointment_id, appointment
         
-        # Cancel the old appointment
+        # No active booking (e.g. already cancelled): book a fresh appointment with the same details
         self.cancel_appointment(appointment_id, "Rescheduled")
         
         # Book new appointment with same details
@@ -365,23 +735,17 @@ class Scheduler:
             return {}
         
         doctor = self.doctors[doctor_id]
-        day_name = date.strftime('%A')
-        
-        # Get appointments for the day
-        day_appointments = [
-            slot for slot in doctor.booked_slots
-            if slot.start_time.date() == date.date()
-        ]
+        day_name = _DAY_NAMES[date.weekday()]
         
-        # Sort by start time
-        day_appointments.sort(key=lambda x: x.start_time)
+        # Get appointments for the day, sorted by start time
+        day_appointments = doctor.slots_on(date.date())
         
         schedule = {
             'doctor_id': doctor_id,
             'doctor_name': doctor.doctor_name,
             'date': date.date().isoformat(),
             'day': day_name,
-            'is_working_day': day_name in doctor.working_days,
+            'is_working_day': doctor.works_on(date.weekday()),
             'working_hours': None,
             'appointments': [],
             'total_appointments': len(day_appointments),
@@ -391,17 +755,14 @@ class Scheduler:
         if schedule['is_working_day']:
             start_hour, end_hour = doctor.working_hours.get(day_name, (time(9, 0), time(17, 0)))
             schedule['working_hours'] = {
-                'start': start_hour.strftime('%H:%M'),
-                'end': end_hour.strftime('%H:%M'),
-                'lunch_start': doctor.lunch_break[0].strftime('%H:%M'),
-                'lunch_end': doctor.lunch_break[1].strftime('%H:%M')
+                'start': _hhmm(start_hour),
+                'end': _hhmm(end_hour),
+                'lunch_start': _hhmm(doctor.lunch_break[0]),
+                'lunch_end': _hhmm(doctor.lunch_break[1])
             }
             
             # Add appointment details
-            for slot in day_appointments:
-                apt_id = slot.appointment_id
-                if apt_id in self.appointments:
-                    schedule['appointments'].append(self.appointments[apt_id])
+            schedule['appointments'] = list(self._apts_by_doctor_date.get((doctor_id, date.date()), []))
             
             # Find available slots for both patient types
             for patient_type in [PatientType.NEW, PatientType.RETURNING]:
@@ -417,127 +778,55 @@ class Scheduler:
     
     def create_sample_schedules(self):
         """Create sample doctor schedules for testing (restricted to 5 doctors)"""
-        sample_doctors = [
-            {
-                'doctor_id': 'dr_mehta',
-                'doctor_name': 'Dr. Mehta',
-                'specialization': 'Orthopedics',
-                'location': 'Main Clinic - Ortho',
-                'working_days': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'],
-                'working_hours': {
-                    'Monday': (time(9, 0), time(17, 0)),
-                    'Tuesday': (time(9, 0), time(17, 0)),
-                    'Wednesday': (time(9, 0), time(17, 0)),
-                    'Thursday': (time(9, 0), time(17, 0)),
-                    'Friday': (time(9, 0), time(15, 0))
-                },
-                'lunch_break': (time(12, 0), time(13, 0))
-            },
-            {
-                'doctor_id': 'dr_reddy',
-                'doctor_name': 'Dr. Reddy',
-                'specialization': 'Pediatrics',
-                'location': 'Children\'s Wing',
-                'working_days': ['Monday', 'Wednesday', 'Friday'],
-                'working_hours': {
-                    'Monday': (time(8, 0), time(16, 0)),
-                    'Wednesday': (time(8, 0), time(16, 0)),
-                    'Friday': (time(8, 0), time(14, 0))
-                },
-                'lunch_break': (time(12, 30), time(13, 30))
-            },
-            {
-                'doctor_id': 'dr_kapoor',
-                'doctor_name': 'Dr. Kapoor',
-                'specialization': 'Dermatology',
-                'location': 'Skin Center',
-                'working_days': ['Tuesday', 'Wednesday', 'Thursday', 'Friday'],
-                'working_hours': {
-                    'Tuesday': (time(10, 0), time(18, 0)),
-                    'Wednesday': (time(10, 0), time(18, 0)),
-                    'Thursday': (time(10, 0), time(18, 0)),
-                    'Friday': (time(10, 0), time(16, 0))
-                },
-                'lunch_break': (time(13, 0), time(14, 0))
-            },
-            {
-                'doctor_id': 'dr_sharma',
-                'doctor_name': 'Dr. Sharma',
-                'specialization': 'General Medicine',
-                'location': 'Main Clinic - GM',
-                'working_days': ['Monday', 'Tuesday', 'Thursday', 'Friday'],
-                'working_hours': {
-                    'Monday': (time(9, 0), time(17, 0)),
-                    'Tuesday': (time(9, 0), time(17, 0)),
-                    'Thursday': (time(9, 0), time(17, 0)),
-                    'Friday': (time(9, 0), time(15, 0))
-                },
-                'lunch_break': (time(12, 0), time(13, 0))
-            },
-            {
-                'doctor_id': 'dr_iyer',
-                'doctor_name': 'Dr. Iyer',
-                'specialization': 'Cardiology',
-                'location': 'Heart Center',
-                'working_days': ['Monday', 'Wednesday', 'Friday'],
-                'working_hours': {
-                    'Monday': (time(8, 0), time(16, 0)),
-                    'Wednesday': (time(8, 0), time(16, 0)),
-                    'Friday': (time(8, 0), time(14, 0))
-                },
-                'lunch_break': (time(12, 30), time(13, 30))
-            }
-        ]
-        
-        for doc_data in sample_doctors:
-            doctor = DoctorSchedule(
-                doctor_id=doc_data['doctor_id'],
-                doctor_name=doc_data['doctor_name'],
-                specialization=doc_data['specialization'],
-                location=doc_data['location'],
-                working_days=doc_data['working_days'],
-                working_hours=doc_data['working_hours'],
-                lunch_break=doc_data['lunch_break'],
-                booked_slots=[]
-            )
+        for doc_data in _SAMPLE_DOCTORS:
+            # Fresh containers per scheduler so edits don't leak into the shared template
+            doctor = DoctorSchedule(**{
+                **doc_data,
+                'working_days': list(doc_data['working_days']),
+                'working_hours': dict(doc_data['working_hours'])
+            })
             self.doctors[doc_data['doctor_id']] = doctor
         
-        logger.info(f"Created {len(sample_doctors)} sample doctor schedules")
+        logger.info(f"Created {len(_SAMPLE_DOCTORS)} sample doctor schedules")
     
     def load_schedules(self):
         """Load doctor schedules from Excel file"""
         try:
             df = pd.read_excel(self.schedule_file)
             
-            for _, row in df.iterrows():
-                # Parse working days
-                working_days = row['working_days'].split(',') if isinstance(row['working_days'], str) else []
-                
-                # Parse working hours
-                working_hours = {}
-                if isinstance(row['working_hours'], str):
-                    hours_data = json.loads(row['working_hours'])
-                    for day, hours in hours_data.items():
-                        start_time = datetime.strptime(hours['start'], '%H:%M').time()
-                        end_time = datetime.strptime(hours['end'], '%H:%M').time()
-                        working_hours[day] = (start_time, end_time)
-                
-                # Parse lunch break
-                lunch_start = datetime.strptime(row['lunch_start'], '%H:%M').time()
-                lunch_end = datetime.strptime(row['lunch_end'], '%H:%M').time()
+            # Parse the columns up front rather than row by row
+            lunch_starts = pd.to_datetime(df['lunch_start'], format='%H:%M').dt.time
+            lunch_ends = pd.to_datetime(df['lunch_end'], format='%H:%M').dt.time
+            working_days_col = df['working_days'].map(lambda v: v.split(',') if isinstance(v, str) else [])
+            hours_col = df['working_hours'].map(lambda v: json.loads(v) if isinstance(v, str) else {})
+            
+            # Working hours repeat across doctors, so parse each distinct time string once
+            time_cache: Dict[str, time] = {}
+            def parse_time(value: str) -> time:
+                parsed = time_cache.get(value)
+                if parsed is None:
+                    parsed = time_cache[value] = datetime.strptime(value, '%H:%M').time()
+                return parsed
+            
+            for row, working_days, hours_data, lunch_start, lunch_end in zip(
+                df.itertuples(index=False), working_days_col, hours_col, lunch_starts, lunch_ends
+            ):
+                working_hours = {
+                    day: (parse_time(hours['start']), parse_time(hours['end']))
+                    for day, hours in hours_data.items()
+                }
                 
                 doctor = DoctorSchedule(
-                    doctor_id=row['doctor_id'],
-                    doctor_name=row['doctor_name'],
-                    specialization=row['specialization'],
-                    location=row['location'],
+                    doctor_id=row.doctor_id,
+                    doctor_name=row.doctor_name,
+                    specialization=row.specialization,
+                    location=row.location,
                     working_days=working_days,
                     working_hours=working_hours,
-                    lunch_break=(lunch_start, lunch_end),
-                    booked_slots=[]
+                    lunch_break=(lunch_start, lunch_end)
                 )
                 
-                self.doctors[row['doctor_id']] = doctor
+                self.doctors[row.doctor_id] = doctor
             
             logger.info(f"Loaded {len(self.doctors)} doctor schedules from {self.schedule_file}")
             
@@ -560,8 +849,8 @@ class Scheduler:
             working_hours_json = {}
             for day, (start, end) in doctor.working_hours.items():
                 working_hours_json[day] = {
-                    'start': start.strftime('%H:%M'),
-                    'end': end.strftime('%H:%M')
+                    'start': _hhmm(start),
+                    'end': _hhmm(end)
                 }
             
             data.append({
@@ -571,9 +860,9 @@ class Scheduler:
                 'location': doctor.location,
                 'working_days': ','.join(doctor.working_days),
                 'working_hours': json.dumps(working_hours_json),
-                'lunch_start': doctor.lunch_break[0].strftime('%H:%M'),
-                'lunch_end': doctor.lunch_break[1].strftime('%H:%M'),
-                'total_appointments': len(doctor.booked_slots)
+                'lunch_start': _hhmm(doctor.lunch_break[0]),
+                'lunch_end': _hhmm(doctor.lunch_break[1]),
+                'total_appointments': len(doctor.slot_index)
             })
         
         df = pd.DataFrame(data)
@@ -594,71 +883,92 @@ class Scheduler:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
-        # Prepare data for export
-        appointments_list = []
-        for apt_id, apt_data in self.appointments.items():
-            appointments_list.append(apt_data)
-        
         # Create DataFrame
-        df = pd.DataFrame(appointments_list)
+        df = pd.DataFrame(list(self.appointments.values()))
+        
+        # Sort by date and time (parse the two columns directly rather than a concatenated string)
+        sort_key = pd.to_datetime(df['date'], format='%Y-%m-%d') + pd.to_timedelta(df['start_time'] + ':00')
+        df = df.loc[sort_key.sort_values().index]
+        
+        # Split by status in one grouping pass; counts come from value_counts
+        empty = df.iloc[0:0]
+        by_status = dict(tuple(df.groupby('status', sort=False)))
+        type_counts = df['patient_type'].value_counts()
+        
+        confirmed_df = by_status.get(AppointmentStatus.BOOKED.value, empty)
+        cancelled_df = by_status.get(AppointmentStatus.CANCELLED.value, empty)
+        
+        # Summary statistics
+        summary_data = {
+            'Metric': [
+                'Total Appointments',
+                'Confirmed Appointments',
+                'Cancelled Appointments',
+                'New Patients',
+                'Returning Patients',
+                'Average Duration (minutes)',
+                'Total Hours Scheduled'
+            ],
+            'Value': [
+                len(df),
+                len(confirmed_df),
+                len(cancelled_df),
+                int(type_counts.get('new', 0)),
+                int(type_counts.get('returning', 0)),
+                df['duration_minutes'].mean(),
+                df['duration_minutes'].sum() / 60
+            ]
+        }
         
-        # Sort by date and time
-        df['datetime'] = pd.to_datetime(df['date'] + ' ' + df['start_time'])
-        df = df.sort_values('datetime')
-        df = df.drop('datetime', axis=1)
+        # Doctor-wise breakdown
+        doctor_summary = df.groupby(['doctor_name', 'specialization']).agg({
+            'appointment_id': 'count',
+            'duration_minutes': 'sum',
+            'patient_type': lambda x: (x == 'new').sum()
+        }).rename(columns={
+            'appointment_id': 'total_appointments',
+            'duration_minutes': 'total_minutes',
+            'patient_type': 'new_patients'
+        }).reset_index()
+        
+        sheets = {
+            'All Appointments': df,
+            'Confirmed': confirmed_df,
+            'Cancelled': cancelled_df,
+            'Summary': pd.DataFrame(summary_data),
+            'Doctor Summary': doctor_summary
+        }
         
-        # Create Excel writer with multiple sheets
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # All appointments
-            df.to_excel(writer, sheet_name='All Appointments', index=False)
-            
-            # Confirmed appointments
-            confirmed_df = df[df['status'] == AppointmentStatus.BOOKED.value]
-            confirmed_df.to_excel(writer, sheet_name='Confirmed', index=False)
-            
-            # Cancelled appointments
-            cancelled_df = df[df['status'] == AppointmentStatus.CANCELLED.value]
-            cancelled_df.to_excel(writer, sheet_name='Cancelled', index=False)
-            
-            # Summary statistics
-            summary_data = {
-                'Metric': [
-                    'Total Appointments',
-                    'Confirmed Appointments',
-                    'Cancelled Appointments',
-                    'New Patients',
-                    'Returning Patients',
-                    'Average Duration (minutes)',
-                    'Total Hours Scheduled'
-                ],
-                'Value': [
-                    len(df),
-                    len(confirmed_df),
-                    len(cancelled_df),
-                    len(df[df['patient_type'] == 'new']),
-                    len(df[df['patient_type'] == 'returning']),
-                    df['duration_minutes'].mean(),
-                    df['duration_minutes'].sum() / 60
-                ]
-            }
-            summary_df = pd.DataFrame(summary_data)
-            summary_df.to_excel(writer, sheet_name='Summary', index=False)
-            
-            # Doctor-wise breakdown
-            doctor_summary = df.groupby(['doctor_name', 'specialization']).agg({
-                'appointment_id': 'count',
-                'duration_minutes': 'sum',
-                'patient_type': lambda x: (x == 'new').sum()
-            }).rename(columns={
-                'appointment_id': 'total_appointments',
-                'duration_minutes': 'total_minutes',
-                'patient_type': 'new_patients'
-            })
-            doctor_summary.to_excel(writer, sheet_name='Doctor Summary')
+        if xlsxwriter is not None:
+            self._write_sheets_streaming(filepath, sheets)
+        else:
+            with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
+                for sheet_name, frame in sheets.items():
+                    frame.to_excel(writer, sheet_name=sheet_name, index=False)
         
         logger.info(f"Exported {len(df)} appointments to {filepath}")
         return filepath
     
+    @staticmethod
+    def _write_sheets_streaming(filepath: str, sheets: Dict[str, pd.DataFrame]):
+        """
+        Write sheets row by row with xlsxwriter's constant-memory mode
+        
+        pandas emits cells column by column, which constant_memory cannot
+        accept, so rows are written here directly.
+        """
+        workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True})
+        try:
+            for sheet_name, frame in sheets.items():
+                worksheet = workbook.add_worksheet(sheet_name)
+                worksheet.write_row(0, 0, list(frame.columns))
+                # Missing values become blank cells, as with to_excel
+                values = frame.astype(object).where(frame.notna(), None)
+                for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+                    worksheet.write_row(row_idx, 0, row)
+        finally:
+            workbook.close()
+    
     def get_daily_summary(self, date: datetime) -> Dict:
         """
         Get summary of appointments for a specific date
@@ -671,44 +981,59 @@ class Scheduler:
         """
         date_str = date.date().isoformat()
         
-        daily_appointments = [
-            apt for apt in self.appointments.values()
-            if apt['date'] == date_str
-        ]
+        df = self._appointments_frame()
+        daily = df[df['date'] == date_str]
+        is_new = daily['patient_type'] == 'new'
         
         summary = {
             'date': date_str,
-            'total_appointments': len(daily_appointments),
-            'confirmed': sum(1 for apt in daily_appointments if apt['status'] == AppointmentStatus.BOOKED.value),
-            'cancelled': sum(1 for apt in daily_appointments if apt['status'] == AppointmentStatus.CANCELLED.value),
-            'new_patients': sum(1 for apt in daily_appointments if apt['patient_type'] == 'new'),
-            'returning_patients': sum(1 for apt in daily_appointments if apt['patient_type'] == 'returning'),
-            'total_hours': sum(apt['duration_minutes'] for apt in daily_appointments) / 60,
-            'doctors_working': len(set(apt['doctor_id'] for apt in daily_appointments)),
+            'total_appointments': len(daily),
+            'confirmed': int((daily['status'] == AppointmentStatus.BOOKED.value).sum()),
+            'cancelled': int((daily['status'] == AppointmentStatus.CANCELLED.value).sum()),
+            'new_patients': int(is_new.sum()),
+            'returning_patients': int((daily['patient_type'] == 'returning').sum()),
+            'total_hours': int(daily['duration_minutes'].sum()) / 60,
+            'doctors_working': int(daily['doctor_id'].nunique()),
             'appointments_by_doctor': {}
         }
         
-        # Group by doctor
-        for apt in daily_appointments:
-            doctor_name = apt['doctor_name']
-            if doctor_name not in summary['appointments_by_doctor']:
-                summary['appointments_by_doctor'][doctor_name] = {
-                    'count': 0,
-                    'new_patients': 0,
-                    'returning_patients': 0,
-                    'total_minutes': 0
-                }
-            
-            summary['appointments_by_doctor'][doctor_name]['count'] += 1
-            summary['appointments_by_doctor'][doctor_name]['total_minutes'] += apt['duration_minutes']
-            
-            if apt['patient_type'] == 'new':
-                summary['appointments_by_doctor'][doctor_name]['new_patients'] += 1
-            else:
-                summary['appointments_by_doctor'][doctor_name]['returning_patients'] += 1
+        # Group by doctor (first-appearance order, like the appointment log)
+        by_doctor = daily.assign(is_new=is_new).groupby('doctor_name', sort=False).agg(
+            count=('appointment_id', 'size'),
+            new_patients=('is_new', 'sum'),
+            total_minutes=('duration_minutes', 'sum')
+        )
+        for doctor_name, count, new_patients, total_minutes in by_doctor.itertuples(name=None):
+            summary['appointments_by_doctor'][doctor_name] = {
+                'count': int(count),
+                'new_patients': int(new_patients),
+                'returning_patients': int(count - new_patients),
+                'total_minutes': int(total_minutes)
+            }
         
         return summary
     
+    _SUMMARY_COLUMNS = ['appointment_id', 'date', 'doctor_id', 'doctor_name',
+                        'patient_type', 'status', 'duration_minutes']
+    
+    def _appointments_frame(self) -> pd.DataFrame:
+        """Return the appointments as a DataFrame, rebuilding it only after bookings change"""
+        if self._appts_df is None:
+            columns = self._SUMMARY_COLUMNS
+            self._appts_df = pd.DataFrame(
+                [[apt[col] for col in columns] for apt in self.appointments.values()],
+                columns=columns
+            )
+        return self._appts_df
+    
+    @staticmethod
+    def _slots_to_arrays(day_slots: List[TimeSlot]) -> Tuple[np.ndarray, np.ndarray]:
+        """Start and end times of slots as int64 epoch microseconds"""
+        count = len(day_slots)
+        starts = np.fromiter((_to_us(slot.start_time) for slot in day_slots), dtype=np.int64, count=count)
+        ends = np.fromiter((_to_us(slot.end_time) for slot in day_slots), dtype=np.int64, count=count)
+        return starts, ends
+    
     def optimize_schedule(self, doctor_id: str, date: datetime) -> List[Dict]:
         """
         Optimize schedule by identifying gaps and suggesting improvements
@@ -726,47 +1051,60 @@ class Scheduler:
             return suggestions
         
         doctor = self.doctors[doctor_id]
-        day_name = date.strftime('%A')
+        day_name = _DAY_NAMES[date.weekday()]
         
-        if day_name not in doctor.working_days:
+        if not doctor.works_on(date.weekday()):
             return suggestions
         
         # Get working hours
         start_hour, end_hour = doctor.working_hours[day_name]
-        work_start = datetime.combine(date.date(), start_hour)
-        work_end = datetime.combine(date.date(), end_hour)
-        
-        # Get booked slots for the day
-        day_slots = sorted(
-            [slot for slot in doctor.booked_slots if slot.start_time.date() == date.date()],
-            key=lambda x: x.start_time
+        work_start, work_end, lunch_start, lunch_end = _day_anchors(
+            date.date(), start_hour, end_hour, *doctor.lunch_break
         )
         
-        # Find gaps
-        current_time = work_start
-        for slot in day_slots:
-            gap_minutes = (slot.start_time - current_time).total_seconds() / 60
-            
-            # Skip lunch break
-            lunch_start = datetime.combine(date.date(), doctor.lunch_break[0])
-            lunch_end = datetime.combine(date.date(), doctor.lunch_break[1])
-            
-            if current_time < lunch_end and slot.start_time > lunch_start:
-                # Adjust for lunch break
-                if current_time < lunch_start:
-                    gap_minutes = (lunch_start - current_time).total_seconds() / 60
+        # Get booked slots for the day
+        day_slots = doctor.slots_on(date.date())
+        
+        # Find gaps, all slots at once: each gap runs from the previous slot's end (+ buffer)
+        # to the next start, cut short at lunch when it would span the break
+        buffer_delta = self._BUFFER_DELTA
+        starts, ends = self._slots_to_arrays(day_slots)
+        if len(day_slots):
+            cursors = np.empty_like(starts)
+            cursors[0] = _to_us(work_start)
+            cursors[1:] = ends[:-1] + buffer_delta // _MICROSECOND
+            lunch_start_us, lunch_end_us = _to_us(lunch_start), _to_us(lunch_end)
+            spans_lunch = (cursors < lunch_end_us) & (starts > lunch_start_us) & (cursors < lunch_start_us)
+            gaps = np.where(spans_lunch, lunch_start_us - cursors, starts - cursors)
             
-            if gap_minutes >= self.RETURNING_PATIENT_DURATION + self.BUFFER_TIME:
-                suggestions.append({
+            # Gap columns stay in arrays; dicts are only built for the returned suggestions
+            keep = gaps >= self._MIN_GAP_DELTA // _MICROSECOND
+            gap_us = gaps[keep]
+            start_minutes = (cursors[keep] // _US_PER_MINUTE) % _MINUTES_PER_DAY
+            end_minutes = (starts[keep] // _US_PER_MINUTE) % _MINUTES_PER_DAY
+            # Both fit tests packed into one uint8 per gap: bit 0 = new patient, bit 1 = returning
+            fit_flags = (
+                (gap_us >= self._DURATION_DELTA[PatientType.NEW] // _MICROSECOND).view(np.uint8)
+                | ((gap_us >= self._DURATION_DELTA[PatientType.RETURNING] // _MICROSECOND).view(np.uint8) << 1)
+            )
+            suggestions.extend(
+                {
                     'type': 'gap_found',
-                    'start_time': current_time.strftime('%H:%M'),
-                    'end_time': slot.start_time.strftime('%H:%M'),
-                    'duration_minutes': int(gap_minutes),
-                    'can_fit': 'returning_patient' if gap_minutes >= self.RETURNING_PATIENT_DURATION else None,
-                    'can_fit_new': gap_minutes >= self.NEW_PATIENT_DURATION
-                })
+                    'start_time': _HHMM[start_minute],
+                    'end_time': _HHMM[end_minute],
+                    'duration_minutes': duration,
+                    'can_fit': 'returning_patient' if flags & 2 else None,
+                    'can_fit_new': bool(flags & 1)
+                }
+                for start_minute, end_minute, duration, flags in zip(
+                    start_minutes.tolist(), end_minutes.tolist(), (gap_us // _US_PER_MINUTE).tolist(),
+                    fit_flags.tolist()
+                )
+            )
             
-            current_time = slot.end_time + timedelta(minutes=self.BUFFER_TIME)
+            current_time = day_slots[-1].end_time + buffer_delta
+        else:
+            current_time = work_start
         
         # Check end of day gap
         if current_time < work_end:
@@ -774,8 +1112,8 @@ class Scheduler:
             if gap_minutes >= self.RETURNING_PATIENT_DURATION:
                 suggestions.append({
                     'type': 'end_of_day_availability',
-                    'start_time': current_time.strftime('%H:%M'),
-                    'end_time': work_end.strftime('%H:%M'),
+                    'start_time': _hhmm(current_time),
+                    'end_time': _hhmm(work_end),
                     'duration_minutes': int(gap_minutes),
                     'slots_available': int(gap_minutes // (self.RETURNING_PATIENT_DURATION + self.BUFFER_TIME))
                 })
@@ -785,7 +1123,7 @@ class Scheduler:
         lunch_duration = (lunch_end - lunch_start).total_seconds() / 60
         available_minutes = total_work_minutes - lunch_duration
         
-        booked_minutes = sum(slot.duration_minutes for slot in day_slots)
+        booked_minutes = doctor.booked_minutes_by_date.get(date.date(), 0)
         utilization = (booked_minutes / available_minutes) * 100 if available_minutes > 0 else 0
         
         suggestions.append({
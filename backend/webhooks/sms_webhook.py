@@ -4,33 +4,285 @@ Endpoint: /sms-reply (POST)
 
 If incoming body contains 'cancel', find the latest appointment for the sender's phone
 in data/appointments.xlsx and reopen the slot via backend.remainders.ReminderSystem.reopen_slot().
+
+Serve in production through wsgi.py, e.g. `gunicorn -w 4 --threads 2 -b 0.0.0.0:8000 wsgi:app`.
+Importing the module starts nothing. Each process starts its own file watcher on its first
+lookup (or earlier via prime_appointments_cache(), e.g. from a gunicorn post_fork hook); with
+watchdog installed the cache is then invalidated by file events, otherwise by an mtime check
+per request.
 """
 
 from flask import Flask, request, jsonify
 from pathlib import Path
+import logging
+import os
+import threading
 from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+import openpyxl
 import pandas as pd
 
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog not installed, the cache is validated by mtime on each request
+    FileSystemEventHandler = None  # type: ignore
+    Observer = None  # type: ignore
+
 try:
     # When running as a module
     from backend.remainders import ReminderSystem
+    from backend.appointment_sidecar import (
+        LOOKUP_COLUMNS, PHONE_NORM_COLUMN, PHONE_TRANSLATE, find_phone_column, normalize_phone_series,
+        read_sidecar, sidecar_path
+    )
 except ModuleNotFoundError:
     # Fallback for direct execution
     from remainders import ReminderSystem
+    from appointment_sidecar import (
+        LOOKUP_COLUMNS, PHONE_NORM_COLUMN, PHONE_TRANSLATE, find_phone_column, normalize_phone_series,
+        read_sidecar, sidecar_path
+    )
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# reopen_slot keeps no per-request state, so one instance serves every request
+_REMINDER_SYSTEM = ReminderSystem()
+
+# Parsed appointments file plus its phone -> latest-row index, keyed by (path, mtime_ns, size)
+# so edits invalidate it
+_APPT_CACHE: Dict[Tuple[str, int, int], Tuple[pd.DataFrame, Optional[str], Dict[str, int]]] = {}
+# pid of the process whose file watcher owns invalidation. A forked child (e.g. gunicorn
+# --preload) inherits this and the cache but not the observer thread, so it uses the mtime
+# check until it starts its own watcher
+_watcher_pid: Optional[int] = None
+# pid that last tried to start a watcher, so a process without watchdog tries only once
+_watcher_attempt_pid: Optional[int] = None
+_watcher_lock = threading.Lock()
+# Bumped on every watched change so a load that raced with an edit is not cached
+_cache_generation = 0
+
+APPOINTMENTS_XLSX = Path('data/appointments.xlsx')
+
+# Workbooks larger than this are scanned row by row per request instead of being loaded and cached
+STREAMING_LOOKUP_MIN_BYTES = 50 * 1024 * 1024
+
 
 def _normalize_phone(phone: str) -> str:
     if not phone:
         return ''
-    return ''.join(ch for ch in phone if ch.isdigit() or ch == '+')
+    return phone.translate(PHONE_TRANSLATE)
+
+
+def _is_lookup_column(column) -> bool:
+    """Columns the cancellation lookup reads: the lookup fields plus any phone-like column"""
+    return column in LOOKUP_COLUMNS or 'phone' in str(column).lower()
+
+
+def _latest_row_by_phone(df: pd.DataFrame) -> Dict[str, int]:
+    """Map each normalized phone to the position of its latest row (by created_at, else date+time)"""
+    # Sort only the key column (no frame copy), then read phones in that order
+    sort_key = None
+    if 'created_at' in df.columns:
+        sort_key = df['created_at']
+    elif {'date', 'time'}.issubset(df.columns):
+        try:
+            sort_key = pd.to_datetime(df['date'] + ' ' + df['time'])
+        except Exception:
+            sort_key = None
+    if sort_key is None:
+        positions = list(range(len(df)))
+    else:
+        positions = df.index.get_indexer(sort_key.sort_values(kind='stable').index).tolist()
+    phones = df[PHONE_NORM_COLUMN].to_numpy()
+    # Later rows overwrite earlier ones, leaving the latest per phone
+    return {phones[pos]: pos for pos in positions}
+
+
+def _load_appointments(xlsx_path: Path) -> Tuple[pd.DataFrame, Optional[str], Dict[str, int]]:
+    """
+    Read the appointments file, reusing the parsed frame until the file changes
+    
+    Returns:
+        Tuple of (DataFrame with a pre-normalized phone column, phone column name or None,
+        normalized phone -> latest row position)
+    """
+    if _ensure_cache_watcher(xlsx_path):
+        # This process's watcher clears the cache on change, so a cached entry for this path is current
+        for key, cached in list(_APPT_CACHE.items()):
+            if key[0] == str(xlsx_path):
+                return cached
+    generation = _cache_generation
+    stat = xlsx_path.stat()
+    key = (str(xlsx_path), stat.st_mtime_ns, stat.st_size)
+    cached = _APPT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    # A fresh Parquet sidecar holds just the lookup columns, already normalized
+    df = read_sidecar(xlsx_path)
+    if df is None:
+        # Only the lookup columns, as strings (matching the sidecar) so no per-cell type inference
+        read_kwargs = dict(usecols=_is_lookup_column, dtype=str)
+        try:
+            df = pd.read_excel(xlsx_path, engine='calamine', **read_kwargs)
+        except ImportError:  # python-calamine not installed, fall back to openpyxl
+            df = pd.read_excel(xlsx_path, engine='openpyxl', **read_kwargs)
+
+    phone_col = find_phone_column(df)
+    if phone_col and PHONE_NORM_COLUMN not in df.columns:
+        df[PHONE_NORM_COLUMN] = normalize_phone_series(df[phone_col])
+
+    latest = _latest_row_by_phone(df) if phone_col else {}
+
+    entry = (df, phone_col, latest)
+    if generation == _cache_generation:
+        _APPT_CACHE.clear()
+        _APPT_CACHE[key] = entry
+    return entry
+
+
+def _start_cache_watcher(xlsx_path: Path) -> bool:
+    """
+    Clear the appointments cache whenever the workbook or its sidecar changes on disk
+    
+    Returns:
+        True if a watcher was started (watchdog is installed)
+    """
+    global _cache_generation, _watcher_pid
+    if Observer is None:
+        return False
+    watched = {str(xlsx_path.resolve()), str(sidecar_path(xlsx_path).resolve())}
+
+    class _InvalidateOnChange(FileSystemEventHandler):
+        def on_any_event(self, event):
+            global _cache_generation
+            # Reads (our own included) raise open/close events; only writes invalidate
+            if event.event_type in ('opened', 'closed_no_write'):
+                return
+            # Atomic replaces arrive as moves, so check the destination too
+            paths = {str(Path(event.src_path).resolve())}
+            if getattr(event, 'dest_path', ''):
+                paths.add(str(Path(event.dest_path).resolve()))
+            if paths & watched:
+                _cache_generation += 1
+                _APPT_CACHE.clear()
+
+    xlsx_path.parent.mkdir(parents=True, exist_ok=True)
+    observer = Observer()
+    observer.daemon = True
+    observer.schedule(_InvalidateOnChange(), str(xlsx_path.parent.resolve()), recursive=False)
+    observer.start()
+    # Entries cached before the watcher ran (e.g. inherited across a fork) were never watched
+    _cache_generation += 1
+    _APPT_CACHE.clear()
+    _watcher_pid = os.getpid()
+    return True
+
+
+def _ensure_cache_watcher(xlsx_path: Path) -> bool:
+    """
+    Start this process's file watcher if it has not tried yet
+    
+    Returns:
+        True if a watcher started by this process owns invalidation
+    """
+    global _watcher_attempt_pid
+    pid = os.getpid()
+    if _watcher_attempt_pid != pid:
+        with _watcher_lock:
+            if _watcher_attempt_pid != pid:
+                _watcher_attempt_pid = pid
+                try:
+                    _start_cache_watcher(xlsx_path)
+                except Exception as e:
+                    logger.warning(f"Failed to start appointments file watcher: {e}")
+    return _watcher_pid == pid
+
+
+def _warm_appointments_cache(xlsx_path: Path):
+    """Start the watcher, then parse the workbook so the first SMS does not pay for it"""
+    try:
+        _ensure_cache_watcher(xlsx_path)
+        if xlsx_path.exists() and xlsx_path.stat().st_size < STREAMING_LOOKUP_MIN_BYTES:
+            _load_appointments(xlsx_path)
+    except Exception as e:
+        logger.warning(f"Failed to prime appointments cache: {e}")
+
+
+def prime_appointments_cache(xlsx_path: Path = APPOINTMENTS_XLSX) -> threading.Thread:
+    """
+    Start the file watcher and parse the workbook in a background thread of this process
+    
+    Call once per serving process, after any fork (see wsgi.py); lookups work without it,
+    the first one just pays for the parse.
+    """
+    thread = threading.Thread(target=_warm_appointments_cache, args=(xlsx_path,), daemon=True)
+    thread.start()
+    return thread
+
+
+def _find_latest_by_phone_streaming(xlsx_path: Path, normalized_from: str) -> Optional[Dict[str, Any]]:
+    """
+    Scan the workbook in read-only mode for the latest row matching a phone, without building a DataFrame
+    
+    Picks the latest row the same way _latest_row_by_phone does: by created_at, else date+time,
+    else file order; later rows win ties and rows missing the key rank last.
+    
+    Args:
+        xlsx_path: Appointments workbook
+        normalized_from: Sender's phone, already normalized
+        
+    Returns:
+        Matching row as {column: value as str}, or None if no row matches
+    """
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(c) if c is not None else '' for c in next(rows, ())]
+        phone_col = find_phone_column(pd.DataFrame(columns=header))
+        if not phone_col:
+            return None
+        positions = {name: header.index(name) for name in LOOKUP_COLUMNS if name in header}
+        phone_pos = header.index(phone_col)
+        created_pos = positions.get('created_at')
+        date_pos, time_pos = positions.get('date'), positions.get('time')
+
+        best_key, best_row = None, None
+        for row in rows:
+            if phone_pos >= len(row) or row[phone_pos] is None:
+                continue
+            if str(row[phone_pos]).translate(PHONE_TRANSLATE) != normalized_from:
+                continue
+            if created_pos is not None:
+                value = row[created_pos] if created_pos < len(row) else None
+                key = (value is None, '' if value is None else str(value))
+            elif date_pos is not None and time_pos is not None:
+                try:
+                    key = (False, pd.Timestamp(f"{row[date_pos]} {row[time_pos]}"))
+                except Exception:
+                    key = (False, 0)
+            else:
+                key = (False, 0)
+            if best_key is None or key >= best_key:
+                best_key, best_row = key, row
+    finally:
+        wb.close()
+
+    if best_row is None:
+        return None
+    return {name: str(best_row[pos]) if pos < len(best_row) else 'nan' for name, pos in positions.items()}
 
 
 @app.post('/sms-reply')
 def sms_reply():
-    from_number = request.form.get('From') or request.json.get('From') if request.is_json else None
-    body = request.form.get('Body') or request.json.get('Body') if request.is_json else ''
+    # Twilio posts form data; a JSON body is parsed at most once, and only when declared
+    form = request.form
+    payload = (request.get_json(silent=True) if request.is_json else None) or {}
+    from_number = form.get('From') or payload.get('From')
+    body = form.get('Body') or payload.get('Body') or ''
 
     if not from_number:
         return jsonify({"status": "error", "message": "Missing From number"}), 400
@@ -42,54 +294,40 @@ def sms_reply():
         return jsonify({"status": "ignored", "message": "No cancellation keyword found"}), 200
 
     # Load appointments.xlsx and find latest by patient_phone (if present)
-    xlsx_path = Path('data/appointments.xlsx')
+    xlsx_path = APPOINTMENTS_XLSX
     if not xlsx_path.exists():
         return jsonify({"status": "error", "message": "No appointments file found"}), 404
 
-    try:
-        df = pd.read_excel(xlsx_path)
-    except Exception:
-        return jsonify({"status": "error", "message": "Failed to read appointments file"}), 500
-
-    # Ensure patient_phone column exists; if not, attempt loose matching on any phone-like column
-    phone_col = 'patient_phone' if 'patient_phone' in df.columns else None
-    if not phone_col:
-        for c in df.columns:
-            if 'phone' in c.lower():
-                phone_col = c
-                break
-
-    if not phone_col:
-        return jsonify({"status": "error", "message": "No phone column in appointments"}), 500
-
-    # Filter and pick latest (by created/ date+time)
-    subset = df[df[phone_col].astype(str).str.replace('[^0-9+]', '', regex=True) == normalized_from]
-    if subset.empty:
-        return jsonify({"status": "error", "message": "No matching appointment for this phone"}), 404
-
-    # Determine latest row
-    if 'created_at' in subset.columns:
-        subset_sorted = subset.sort_values('created_at')
-    elif {'date', 'time'}.issubset(subset.columns):
-        subset_sorted = subset.copy()
+    if xlsx_path.stat().st_size >= STREAMING_LOOKUP_MIN_BYTES:
+        # Too large to hold in memory: stream the sheet for just this phone
         try:
-            subset_sorted['__dt'] = pd.to_datetime(subset_sorted['date'] + ' ' + subset_sorted['time'])
-            subset_sorted = subset_sorted.sort_values('__dt')
+            last = _find_latest_by_phone_streaming(xlsx_path, normalized_from)
         except Exception:
-            subset_sorted = subset
+            return jsonify({"status": "error", "message": "Failed to read appointments file"}), 500
     else:
-        subset_sorted = subset
+        try:
+            df, phone_col, latest = _load_appointments(xlsx_path)
+        except Exception:
+            return jsonify({"status": "error", "message": "Failed to read appointments file"}), 500
+
+        if not phone_col:
+            return jsonify({"status": "error", "message": "No phone column in appointments"}), 500
+
+        # Latest appointment for this phone (by created/ date+time), precomputed per file version
+        row_pos = latest.get(normalized_from)
+        last = df.iloc[row_pos] if row_pos is not None else None
+
+    if last is None:
+        return jsonify({"status": "error", "message": "No matching appointment for this phone"}), 404
 
-    last = subset_sorted.iloc[-1]
     doctor = str(last.get('doctor', ''))
     date = str(last.get('date', ''))
     time = str(last.get('time', ''))
     appt_id = str(last.get('appointment_id', ''))
 
     # Reopen slot via ReminderSystem helper
-    rs = ReminderSystem()
-    ok = rs.reopen_slot(appointment_id=appt_id or datetime.now().strftime('%Y%m%d%H%M%S'),
-                        doctor=doctor, date=date, time=time, channel="sms")
+    ok = _REMINDER_SYSTEM.reopen_slot(appointment_id=appt_id or datetime.now().strftime('%Y%m%d%H%M%S'),
+                                      doctor=doctor, date=date, time=time, channel="sms")
 
     if ok:
         return jsonify({"status": "ok", "message": "Your appointment has been cancelled and the slot reopened."}), 200
@@ -98,6 +336,8 @@ def sms_reply():
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    # Development server only; production runs wsgi:app under gunicorn (see wsgi.py)
+    prime_appointments_cache()
+    app.run(host='0.0.0.0', port=8000, debug=os.getenv('FLASK_DEBUG') == '1')
 
 
@@ -4,11 +4,20 @@ Interactive Medical Scheduling Agent
 Step-by-step conversation following the technical requirements
 """
 
+import csv
+import io
+import logging
 import os
+import re
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 import json
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -18,7 +27,7 @@ load_dotenv()
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from backend.patient_lookup import PatientDatabase
+from backend.patient_lookup import get_patient_db
 from backend.integrations.calendly_service import CalendlyService
 from backend.integrations.email_service import EmailService
 from backend.integrations.sms_service import SMSService, SMSReminder, ReminderStage
@@ -26,13 +35,97 @@ from backend.remainders import ReminderSystem
 from backend.insurance import InsuranceValidator
 from backend.schedular import Scheduler
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor as JobThreadPoolExecutor
 from backend.email_cancellation import check_email_cancellations
 import atexit
 from langchain_groq import ChatGroq
 
+# Startup/status messages; a fixed name so embedders can silence them even when run as __main__
+logger = logging.getLogger("interactive_agent")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Input validators, compiled once at import
+_DOB_RE = re.compile(r"^(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])/[0-9]{4}$")
+_INS_RE = re.compile(r"^[A-Za-z0-9]{6,12}$")
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Marks a patient lookup that hasn't run yet (None means "not found")
+_NOT_LOOKED_UP = object()
+_PHONE_RE = re.compile(r"^\+?[0-9 \-()]{7,20}$")
+
+# (display name, scheduler id, specialization) for each bookable doctor, in menu order
+_DOCTORS = (
+    ("Dr. Sharma", "dr_sharma", "General Medicine"),
+    ("Dr. Iyer", "dr_iyer", "Cardiology"),
+    ("Dr. Mehta", "dr_mehta", "Orthopedics"),
+    ("Dr. Kapoor", "dr_kapoor", "Dermatology"),
+    ("Dr. Reddy", "dr_reddy", "Pediatrics"),
+)
+_DOCTOR_ID = {name: doctor_id for name, doctor_id, _ in _DOCTORS}
+_DOCTOR_MENU = "\n".join(f"{i}) {name} - {specialization}" for i, (name, _, specialization) in enumerate(_DOCTORS, 1))
+
+# Carrier choices for step4, in menu order ("None" is self-pay)
+_CARRIERS = ("ICICI Lombard", "HDFC Ergo", "Star Health", "Religare", "New India Assurance", "None")
+_CARRIER_MENU = "\n".join(
+    ["\nInsurance carriers available:"]
+    + [f"{i}) {'Self-pay/None' if carrier == 'None' else carrier}" for i, carrier in enumerate(_CARRIERS, 1)]
+) + "\n"
+
+# Lowercase substring -> canonical carrier name, checked in order
+_INSURANCE_MAP = (
+    ("icici lombard", "ICICI Lombard"),
+    ("hdfc ergo", "HDFC Ergo"),
+    ("star health", "Star Health"),
+    ("religare", "Religare"),
+    ("new india assurance", "New India Assurance"),
+    ("none", "None"),
+    ("self-pay", "None"),
+    ("self pay", "None"),
+)
+
+
+@lru_cache(maxsize=256)
+def _normalize_insurance_cached(carrier: str) -> str:
+    """Canonical carrier name for a free-text carrier, memoized per input"""
+    normalized = carrier.strip().lower()
+    for key, value in _INSURANCE_MAP:
+        if key in normalized:
+            return value
+    return carrier
+
+@dataclass(slots=True)
+class AppointmentData:
+    """Answers and derived details collected over one booking conversation"""
+    patient_name: str = ""
+    patient_dob: str = ""
+    doctor_preference: str = ""
+    location_preference: str = ""
+    patient_phone: str = ""
+    patient_email: str = ""
+    patient_type: str = ""  # 'new' or 'returning'
+    appointment_duration: int = 0
+    current_visit_count: int = 0
+    appointment_datetime: Optional[datetime] = None
+    selected_slot: Optional[Dict] = None
+    insurance_carrier: str = ""
+    insurance_member_id: str = ""
+    insurance_group_id: str = ""
+    appointment_id: str = ""
+
 class InteractiveMedicalAgent:
-    def __init__(self, groq_api_key: str):
-        """Initialize the interactive medical scheduling agent"""
+    def __init__(self, groq_api_key: str, start_cancellation_poller: bool = True):
+        """
+        Initialize the interactive medical scheduling agent
+        
+        Args:
+            groq_api_key: Groq API key for the LLM
+            start_cancellation_poller: Poll the inbox for cancellation emails every minute;
+                pass False when the host app runs its own poller (e.g. the Streamlit app)
+        """
         self.llm = ChatGroq(
             groq_api_key=groq_api_key,
             model_name="llama-3.1-8b-instant",
@@ -41,7 +134,7 @@ class InteractiveMedicalAgent:
         )
         
         # Initialize all services with real configurations
-        self.patient_db = PatientDatabase()
+        self.patient_db = get_patient_db()
         self.calendly = CalendlyService(use_mock=True)
         
         # Email service configuration (using first Twilio account for emails)
@@ -79,54 +172,59 @@ class InteractiveMedicalAgent:
         self.scheduler = Scheduler()
         
         # Current appointment data
-        self.appointment_data = {}
-        
-        # Print service status
-        print(f"📧 Email Service: {'Real SMTP' if use_real_email else 'Mock Mode'}")
-        print(f"📱 SMS Service: {'Real Twilio' if use_real_sms else 'Mock Mode'}")
-        print()
-        # Start background scheduler for email cancellations
-        self._bg_scheduler = BackgroundScheduler()
-        self._bg_scheduler.add_job(
-            func=check_email_cancellations,
-            trigger="interval",
-            minutes=1,
-            id="email_cancellation_checker",
-            replace_existing=True,
-        )
-        self._bg_scheduler.start()
-        print("📧 Email cancellation checker is running every 5 minutes...")
-        atexit.register(lambda: self._bg_scheduler.shutdown())
+        self.appointment_data = AppointmentData()
+        
+        # Slot search started while the patient is still typing: (doctor_id, duration, future)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._slots_prefetch = None
+        self._patient_record = _NOT_LOOKED_UP
+        
+        # Log service status
+        logger.info("📧 Email Service: %s\n📱 SMS Service: %s\n",
+                    'Real SMTP' if use_real_email else 'Mock Mode',
+                    'Real Twilio' if use_real_sms else 'Mock Mode')
+        # Start background scheduler for email cancellations: one worker thread, and a run
+        # that overlaps a stalled IMAP poll is merged into it rather than stacking up
+        self._bg_scheduler = None
+        if start_cancellation_poller:
+            self._bg_scheduler = BackgroundScheduler(
+                executors={'default': JobThreadPoolExecutor(1)},
+                job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 30},
+            )
+            self._bg_scheduler.add_job(
+                func=check_email_cancellations,
+                trigger="interval",
+                minutes=1,
+                id="email_cancellation_checker",
+                replace_existing=True,
+            )
+            self._bg_scheduler.start()
+            logger.info("📧 Email cancellation checker is running every minute...")
+            atexit.register(lambda: self._bg_scheduler.shutdown())
+        # The email service keeps its SMTP session open between sends
+        atexit.register(self.email_service.close)
         
     def validate_dob(self, dob_str: str) -> bool:
         """Validate DOB format MM/DD/YYYY"""
-        import re
-        return bool(re.match(r"^(0[1-9]|1[0-2])/(0[1-9]|[12][0-9]|3[01])/[0-9]{4}$", dob_str or ""))
+        return bool(_DOB_RE.match(dob_str or ""))
     
     def validate_insurance_id(self, member_id: str) -> bool:
         """Validate insurance member ID"""
-        import re
-        return bool(re.match(r"^[A-Za-z0-9]{6,12}$", member_id or ""))
+        return bool(_INS_RE.match(member_id or ""))
+    
+    def validate_email(self, email: str) -> bool:
+        """Validate email shape: one @ and a dotted domain, no whitespace"""
+        return bool(_EMAIL_RE.match(email or ""))
+    
+    def validate_phone(self, phone: str) -> bool:
+        """Validate phone number: optional +, then 7-20 digits, spaces, dashes or parentheses"""
+        return bool(_PHONE_RE.match(phone or ""))
     
     def normalize_insurance(self, carrier: str) -> str:
         """Normalize insurance carrier name"""
         if not carrier:
             return "None"
-        normalized = carrier.strip().lower()
-        mapping = {
-            "icici lombard": "ICICI Lombard",
-            "hdfc ergo": "HDFC Ergo", 
-            "star health": "Star Health",
-            "religare": "Religare",
-            "new india assurance": "New India Assurance",
-            "none": "None",
-            "self-pay": "None",
-            "self pay": "None",
-        }
-        for key, value in mapping.items():
-            if key in normalized:
-                return value
-        return carrier
+        return _normalize_insurance_cached(carrier)
     
     def get_llm_response(self, prompt: str) -> str:
         """Get response from LLM"""
@@ -136,149 +234,193 @@ class InteractiveMedicalAgent:
         except Exception as e:
             return f"I apologize, but I'm having trouble processing that. Please try again. ({str(e)})"
     
+    def get_llm_responses(self, prompts: list) -> list:
+        """Get responses for several independent prompts, sent to the LLM concurrently"""
+        try:
+            responses = self.llm.batch(prompts, return_exceptions=True)
+        except Exception as e:
+            responses = [e] * len(prompts)
+        return [
+            f"I apologize, but I'm having trouble processing that. Please try again. ({str(r)})"
+            if isinstance(r, Exception) else r.content
+            for r in responses
+        ]
+    
     def step1_greeting_and_collect_info(self):
         """Step 1: Greeting and collect basic information"""
         print("🏥 Welcome to our Medical Scheduling System!")
         print("=" * 50)
         
         # Get patient name
-        while not self.appointment_data.get('patient_name'):
+        while not self.appointment_data.patient_name:
             name = input("👤 Please enter your full name: ").strip()
             if name:
-                self.appointment_data['patient_name'] = name
+                self.appointment_data.patient_name = name
             else:
                 print("❌ Please enter a valid name.")
         
         # Get DOB
-        while not self.appointment_data.get('patient_dob'):
+        while not self.appointment_data.patient_dob:
             dob = input("📅 Please enter your date of birth (MM/DD/YYYY): ").strip()
             if self.validate_dob(dob):
-                self.appointment_data['patient_dob'] = dob
+                self.appointment_data.patient_dob = dob
             else:
                 print("❌ Please enter DOB in MM/DD/YYYY format (e.g., 03/15/1995).")
         
         # Get doctor preference
-        while not self.appointment_data.get('doctor_preference'):
-            print("\n👨‍⚕️ Please choose your preferred doctor:")
-            print("1) Dr. Sharma - General Medicine")
-            print("2) Dr. Iyer - Cardiology") 
-            print("3) Dr. Mehta - Orthopedics")
-            print("4) Dr. Kapoor - Dermatology")
-            print("5) Dr. Reddy - Pediatrics")
+        while not self.appointment_data.doctor_preference:
+            sys.stdout.write("\n👨‍⚕️ Please choose your preferred doctor:\n" + _DOCTOR_MENU + "\n")
             
-            choice = input("Enter your choice (1-5): ").strip()
-            doctors = ["Dr. Sharma", "Dr. Iyer", "Dr. Mehta", "Dr. Kapoor", "Dr. Reddy"]
-            if choice.isdigit() and 1 <= int(choice) <= 5:
-                self.appointment_data['doctor_preference'] = doctors[int(choice)-1]
+            choice = input(f"Enter your choice (1-{len(_DOCTORS)}): ").strip()
+            if choice.isdigit() and 1 <= int(choice) <= len(_DOCTORS):
+                self.appointment_data.doctor_preference = _DOCTORS[int(choice)-1][0]
+                # Name and DOB are in, so the patient type (and slot length) is known: search
+                # for slots in the background while the remaining details are typed
+                duration = 30 if self._lookup_patient() else 60
+                self._prefetch_slots(_DOCTORS[int(choice)-1][1], duration)
             else:
-                print("❌ Please enter a valid choice (1-5).")
+                print(f"❌ Please enter a valid choice (1-{len(_DOCTORS)}).")
         
         # Get location preference
-        while not self.appointment_data.get('location_preference'):
+        while not self.appointment_data.location_preference:
             location = input("🏥 Please enter your preferred clinic location: ").strip()
             if location:
-                self.appointment_data['location_preference'] = location
+                self.appointment_data.location_preference = location
             else:
                 print("❌ Please enter a valid location.")
         
         # Get phone number
-        while not self.appointment_data.get('patient_phone'):
+        while not self.appointment_data.patient_phone:
             phone = input("📱 Please enter your phone number: ").strip()
-            if phone:
-                self.appointment_data['patient_phone'] = phone
+            if self.validate_phone(phone):
+                self.appointment_data.patient_phone = phone
             else:
-                print("❌ Please enter a valid phone number.")
+                print("❌ Please enter a valid phone number (digits, spaces, dashes or parentheses).")
         
         # Get email
-        while not self.appointment_data.get('patient_email'):
+        while not self.appointment_data.patient_email:
             email = input("📧 Please enter your email address: ").strip()
-            if email and "@" in email:
-                self.appointment_data['patient_email'] = email
+            if self.validate_email(email):
+                self.appointment_data.patient_email = email
             else:
                 print("❌ Please enter a valid email address.")
     
+    def _slot_search(self, doctor_id: str, duration_minutes: int):
+        """Available slots with a doctor over the next two weeks"""
+        return self.calendly.get_available_slots(
+            doctor_id=doctor_id,
+            date_from=datetime.now(),
+            date_to=datetime.now() + timedelta(days=14),
+            duration_minutes=duration_minutes
+        )
+    
+    def _prefetch_slots(self, doctor_id: str, duration_minutes: int):
+        """Start a slot search in the background for step3 to pick up"""
+        future = self._executor.submit(self._slot_search, doctor_id, duration_minutes)
+        self._slots_prefetch = (doctor_id, duration_minutes, future)
+    
+    def _prefetched_slots(self, doctor_id: str, duration_minutes: int):
+        """Result of a matching background search, or None if there is none or it failed"""
+        prefetch, self._slots_prefetch = self._slots_prefetch, None
+        if prefetch is None:
+            return None
+        prefetched_doctor, prefetched_duration, future = prefetch
+        if (prefetched_doctor, prefetched_duration) != (doctor_id, duration_minutes):
+            # Don't let a stale search overlap the one the caller starts next
+            if not future.cancel():
+                wait([future])
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+    
+    def _lookup_patient(self) -> Optional[Dict]:
+        """Patient record for the entered name and DOB (None if new), searched once per run"""
+        if self._patient_record is _NOT_LOOKED_UP:
+            self._patient_record = self.patient_db.search_patient(
+                self.appointment_data.patient_name,
+                self.appointment_data.patient_dob
+            )
+        return self._patient_record
+    
     def step2_patient_lookup(self):
         """Step 2: Patient lookup to determine new vs returning"""
         print("\n🔍 Looking up your patient record...")
         
-        patient = self.patient_db.search_patient(
-            self.appointment_data['patient_name'], 
-            self.appointment_data['patient_dob']
-        )
+        patient = self._lookup_patient()
         
         if patient:
-            self.appointment_data['patient_type'] = 'returning'
-            self.appointment_data['appointment_duration'] = 30
-            print(f"✅ Welcome back, {self.appointment_data['patient_name']}!")
+            self.appointment_data.patient_type = 'returning'
+            self.appointment_data.appointment_duration = 30
+            print(f"✅ Welcome back, {self.appointment_data.patient_name}!")
             print("📋 You are a returning patient. Your appointment will be 30 minutes.")
             
+            # Keep the visit count from this lookup so confirmation doesn't search the database again
+            try:
+                self.appointment_data.current_visit_count = int(patient.get('Visit_Count', 0))
+            except (TypeError, ValueError):
+                self.appointment_data.current_visit_count = 0
+            
             # Use existing insurance data for returning patients
             existing_insurance = patient.get('Insurance', 'None')
             # Handle NaN values from pandas
             if existing_insurance and str(existing_insurance).lower() not in ['none', 'nan', '']:
-                self.appointment_data['insurance_carrier'] = str(existing_insurance)
+                self.appointment_data.insurance_carrier = str(existing_insurance)
                 print(f"🏥 Using your existing insurance: {existing_insurance}")
             else:
                 print("🏥 No insurance on file. We'll collect this information.")
         else:
-            self.appointment_data['patient_type'] = 'new'
-            self.appointment_data['appointment_duration'] = 60
-            print(f"👋 Welcome, {self.appointment_data['patient_name']}!")
+            self.appointment_data.patient_type = 'new'
+            self.appointment_data.appointment_duration = 60
+            print(f"👋 Welcome, {self.appointment_data.patient_name}!")
             print("📋 You are a new patient. Your first appointment will be 60 minutes.")
             print("🏥 We'll need to collect your insurance information.")
             
             # Add new patient to database
             self.patient_db.add_patient({
-                "name": self.appointment_data['patient_name'],
-                "dob": self.appointment_data['patient_dob'],
-                "email": self.appointment_data['patient_email'],
-                "phone": self.appointment_data['patient_phone'],
-                "doctor": self.appointment_data['doctor_preference']
+                "name": self.appointment_data.patient_name,
+                "dob": self.appointment_data.patient_dob,
+                "email": self.appointment_data.patient_email,
+                "phone": self.appointment_data.patient_phone,
+                "doctor": self.appointment_data.doctor_preference
             })
     
     def step3_smart_scheduling(self):
         """Step 3: Smart scheduling - show available slots"""
-        print(f"\n📅 Finding available slots with {self.appointment_data['doctor_preference']}...")
+        print(f"\n📅 Finding available slots with {self.appointment_data.doctor_preference}...")
         
         # Map doctor name to ID
-        doctor_mapping = {
-            "Dr. Sharma": "dr_sharma",
-            "Dr. Iyer": "dr_iyer", 
-            "Dr. Mehta": "dr_mehta",
-            "Dr. Kapoor": "dr_kapoor",
-            "Dr. Reddy": "dr_reddy"
-        }
-        doctor_id = doctor_mapping[self.appointment_data['doctor_preference']]
+        doctor_id = _DOCTOR_ID[self.appointment_data.doctor_preference]
         
-        # Get available slots
-        slots = self.calendly.get_available_slots(
-            doctor_id=doctor_id,
-            date_from=datetime.now(),
-            date_to=datetime.now() + timedelta(days=14),
-            duration_minutes=self.appointment_data['appointment_duration']
-        )
+        # Get available slots, from the search started in step1 when the duration guess held
+        duration = self.appointment_data.appointment_duration
+        slots = self._prefetched_slots(doctor_id, duration)
+        if slots is None:
+            slots = self._slot_search(doctor_id, duration)
         
         if not slots:
             print("❌ Sorry, no available slots found. Please try again later.")
             return False
         
-        print(f"\n📋 Available slots for {self.appointment_data['appointment_duration']}-minute appointment:")
-        for i, slot in enumerate(slots[:10], 1):  # Show first 10 slots
-            slot_time = datetime.fromisoformat(slot['datetime'])
+        print(f"\n📋 Available slots for {self.appointment_data.appointment_duration}-minute appointment:")
+        # Show first 10 slots, parsing each start time once for both display and selection
+        shown = [(slot, datetime.fromisoformat(slot['datetime'])) for slot in slots[:10]]
+        for i, (_, slot_time) in enumerate(shown, 1):
             print(f"{i}. {slot_time.strftime('%A, %B %d, %Y at %I:%M %p')}")
         
         # Get user selection
         while True:
             try:
-                choice = int(input(f"\nPlease select a slot (1-{min(len(slots), 10)}): "))
-                if 1 <= choice <= min(len(slots), 10):
-                    selected_slot = slots[choice-1]
-                    self.appointment_data['appointment_datetime'] = datetime.fromisoformat(selected_slot['datetime'])
-                    self.appointment_data['selected_slot'] = selected_slot
-                    print(f"✅ Selected: {self.appointment_data['appointment_datetime'].strftime('%A, %B %d, %Y at %I:%M %p')}")
+                choice = int(input(f"\nPlease select a slot (1-{len(shown)}): "))
+                if 1 <= choice <= len(shown):
+                    selected_slot, slot_time = shown[choice-1]
+                    self.appointment_data.appointment_datetime = slot_time
+                    self.appointment_data.selected_slot = selected_slot
+                    print(f"✅ Selected: {self.appointment_data.appointment_datetime.strftime('%A, %B %d, %Y at %I:%M %p')}")
                     return True
                 else:
-                    print(f"❌ Please enter a number between 1 and {min(len(slots), 10)}")
+                    print(f"❌ Please enter a number between 1 and {len(shown)}")
             except ValueError:
                 print("❌ Please enter a valid number.")
     
@@ -288,11 +430,11 @@ class InteractiveMedicalAgent:
         print("=" * 30)
         
         # Check if returning patient already has insurance
-        if (self.appointment_data['patient_type'] == 'returning' and 
-            self.appointment_data.get('insurance_carrier') and 
-            str(self.appointment_data['insurance_carrier']).lower() not in ['none', 'nan', '']):
+        if (self.appointment_data.patient_type == 'returning' and 
+            self.appointment_data.insurance_carrier and 
+            str(self.appointment_data.insurance_carrier).lower() not in ['none', 'nan', '']):
             
-            print(f"✅ Using existing insurance: {self.appointment_data['insurance_carrier']}")
+            print(f"✅ Using existing insurance: {self.appointment_data.insurance_carrier}")
             
             # Ask if they want to update their insurance information
             update_insurance = input("Would you like to update your insurance information? (y/n): ").strip().lower()
@@ -301,44 +443,37 @@ class InteractiveMedicalAgent:
                 return
         
         # Get insurance carrier (for new patients or returning patients who want to update)
-        while not self.appointment_data.get('insurance_carrier'):
-            print("\nInsurance carriers available:")
-            print("1) ICICI Lombard")
-            print("2) HDFC Ergo")
-            print("3) Star Health")
-            print("4) Religare")
-            print("5) New India Assurance")
-            print("6) Self-pay/None")
+        while not self.appointment_data.insurance_carrier:
+            sys.stdout.write(_CARRIER_MENU)
             
             choice = input("Select your insurance carrier (1-6): ").strip()
-            carriers = ["ICICI Lombard", "HDFC Ergo", "Star Health", "Religare", "New India Assurance", "None"]
             if choice.isdigit() and 1 <= int(choice) <= 6:
-                self.appointment_data['insurance_carrier'] = carriers[int(choice)-1]
+                self.appointment_data.insurance_carrier = _CARRIERS[int(choice)-1]
             else:
                 print("❌ Please enter a valid choice (1-6).")
         
         # Get member ID if not self-pay
-        if self.appointment_data['insurance_carrier'] != "None":
-            while not self.appointment_data.get('insurance_member_id'):
+        if self.appointment_data.insurance_carrier != "None":
+            while not self.appointment_data.insurance_member_id:
                 member_id = input("🆔 Please enter your insurance member ID: ").strip()
                 if self.validate_insurance_id(member_id):
-                    self.appointment_data['insurance_member_id'] = member_id
+                    self.appointment_data.insurance_member_id = member_id
                 else:
                     print("❌ Member ID should be 6-12 alphanumeric characters.")
             
             # Get group ID (optional)
             group_id = input("👥 Group ID (optional, press Enter to skip): ").strip()
             if group_id:
-                self.appointment_data['insurance_group_id'] = group_id
+                self.appointment_data.insurance_group_id = group_id
         
         # Verify insurance
-        if self.appointment_data['insurance_carrier'] != "None":
+        if self.appointment_data.insurance_carrier != "None":
             print("\n🔍 Verifying insurance...")
             from backend.insurance import InsuranceInfo
             insurance_info = InsuranceInfo(
-                carrier=str(self.appointment_data['insurance_carrier']),
-                member_id=str(self.appointment_data['insurance_member_id']),
-                group_number=str(self.appointment_data.get('insurance_group_id', ''))
+                carrier=str(self.appointment_data.insurance_carrier),
+                member_id=str(self.appointment_data.insurance_member_id),
+                group_number=str(self.appointment_data.insurance_group_id)
             )
             
             success, details = self.insurance_validator.verify_insurance(insurance_info)
@@ -352,17 +487,21 @@ class InteractiveMedicalAgent:
     
     def step5_appointment_confirmation(self):
         """Step 5: Appointment confirmation"""
-        print("\n📋 Appointment Summary")
-        print("=" * 30)
-        print(f"👤 Patient: {self.appointment_data['patient_name']}")
-        print(f"📅 DOB: {self.appointment_data['patient_dob']}")
-        print(f"👨‍⚕️ Doctor: {self.appointment_data['doctor_preference']}")
-        print(f"🏥 Location: {self.appointment_data['location_preference']}")
-        print(f"📅 Date/Time: {self.appointment_data['appointment_datetime'].strftime('%A, %B %d, %Y at %I:%M %p')}")
-        print(f"⏱️ Duration: {self.appointment_data['appointment_duration']} minutes")
-        print(f"🏥 Insurance: {self.appointment_data.get('insurance_carrier', 'None')}")
-        if self.appointment_data.get('insurance_member_id'):
-            print(f"🆔 Member ID: {self.appointment_data['insurance_member_id']}")
+        # Built up and written in one go rather than a print per line
+        lines = [
+            "\n📋 Appointment Summary",
+            "=" * 30,
+            f"👤 Patient: {self.appointment_data.patient_name}",
+            f"📅 DOB: {self.appointment_data.patient_dob}",
+            f"👨‍⚕️ Doctor: {self.appointment_data.doctor_preference}",
+            f"🏥 Location: {self.appointment_data.location_preference}",
+            f"📅 Date/Time: {self.appointment_data.appointment_datetime.strftime('%A, %B %d, %Y at %I:%M %p')}",
+            f"⏱️ Duration: {self.appointment_data.appointment_duration} minutes",
+            f"🏥 Insurance: {self.appointment_data.insurance_carrier or 'None'}",
+        ]
+        if self.appointment_data.insurance_member_id:
+            lines.append(f"🆔 Member ID: {self.appointment_data.insurance_member_id}")
+        sys.stdout.write("\n".join(lines) + "\n")
         
         while True:
             confirm = input("\nDo you want to confirm this appointment? (yes/no): ").lower().strip()
@@ -378,20 +517,20 @@ class InteractiveMedicalAgent:
         """Step 6: Send confirmation via email and SMS"""
         print("\n📧 Sending confirmation...")
         
-        # Generate appointment ID
-        appointment_id = datetime.now().strftime("%Y%m%d%H%M%S")
-        self.appointment_data['appointment_id'] = appointment_id
+        # Generate appointment ID (run() assigns it up front when steps 6-8 run together)
+        appointment_id = self.appointment_data.appointment_id or datetime.now().strftime("%Y%m%d%H%M%S")
+        self.appointment_data.appointment_id = appointment_id
         
         # Update patient database with latest insurance information
-        if self.appointment_data['patient_type'] == 'returning':
+        if self.appointment_data.patient_type == 'returning':
             try:
                 # Update the patient's insurance information in the database
                 self.patient_db.update_patient(
-                    name=self.appointment_data['patient_name'],
-                    dob=self.appointment_data['patient_dob'],
+                    name=self.appointment_data.patient_name,
+                    dob=self.appointment_data.patient_dob,
                     updates={
-                        'Insurance': self.appointment_data.get('insurance_carrier', 'None'),
-                        'Visit_Count': self.patient_db.get_visit_count(self.appointment_data['patient_name'], self.appointment_data['patient_dob']) + 1
+                        'Insurance': self.appointment_data.insurance_carrier or 'None',
+                        'Visit_Count': self.appointment_data.current_visit_count + 1
                     }
                 )
                 print("✅ Patient record updated with latest insurance information.")
@@ -401,10 +540,10 @@ class InteractiveMedicalAgent:
             # For new patients, update their insurance information
             try:
                 self.patient_db.update_patient(
-                    name=self.appointment_data['patient_name'],
-                    dob=self.appointment_data['patient_dob'],
+                    name=self.appointment_data.patient_name,
+                    dob=self.appointment_data.patient_dob,
                     updates={
-                        'Insurance': self.appointment_data.get('insurance_carrier', 'None'),
+                        'Insurance': self.appointment_data.insurance_carrier or 'None',
                         'Visit_Count': 1,
                         'Status': 'returning'
                     }
@@ -416,25 +555,40 @@ class InteractiveMedicalAgent:
         # Prepare appointment data for services
         appt_data = {
             "appointment_id": appointment_id,
-            "datetime": self.appointment_data['appointment_datetime'].isoformat(),
-            "appointment_type": "New" if self.appointment_data['patient_type'] == 'new' else "Returning",
+            "datetime": self.appointment_data.appointment_datetime.isoformat(),
+            "appointment_type": "New" if self.appointment_data.patient_type == 'new' else "Returning",
             "patient_data": {
-                "name": self.appointment_data['patient_name'],
-                "email": self.appointment_data['patient_email'],
-                "insurance_carrier": self.appointment_data.get('insurance_carrier', 'None'),
-                "insurance_member_id": self.appointment_data.get('insurance_member_id', ''),
-                "insurance_group": self.appointment_data.get('insurance_group_id', ''),
+                "name": self.appointment_data.patient_name,
+                "email": self.appointment_data.patient_email,
+                "insurance_carrier": self.appointment_data.insurance_carrier or 'None',
+                "insurance_member_id": self.appointment_data.insurance_member_id,
+                "insurance_group": self.appointment_data.insurance_group_id,
             },
             "details": {
-                "doctor": self.appointment_data['doctor_preference'],
-                "location": self.appointment_data['location_preference'],
-                "duration": f"{self.appointment_data['appointment_duration']} minutes",
+                "doctor": self.appointment_data.doctor_preference,
+                "location": self.appointment_data.location_preference,
+                "duration": f"{self.appointment_data.appointment_duration} minutes",
             },
         }
         
-        # Send email confirmation
+        # Email, SMS and calendar booking are independent round trips: run them side by side
+        reminder = SMSReminder(
+            patient_phone=self.appointment_data.patient_phone,
+            patient_name=self.appointment_data.patient_name,
+            appointment_date=self.appointment_data.appointment_datetime,
+            appointment_time=self.appointment_data.appointment_datetime.strftime("%I:%M %p"),
+            doctor_name=self.appointment_data.doctor_preference,
+            stage=ReminderStage.FIRST,
+            appointment_id=appointment_id
+        )
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            email_future = executor.submit(self.email_service.send_confirmation_email, appt_data)
+            sms_future = executor.submit(self.sms_service.send_reminder, reminder)
+            booking_future = executor.submit(self._book_selected_slot)
+        
+        # Report in a fixed order once all three are done
         try:
-            email_result = self.email_service.send_confirmation_email(appt_data)
+            email_result = email_future.result()
             if email_result and email_result.get('success'):
                 print("✅ Confirmation email sent successfully!")
             else:
@@ -442,18 +596,8 @@ class InteractiveMedicalAgent:
         except Exception as e:
             print(f"⚠️ Email sending failed: {e}")
         
-        # Send SMS confirmation
         try:
-            reminder = SMSReminder(
-                patient_phone=self.appointment_data['patient_phone'],
-                patient_name=self.appointment_data['patient_name'],
-                appointment_date=self.appointment_data['appointment_datetime'],
-                appointment_time=self.appointment_data['appointment_datetime'].strftime("%I:%M %p"),
-                doctor_name=self.appointment_data['doctor_preference'],
-                stage=ReminderStage.FIRST,
-                appointment_id=appointment_id
-            )
-            sms_result = self.sms_service.send_reminder(reminder)
+            sms_result = sms_future.result()
             if isinstance(sms_result, dict) and sms_result.get('success'):
                 print("✅ Confirmation SMS sent successfully!")
             else:
@@ -461,35 +605,40 @@ class InteractiveMedicalAgent:
         except Exception as e:
             print(f"⚠️ SMS sending failed: {e}")
         
-        # Book the appointment
         try:
-            if self.appointment_data.get('selected_slot'):
-                patient_info = {
-                    "name": self.appointment_data['patient_name'],
-                    "email": self.appointment_data['patient_email'],
-                    "insurance_carrier": self.appointment_data.get('insurance_carrier', 'None'),
-                    "doctor_name": self.appointment_data['doctor_preference'],
-                    "location": self.appointment_data['location_preference'],
-                    "appointment_type": f"{self.appointment_data['patient_type']}_patient"
-                }
-                self.calendly.book_slot(self.appointment_data['selected_slot'], patient_info)
+            if booking_future.result():
                 print("✅ Appointment booked in calendar!")
         except Exception as e:
             print(f"⚠️ Calendar booking failed: {e}")
     
+    def _book_selected_slot(self) -> bool:
+        """Book the selected slot in the calendar; False if no slot was selected"""
+        if not self.appointment_data.selected_slot:
+            return False
+        patient_info = {
+            "name": self.appointment_data.patient_name,
+            "email": self.appointment_data.patient_email,
+            "insurance_carrier": self.appointment_data.insurance_carrier or 'None',
+            "doctor_name": self.appointment_data.doctor_preference,
+            "location": self.appointment_data.location_preference,
+            "appointment_type": f"{self.appointment_data.patient_type}_patient"
+        }
+        self.calendly.book_slot(self.appointment_data.selected_slot, patient_info)
+        return True
+    
     def step7_schedule_reminders(self):
         """Step 7: Schedule 3-stage reminder system"""
         print("\n⏰ Scheduling reminders...")
         
         appointment_data = {
-            "appointment_id": self.appointment_data.get('appointment_id', datetime.now().strftime("%Y%m%d%H%M%S")),
-            "patient_name": self.appointment_data['patient_name'],
-            "patient_email": self.appointment_data['patient_email'],
-            "patient_phone": self.appointment_data['patient_phone'],
-            "appointment_datetime": self.appointment_data['appointment_datetime'],
-            "doctor_name": self.appointment_data['doctor_preference'],
-            "location": self.appointment_data['location_preference'],
-            "appointment_duration": self.appointment_data['appointment_duration']
+            "appointment_id": self.appointment_data.appointment_id or datetime.now().strftime("%Y%m%d%H%M%S"),
+            "patient_name": self.appointment_data.patient_name,
+            "patient_email": self.appointment_data.patient_email,
+            "patient_phone": self.appointment_data.patient_phone,
+            "appointment_datetime": self.appointment_data.appointment_datetime,
+            "doctor_name": self.appointment_data.doctor_preference,
+            "location": self.appointment_data.location_preference,
+            "appointment_duration": self.appointment_data.appointment_duration
         }
         
         try:
@@ -503,15 +652,20 @@ class InteractiveMedicalAgent:
             print(f"⚠️ Reminder scheduling failed: {e}")
     
     def step8_export_data(self, appointment_data: dict):
-        """Step 8: Export appointment data to Excel"""
+        """Step 8: Append appointment data to the CSV appointment log"""
         print("\n📊 Exporting appointment data...")
         
-        import pandas as pd
-        from pathlib import Path
-        
-        export_path = Path("data/exports/appointments.xlsx")
+        # Append-only CSV: each booking writes one row instead of re-reading and rewriting a workbook
+        export_path = Path("data/exports/appointments.csv")
+        legacy_path = Path("data/exports/appointments.xlsx")
         export_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # The CLI passes asdict(AppointmentData) (location_preference, datetime objects);
+        # Streamlit passes its session dict (location, ISO strings)
+        appointment_datetime = appointment_data.get('appointment_datetime')
+        if isinstance(appointment_datetime, datetime):
+            appointment_datetime = appointment_datetime.isoformat()
+        
         appointment_record = {
             "patient_name": appointment_data.get('patient_name'),
             "patient_dob": appointment_data.get('patient_dob'),
@@ -519,8 +673,8 @@ class InteractiveMedicalAgent:
             "patient_phone": appointment_data.get('patient_phone'),
             "patient_type": appointment_data.get('patient_type'),
             "doctor": appointment_data.get('doctor_preference'),
-            "location": appointment_data.get('location'),
-            "appointment_datetime": appointment_data.get('appointment_datetime'),
+            "location": appointment_data.get('location') or appointment_data.get('location_preference'),
+            "appointment_datetime": appointment_datetime,
             "duration_minutes": appointment_data.get('appointment_duration'),
             "insurance_carrier": appointment_data.get('insurance_carrier', 'None'),
             "insurance_member_id": appointment_data.get('insurance_member_id', ''),
@@ -532,15 +686,68 @@ class InteractiveMedicalAgent:
         }
         
         try:
-            df = pd.DataFrame([appointment_record])
-            if export_path.exists():
-                existing = pd.read_excel(export_path)
-                df = pd.concat([existing, df], ignore_index=True)
-            df.to_excel(export_path, index=False)
+            if not export_path.exists() and legacy_path.exists():
+                # One-time migration: start the CSV log from the history in the old workbook
+                import pandas as pd
+                pd.read_excel(legacy_path).to_csv(export_path, index=False)
+                print(f"📦 Copied earlier appointments from {legacy_path} into {export_path}")
+            
+            fieldnames = list(appointment_record)
+            write_header = not export_path.exists()
+            if not write_header:
+                # Follow the existing header, which may carry extra columns (e.g. cancellation_reason)
+                with open(export_path, newline="") as f:
+                    fieldnames = next(csv.reader(f), None) or fieldnames
+            with open(export_path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+                if write_header:
+                    writer.writeheader()
+                writer.writerow(appointment_record)
             print(f"✅ Appointment data exported to {export_path}")
         except Exception as e:
             print(f"⚠️ Export failed: {e}")
     
+    def _run_steps_concurrently(self, *steps):
+        """
+        Run independent workflow steps in parallel threads
+        
+        Each step's printed output is buffered and written out in step order once all
+        have finished, so the transcript reads as if they ran one after another.
+        
+        Args:
+            steps: (callable, args) pairs
+        """
+        real_stdout = sys.stdout
+        buffers: Dict[int, io.StringIO] = {}
+        
+        class _PerStepStdout:
+            # Writes from a step's thread go to that step's buffer; anything else passes through
+            def write(self, text):
+                return buffers.get(threading.get_ident(), real_stdout).write(text)
+            
+            def flush(self):
+                real_stdout.flush()
+        
+        def run_step(buffer, step, args):
+            buffers[threading.get_ident()] = buffer
+            try:
+                return step(*args)
+            finally:
+                del buffers[threading.get_ident()]
+        
+        outputs = [io.StringIO() for _ in steps]
+        sys.stdout = _PerStepStdout()
+        try:
+            with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+                futures = [executor.submit(run_step, output, step, args)
+                           for output, (step, args) in zip(outputs, steps)]
+        finally:
+            sys.stdout = real_stdout
+        for output in outputs:
+            real_stdout.write(output.getvalue())
+        for future in futures:
+            future.result()
+    
     def run(self):
         """Run the complete interactive workflow"""
         try:
@@ -561,14 +768,14 @@ class InteractiveMedicalAgent:
             if not self.step5_appointment_confirmation():
                 return
             
-            # Step 6: Send confirmation
-            self.step6_send_confirmation()
-            
-            # Step 7: Schedule reminders
-            self.step7_schedule_reminders()
-            
-            # Step 8: Export data
-            self.step8_export_data()
+            # Steps 6-8 only read the confirmed appointment once its ID is fixed, so run
+            # confirmation, reminder scheduling and export side by side
+            self.appointment_data.appointment_id = datetime.now().strftime("%Y%m%d%H%M%S")
+            self._run_steps_concurrently(
+                (self.step6_send_confirmation, ()),
+                (self.step7_schedule_reminders, ()),
+                (self.step8_export_data, (asdict(self.appointment_data),)),
+            )
             
             print("\n🎉 Appointment scheduling completed successfully!")
             print("Thank you for using our medical scheduling system!")
@@ -581,6 +788,9 @@ class InteractiveMedicalAgent:
 
 def main():
     """Main function"""
+    # LOG_LEVEL=WARNING (or higher) hides the startup status lines
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    
     # Get API key
     groq_api_key = os.getenv("GROQ_API_KEY")
     if not groq_api_key:
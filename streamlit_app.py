@@ -7,9 +7,11 @@ Replicates the exact workflow from interactive_agent.py
 import streamlit as st
 import os
 import sys
+import time
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -19,45 +21,127 @@ load_dotenv()
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from backend.patient_lookup import PatientDatabase
-from backend.integrations.calendly_service import CalendlyService
-from backend.integrations.email_service import EmailService
-from backend.integrations.sms_service import SMSService
-from backend.remainders import ReminderSystem
-from backend.insurance import InsuranceValidator
-from backend.schedular import Scheduler
-from apscheduler.schedulers.background import BackgroundScheduler
-from backend.email_cancellation import check_email_cancellations
+# Backend and scheduler modules are imported where they are used; the services load
+# once per process, inside the cached get_agent()/get_scheduler()
+
+# Doctor menu entries, their "Dr. X" names, and the scheduler ids those names map to
+DOCTORS = (
+    "Dr. Sharma - General Medicine",
+    "Dr. Iyer - Cardiology",
+    "Dr. Mehta - Orthopedics",
+    "Dr. Kapoor - Dermatology",
+    "Dr. Reddy - Pediatrics"
+)
+DOCTOR_SHORT = tuple(d.split(" - ")[0] for d in DOCTORS)
+DOCTOR_ID = {
+    "Dr. Sharma": "dr_sharma",
+    "Dr. Iyer": "dr_iyer",
+    "Dr. Mehta": "dr_mehta",
+    "Dr. Kapoor": "dr_kapoor",
+    "Dr. Reddy": "dr_reddy"
+}
 
 # Initialize session state
 if 'current_step' not in st.session_state:
     st.session_state.current_step = 1
     st.session_state.appointment_data = {}
-    st.session_state.agent = None
-    st.session_state.scheduler = None
+
+# Cancellation inbox polling: every minute while there is activity, backing off to 15 minutes when idle
+CANCELLATION_JOB_ID = 'email_cancellation_checker'
+CANCELLATION_POLL_MIN_SECONDS = 60
+CANCELLATION_POLL_MAX_SECONDS = 900
+
+def _set_cancellation_interval(scheduler, seconds: float):
+    """Reschedule the cancellation job if its interval differs"""
+    job = scheduler.get_job(CANCELLATION_JOB_ID)
+    if job is not None and job.trigger.interval.total_seconds() != seconds:
+        scheduler.reschedule_job(CANCELLATION_JOB_ID, trigger='interval', seconds=seconds)
+
+def _adaptive_cancellation_check(scheduler):
+    """Poll the inbox, then double the interval if nothing was cancelled or reset it if something was"""
+    from backend.email_cancellation import check_email_cancellations
+    found = check_email_cancellations()
+    job = scheduler.get_job(CANCELLATION_JOB_ID)
+    if job is None:
+        return
+    if found:
+        interval = CANCELLATION_POLL_MIN_SECONDS
+    else:
+        interval = min(job.trigger.interval.total_seconds() * 2, CANCELLATION_POLL_MAX_SECONDS)
+    _set_cancellation_interval(scheduler, interval)
+
+def reset_cancellation_polling(scheduler):
+    """Drop back to per-minute polling, e.g. right after a booking"""
+    if scheduler is not None:
+        _set_cancellation_interval(scheduler, CANCELLATION_POLL_MIN_SECONDS)
+
+@st.cache_resource
+def get_scheduler():
+    """One cancellation-polling scheduler per process, shared by every browser session"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    scheduler = BackgroundScheduler()
+    # The job runs outside any Streamlit session, so it gets the scheduler as an argument;
+    # max_instances/coalesce collapse runs missed while the process was asleep into one poll
+    scheduler.add_job(
+        _adaptive_cancellation_check,
+        'interval',
+        seconds=CANCELLATION_POLL_MIN_SECONDS,
+        id=CANCELLATION_JOB_ID,
+        args=[scheduler],
+        max_instances=1,
+        coalesce=True
+    )
+    scheduler.start()
+    return scheduler
+
+@st.cache_resource
+def get_agent():
+    """One InteractiveMedicalAgent per process; its services are shared by every browser session"""
+    from interactive_agent import InteractiveMedicalAgent
+    # get_scheduler() owns the (adaptive) cancellation polling, so the agent must not start its own
+    return InteractiveMedicalAgent(os.getenv("GROQ_API_KEY"), start_cancellation_poller=False)
 
 def initialize_agent():
     """Initialize the medical agent"""
-    if st.session_state.agent is None:
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        if not groq_api_key:
-            st.error("❌ GROQ_API_KEY not found in environment variables.")
-            st.stop()
-        
-        # Initialize agent
-        from interactive_agent import InteractiveMedicalAgent
-        st.session_state.agent = InteractiveMedicalAgent(groq_api_key)
-        
-        # Initialize background scheduler for email cancellations
-        if st.session_state.scheduler is None:
-            st.session_state.scheduler = BackgroundScheduler()
-            st.session_state.scheduler.add_job(
-                check_email_cancellations,
-                'interval',
-                minutes=1,
-                id='email_cancellation_checker'
-            )
-            st.session_state.scheduler.start()
+    # Agent and scheduler live in the resource cache, not session state, so a
+    # session only holds current_step and appointment_data
+    if not os.getenv("GROQ_API_KEY"):
+        st.error("❌ GROQ_API_KEY not found in environment variables.")
+        st.stop()
+    
+    get_agent()
+    # Background scheduler for email cancellations
+    get_scheduler()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_slots(doctor_id: str, day_from: date, day_to: date, duration: int):
+    """Available slots for a doctor and day window, pre-formatted and reused across reruns for a minute"""
+    # The scheduler only looks at the calendar day, so midnight bounds give the same window as now()
+    slots = get_agent().calendly.get_available_slots(
+        doctor_id=doctor_id,
+        date_from=datetime.combine(day_from, datetime.min.time()),
+        date_to=datetime.combine(day_to, datetime.min.time()),
+        duration_minutes=duration
+    )
+    formatted = []
+    for slot in slots:
+        dt = datetime.fromisoformat(slot['datetime'])
+        date_str = dt.strftime('%A, %B %d, %Y')
+        time_str = dt.strftime('%I:%M %p')
+        formatted.append({
+            'datetime': slot['datetime'],
+            'dt': dt,
+            'date_str': date_str,
+            'time_str': time_str,
+            'label': f"{date_str} at {time_str}"
+        })
+    return formatted
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_patient_lookup(name: str, dob: str):
+    """Patient record for name + DOB, reused across step2 reruns for five minutes"""
+    patient = get_agent().patient_db.search_patient(name, dob)
+    return dict(patient) if patient is not None else None
 
 def step1_greeting_and_collect_info():
     """Step 1: Greeting and collect patient information"""
@@ -80,16 +164,8 @@ def step1_greeting_and_collect_info():
         st.markdown("### 👨‍⚕️ Doctor Selection")
         st.markdown("Choose your preferred doctor:")
         
-        doctors = [
-            "Dr. Sharma - General Medicine",
-            "Dr. Iyer - Cardiology", 
-            "Dr. Mehta - Orthopedics",
-            "Dr. Kapoor - Dermatology",
-            "Dr. Reddy - Pediatrics"
-        ]
-        
-        doctor_choice = st.selectbox("Select Doctor", range(1, 6), format_func=lambda x: f"{x}) {doctors[x-1]}")
-        doctor_name = doctors[doctor_choice - 1].split(" - ")[0]
+        doctor_choice = st.selectbox("Select Doctor", range(1, len(DOCTORS) + 1), format_func=lambda x: f"{x}) {DOCTORS[x-1]}")
+        doctor_name = DOCTOR_SHORT[doctor_choice - 1]
         
         location = st.text_input("Preferred Clinic Location", value="Main", placeholder="Enter clinic location")
         
@@ -124,43 +200,52 @@ def step1_greeting_and_collect_info():
 
 def step2_patient_lookup():
     """Step 2: Patient lookup"""
+    appt = st.session_state.appointment_data
     st.markdown("## 🔍 Patient Lookup")
     st.markdown("=" * 30)
     
-    # Perform patient lookup
-    patient = st.session_state.agent.patient_db.search_patient(
-        st.session_state.appointment_data['patient_name'],
-        st.session_state.appointment_data['patient_dob']
-    )
+    # Perform patient lookup once; later reruns of this step (e.g. the Continue click)
+    # only re-render the result, so a new patient is never inserted twice or re-read as returning
+    if not appt.get('lookup_done'):
+        patient = _cached_patient_lookup(
+            appt['patient_name'],
+            appt['patient_dob']
+        )
+        
+        if patient:
+            appt['patient_type'] = 'returning'
+            appt['appointment_duration'] = 30
+            
+            # Check existing insurance
+            existing_insurance = patient.get('Insurance', 'None')
+            if existing_insurance and str(existing_insurance).lower() not in ['none', 'nan', '']:
+                appt['insurance_carrier'] = str(existing_insurance)
+        else:
+            appt['patient_type'] = 'new'
+            appt['appointment_duration'] = 60
+            
+            # Add new patient to database
+            get_agent().patient_db.add_patient({
+                "name": appt['patient_name'],
+                "dob": appt['patient_dob'],
+                "email": appt['patient_email'],
+                "phone": appt['patient_phone'],
+                "doctor": appt['doctor_preference']
+            })
+            _cached_patient_lookup.clear()
+        appt['lookup_done'] = True
     
-    if patient:
-        st.session_state.appointment_data['patient_type'] = 'returning'
-        st.session_state.appointment_data['appointment_duration'] = 30
-        st.success(f"✅ Welcome back, {st.session_state.appointment_data['patient_name']}!")
+    if appt['patient_type'] == 'returning':
+        st.success(f"✅ Welcome back, {appt['patient_name']}!")
         st.info("📋 You are a returning patient. Your appointment will be 30 minutes.")
-        
-        # Check existing insurance
-        existing_insurance = patient.get('Insurance', 'None')
-        if existing_insurance and str(existing_insurance).lower() not in ['none', 'nan', '']:
-            st.session_state.appointment_data['insurance_carrier'] = str(existing_insurance)
-            st.info(f"🏥 Using your existing insurance: {existing_insurance}")
+        if appt.get('insurance_carrier'):
+            st.info(f"🏥 Using your existing insurance: {appt['insurance_carrier']}")
         else:
             st.info("🏥 No insurance on file. We'll collect this information.")
     else:
-        st.session_state.appointment_data['patient_type'] = 'new'
-        st.session_state.appointment_data['appointment_duration'] = 60
-        st.success(f"👋 Welcome, {st.session_state.appointment_data['patient_name']}!")
+        st.success(f"👋 Welcome, {appt['patient_name']}!")
         st.info("📋 You are a new patient. Your first appointment will be 60 minutes.")
         st.info("🏥 We'll need to collect your insurance information.")
-        
-        # Add new patient to database
-        st.session_state.agent.patient_db.add_patient({
-            "name": st.session_state.appointment_data['patient_name'],
-            "dob": st.session_state.appointment_data['patient_dob'],
-            "email": st.session_state.appointment_data['patient_email'],
-            "phone": st.session_state.appointment_data['patient_phone'],
-            "doctor": st.session_state.appointment_data['doctor_preference']
-        })
     
     if st.button("Continue to Scheduling", type="primary"):
         st.session_state.current_step = 3
@@ -168,32 +253,23 @@ def step2_patient_lookup():
 
 def step3_smart_scheduling():
     """Step 3: Smart scheduling"""
+    appt = st.session_state.appointment_data
     st.markdown("## 📅 Smart Scheduling")
     st.markdown("=" * 30)
     
-    doctor = st.session_state.appointment_data['doctor_preference']
-    duration = st.session_state.appointment_data['appointment_duration']
+    doctor = appt['doctor_preference']
+    duration = appt['appointment_duration']
     
     st.info(f"📅 Finding available slots with {doctor}...")
     
     # Get available slots
     try:
         # Convert doctor name to doctor_id
-        doctor_mapping = {
-            "Dr. Sharma": "dr_sharma",
-            "Dr. Iyer": "dr_iyer", 
-            "Dr. Mehta": "dr_mehta",
-            "Dr. Kapoor": "dr_kapoor",
-            "Dr. Reddy": "dr_reddy"
-        }
-        doctor_id = doctor_mapping.get(doctor, "dr_sharma")
+        doctor_id = DOCTOR_ID.get(doctor, "dr_sharma")
         
-        slots = st.session_state.agent.calendly.get_available_slots(
-            doctor_id=doctor_id,
-            date_from=datetime.now(),
-            date_to=datetime.now() + timedelta(days=7),
-            duration_minutes=duration
-        )
+        # Date (not datetime) bounds keep the cache key stable across reruns within a day
+        today = datetime.now().date()
+        slots = _cached_slots(doctor_id, today, today + timedelta(days=7), duration)
         
         if not slots:
             st.error("❌ No available slots found. Please try a different doctor or contact support.")
@@ -201,42 +277,28 @@ def step3_smart_scheduling():
         
         st.success(f"📋 Available slots for {duration}-minute appointment:")
         
-        # Display slots in a nice format
-        slot_options = []
-        slot_data = []  # Store parsed slot data
+        # Slots come back already formatted from the cache; the form holds back reruns
+        # while the patient browses the list and only submits the final choice
+        with st.form("slot_selection"):
+            selected_slot_idx = st.selectbox(
+                "Select a slot:",
+                range(len(slots)),
+                format_func=lambda x: f"{x + 1}. {slots[x]['label']}"
+            )
+            submitted = st.form_submit_button("Continue to Insurance", type="primary")
         
-        for i, slot in enumerate(slots, 1):
-            # Parse datetime to get date and time
-            dt = datetime.fromisoformat(slot['datetime'])
-            date_str = dt.strftime('%A, %B %d, %Y')
-            time_str = dt.strftime('%I:%M %p')
-            slot_text = f"{i}. {date_str} at {time_str}"
-            slot_options.append(slot_text)
-            slot_data.append({
-                'date_str': date_str,
-                'time_str': time_str,
-                'datetime': slot['datetime']
+        if submitted:
+            selected_data = slots[selected_slot_idx]
+            
+            # Store selected slot
+            appt.update({
+                'appointment_date': selected_data['date_str'],
+                'appointment_time': selected_data['time_str'],
+                'appointment_datetime': selected_data['datetime'],
+                # Parsed form of the ISO string above, so step 6 needn't parse it again
+                'appointment_dt_obj': selected_data['dt']
             })
-        
-        selected_slot_idx = st.selectbox(
-            "Select a slot:",
-            range(len(slots)),
-            format_func=lambda x: slot_options[x]
-        )
-        
-        selected_slot = slots[selected_slot_idx]
-        selected_data = slot_data[selected_slot_idx]
-        
-        st.success(f"✅ Selected: {selected_data['date_str']} at {selected_data['time_str']}")
-        
-        # Store selected slot
-        st.session_state.appointment_data.update({
-            'appointment_date': selected_data['date_str'],
-            'appointment_time': selected_data['time_str'],
-            'appointment_datetime': selected_data['datetime']
-        })
-        
-        if st.button("Continue to Insurance", type="primary"):
+            
             st.session_state.current_step = 4
             st.rerun()
             
@@ -248,15 +310,16 @@ def step3_smart_scheduling():
 
 def step4_insurance_collection():
     """Step 4: Insurance collection"""
+    appt = st.session_state.appointment_data
     st.markdown("## 🏥 Insurance Information")
     st.markdown("=" * 30)
     
     # Check if returning patient already has insurance
-    if (st.session_state.appointment_data['patient_type'] == 'returning' and 
-        st.session_state.appointment_data.get('insurance_carrier') and 
-        str(st.session_state.appointment_data['insurance_carrier']).lower() not in ['none', 'nan', '']):
+    if (appt['patient_type'] == 'returning' and 
+        appt.get('insurance_carrier') and 
+        str(appt['insurance_carrier']).lower() not in ['none', 'nan', '']):
         
-        st.success(f"✅ Using existing insurance: {st.session_state.appointment_data['insurance_carrier']}")
+        st.success(f"✅ Using existing insurance: {appt['insurance_carrier']}")
         
         update_insurance = st.radio(
             "Would you like to update your insurance information?",
@@ -271,7 +334,8 @@ def step4_insurance_collection():
                 st.rerun()
             return
     
-    # Insurance carrier selection
+    # Insurance carrier selection; the form holds back reruns (and Member ID validation)
+    # until one of its buttons is pressed
     st.markdown("### Insurance carriers available:")
     carriers = [
         "ICICI Lombard",
@@ -282,50 +346,61 @@ def step4_insurance_collection():
         "Self-pay/None"
     ]
     
-    carrier_choice = st.selectbox("Select your insurance carrier:", range(1, 7), format_func=lambda x: f"{x}) {carriers[x-1]}")
-    selected_carrier = carriers[carrier_choice - 1]
+    with st.form("insurance_form", clear_on_submit=False):
+        carrier_choice = st.selectbox("Select your insurance carrier:", range(1, 7), format_func=lambda x: f"{x}) {carriers[x-1]}")
+        member_id = st.text_input("🆔 Insurance Member ID", placeholder="Enter 6-12 alphanumeric characters (leave blank for Self-pay)")
+        group_id = st.text_input("👥 Group ID (optional)", placeholder="Enter group ID or leave blank")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            verify_clicked = st.form_submit_button("🔍 Verify Insurance", type="secondary")
+        with col2:
+            continue_clicked = st.form_submit_button("Continue to Confirmation", type="primary")
+    
+    if not (verify_clicked or continue_clicked):
+        return
     
-    st.session_state.appointment_data['insurance_carrier'] = selected_carrier
+    selected_carrier = carriers[carrier_choice - 1]
+    appt['insurance_carrier'] = selected_carrier
     
     # Member ID and Group ID
-    if selected_carrier != "Self-pay/None":
-        member_id = st.text_input("🆔 Insurance Member ID", placeholder="Enter 6-12 alphanumeric characters")
-        group_id = st.text_input("👥 Group ID (optional)", placeholder="Enter group ID or leave blank")
-        
-        if member_id:
-            # Validate member ID
-            if st.session_state.agent.validate_insurance_id(member_id):
-                st.session_state.appointment_data['insurance_member_id'] = member_id
-                if group_id:
-                    st.session_state.appointment_data['insurance_group_id'] = group_id
-            else:
-                st.error("❌ Member ID should be 6-12 alphanumeric characters.")
-                return
+    if selected_carrier != "Self-pay/None" and member_id:
+        # Validate member ID
+        if get_agent().validate_insurance_id(member_id):
+            appt['insurance_member_id'] = member_id
+            if group_id:
+                appt['insurance_group_id'] = group_id
+        else:
+            st.error("❌ Member ID should be 6-12 alphanumeric characters.")
+            return
     
     # Verify insurance
-    if selected_carrier != "Self-pay/None" and st.session_state.appointment_data.get('insurance_member_id'):
-        if st.button("🔍 Verify Insurance", type="secondary"):
-            with st.spinner("Verifying insurance..."):
-                from backend.insurance import InsuranceInfo
-                insurance_info = InsuranceInfo(
-                    carrier=str(st.session_state.appointment_data['insurance_carrier']),
-                    member_id=str(st.session_state.appointment_data['insurance_member_id']),
-                    group_number=str(st.session_state.appointment_data.get('insurance_group_id', ''))
-                )
-                
-                success, details = st.session_state.agent.insurance_validator.verify_insurance(insurance_info)
-                if success:
-                    copay = details.get('copay', 'N/A')
-                    st.success(f"✅ Insurance verified successfully! Copay: {copay}")
-                else:
-                    st.warning("⚠️ Insurance verification failed, but we'll proceed.")
+    if verify_clicked:
+        if selected_carrier == "Self-pay/None" or not appt.get('insurance_member_id'):
+            st.info("Enter a Member ID for your carrier to verify insurance.")
+            return
+        with st.spinner("Verifying insurance..."):
+            from backend.insurance import InsuranceInfo
+            insurance_info = InsuranceInfo(
+                carrier=str(appt['insurance_carrier']),
+                member_id=str(appt['insurance_member_id']),
+                group_number=str(appt.get('insurance_group_id', ''))
+            )
+            
+            success, details = get_agent().insurance_validator.verify_insurance(insurance_info)
+            if success:
+                copay = details.get('copay', 'N/A')
+                st.success(f"✅ Insurance verified successfully! Copay: {copay}")
+            else:
+                st.warning("⚠️ Insurance verification failed, but we'll proceed.")
+        return
     
-    if st.button("Continue to Confirmation", type="primary"):
-        st.session_state.current_step = 5
-        st.rerun()
+    st.session_state.current_step = 5
+    st.rerun()
 
 def step5_appointment_confirmation():
     """Step 5: Appointment confirmation"""
+    appt = st.session_state.appointment_data
     st.markdown("## 📋 Appointment Summary")
     st.markdown("=" * 30)
     
@@ -333,17 +408,17 @@ def step5_appointment_confirmation():
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown(f"**👤 Patient:** {st.session_state.appointment_data['patient_name']}")
-        st.markdown(f"**📅 DOB:** {st.session_state.appointment_data['patient_dob']}")
-        st.markdown(f"**👨‍⚕️ Doctor:** {st.session_state.appointment_data['doctor_preference']}")
-        st.markdown(f"**🏥 Location:** {st.session_state.appointment_data['location']}")
+        st.markdown(f"**👤 Patient:** {appt['patient_name']}")
+        st.markdown(f"**📅 DOB:** {appt['patient_dob']}")
+        st.markdown(f"**👨‍⚕️ Doctor:** {appt['doctor_preference']}")
+        st.markdown(f"**🏥 Location:** {appt['location']}")
     
     with col2:
-        st.markdown(f"**📅 Date/Time:** {st.session_state.appointment_data['appointment_date']} at {st.session_state.appointment_data['appointment_time']}")
-        st.markdown(f"**⏱️ Duration:** {st.session_state.appointment_data['appointment_duration']} minutes")
-        st.markdown(f"**🏥 Insurance:** {st.session_state.appointment_data.get('insurance_carrier', 'None')}")
-        if st.session_state.appointment_data.get('insurance_member_id'):
-            st.markdown(f"**🆔 Member ID:** {st.session_state.appointment_data['insurance_member_id']}")
+        st.markdown(f"**📅 Date/Time:** {appt['appointment_date']} at {appt['appointment_time']}")
+        st.markdown(f"**⏱️ Duration:** {appt['appointment_duration']} minutes")
+        st.markdown(f"**🏥 Insurance:** {appt.get('insurance_carrier', 'None')}")
+        if appt.get('insurance_member_id'):
+            st.markdown(f"**🆔 Member ID:** {appt['insurance_member_id']}")
     
     confirm = st.radio(
         "Do you want to confirm this appointment?",
@@ -360,114 +435,115 @@ def step5_appointment_confirmation():
 
 def step6_send_confirmation():
     """Step 6: Send confirmation"""
+    appt = st.session_state.appointment_data
     st.markdown("## 📧 Sending Confirmation")
     st.markdown("=" * 30)
     
     with st.spinner("Sending confirmation..."):
         try:
             # Generate appointment ID
-            appointment_id = datetime.now().strftime("%Y%m%d%H%M%S")
-            st.session_state.appointment_data['appointment_id'] = appointment_id
+            # Nanosecond clock: sessions sharing the agent can book within the same second
+            appointment_id = f"APT{time.time_ns()}"
+            appt['appointment_id'] = appointment_id
             
             # Update patient database
-            if st.session_state.appointment_data['patient_type'] == 'returning':
-                st.session_state.agent.patient_db.update_patient(
-                    name=st.session_state.appointment_data['patient_name'],
-                    dob=st.session_state.appointment_data['patient_dob'],
+            if appt['patient_type'] == 'returning':
+                get_agent().patient_db.update_and_increment_visit(
+                    name=appt['patient_name'],
+                    dob=appt['patient_dob'],
                     updates={
-                        'Insurance': st.session_state.appointment_data.get('insurance_carrier', 'None'),
-                        'Visit_Count': st.session_state.agent.patient_db.get_visit_count(
-                            st.session_state.appointment_data['patient_name'], 
-                            st.session_state.appointment_data['patient_dob']
-                        ) + 1
+                        'Insurance': appt.get('insurance_carrier', 'None')
                     }
                 )
             else:
-                st.session_state.agent.patient_db.update_patient(
-                    name=st.session_state.appointment_data['patient_name'],
-                    dob=st.session_state.appointment_data['patient_dob'],
+                get_agent().patient_db.update_patient(
+                    name=appt['patient_name'],
+                    dob=appt['patient_dob'],
                     updates={
-                        'Insurance': st.session_state.appointment_data.get('insurance_carrier', 'None'),
+                        'Insurance': appt.get('insurance_carrier', 'None'),
                         'Visit_Count': 1,
                         'Status': 'returning'
                     }
                 )
+            # Insurance and visit count just changed; later lookups must see them
+            _cached_patient_lookup.clear()
             
             # Book appointment
             # Convert doctor name to doctor_id
-            doctor_mapping = {
-                "Dr. Sharma": "dr_sharma",
-                "Dr. Iyer": "dr_iyer", 
-                "Dr. Mehta": "dr_mehta",
-                "Dr. Kapoor": "dr_kapoor",
-                "Dr. Reddy": "dr_reddy"
-            }
-            doctor_id = doctor_mapping.get(st.session_state.appointment_data['doctor_preference'], "dr_sharma")
+            doctor_id = DOCTOR_ID.get(appt['doctor_preference'], "dr_sharma")
             
             slot_data = {
-                'datetime': st.session_state.appointment_data['appointment_datetime'],
+                'datetime': appt['appointment_datetime'],
                 'doctor_id': doctor_id,
-                'duration_minutes': st.session_state.appointment_data['appointment_duration']
+                'duration_minutes': appt['appointment_duration']
             }
             
             patient_info = {
-                'name': st.session_state.appointment_data['patient_name'],
-                'email': st.session_state.appointment_data['patient_email'],
-                'insurance_carrier': st.session_state.appointment_data.get('insurance_carrier', 'None'),
-                'doctor_name': st.session_state.appointment_data['doctor_preference'],
-                'location': st.session_state.appointment_data['location'],
-                'appointment_type': f"{st.session_state.appointment_data['patient_type']}_patient"
+                'name': appt['patient_name'],
+                'email': appt['patient_email'],
+                'insurance_carrier': appt.get('insurance_carrier', 'None'),
+                'doctor_name': appt['doctor_preference'],
+                'location': appt['location'],
+                'appointment_type': f"{appt['patient_type']}_patient"
             }
             
-            booking_result = st.session_state.agent.calendly.book_slot(slot_data, patient_info)
-            
-            if booking_result.get('success'):
-                st.success("✅ Appointment booked in calendar!")
-            else:
-                st.warning("⚠️ Calendar booking failed, but proceeding with confirmation.")
-            
-            # Send email confirmation
-            # Prepare appointment data in the correct format
+            # Email confirmation payload in the format the email service expects
             appt_data = {
                 "appointment_id": appointment_id,
-                "datetime": st.session_state.appointment_data['appointment_datetime'],
-                "appointment_type": "New" if st.session_state.appointment_data['patient_type'] == 'new' else "Returning",
+                "datetime": appt['appointment_datetime'],
+                "appointment_type": "New" if appt['patient_type'] == 'new' else "Returning",
                 "patient_data": {
-                    "name": st.session_state.appointment_data['patient_name'],
-                    "email": st.session_state.appointment_data['patient_email'],
-                    "insurance_carrier": st.session_state.appointment_data.get('insurance_carrier', 'None'),
-                    "insurance_member_id": st.session_state.appointment_data.get('insurance_member_id', ''),
-                    "insurance_group": st.session_state.appointment_data.get('insurance_group_id', ''),
+                    "name": appt['patient_name'],
+                    "email": appt['patient_email'],
+                    "insurance_carrier": appt.get('insurance_carrier', 'None'),
+                    "insurance_member_id": appt.get('insurance_member_id', ''),
+                    "insurance_group": appt.get('insurance_group_id', ''),
                 },
                 "details": {
-                    "doctor": st.session_state.appointment_data['doctor_preference'],
-                    "location": st.session_state.appointment_data['location'],
-                    "duration": f"{st.session_state.appointment_data['appointment_duration']} minutes",
+                    "doctor": appt['doctor_preference'],
+                    "location": appt['location'],
+                    "duration": f"{appt['appointment_duration']} minutes",
                 },
             }
             
-            email_result = st.session_state.agent.email_service.send_confirmation_email(appt_data)
-            
-            if email_result and email_result.get('success'):
-                st.success("✅ Confirmation email sent successfully!")
-            else:
-                st.warning("⚠️ Email sending failed, but appointment is confirmed.")
-            
-            # Send SMS confirmation
+            # SMS confirmation
             from backend.integrations.sms_service import SMSReminder, ReminderStage
-            # Convert appointment_datetime string to datetime object
-            appointment_datetime = datetime.fromisoformat(st.session_state.appointment_data['appointment_datetime'])
+            appointment_datetime = appt['appointment_dt_obj']
             
             reminder = SMSReminder(
-                patient_phone=st.session_state.appointment_data['patient_phone'],
-                patient_name=st.session_state.appointment_data['patient_name'],
+                patient_phone=appt['patient_phone'],
+                patient_name=appt['patient_name'],
                 appointment_date=appointment_datetime,
-                appointment_time=st.session_state.appointment_data['appointment_time'],
-                doctor_name=st.session_state.appointment_data['doctor_preference'],
+                appointment_time=appt['appointment_time'],
+                doctor_name=appt['doctor_preference'],
                 stage=ReminderStage.FIRST,
                 appointment_id=appointment_id
             )
-            sms_result = st.session_state.agent.sms_service.send_reminder(reminder)
+            
+            # Booking, email and SMS are independent once the patient record is saved, so
+            # run them side by side; Streamlit calls stay on this thread
+            agent = get_agent()
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                booking_future = executor.submit(agent.calendly.book_slot, slot_data, patient_info)
+                email_future = executor.submit(agent.email_service.send_confirmation_email, appt_data)
+                sms_future = executor.submit(agent.sms_service.send_reminder, reminder)
+                booking_result = booking_future.result()
+                email_result = email_future.result()
+                sms_result = sms_future.result()
+            
+            if booking_result.get('success'):
+                # The booked slot must drop out of every cached slot list
+                _cached_slots.clear()
+                # A fresh booking is the likeliest thing to be cancelled next
+                reset_cancellation_polling(get_scheduler())
+                st.success("✅ Appointment booked in calendar!")
+            else:
+                st.warning("⚠️ Calendar booking failed, but proceeding with confirmation.")
+            
+            if email_result and email_result.get('success'):
+                st.success("✅ Confirmation email sent successfully!")
+            else:
+                st.warning("⚠️ Email sending failed, but appointment is confirmed.")
             
             if sms_result[0]:  # SMS service returns (success, message_id)
                 st.success("✅ SMS confirmation sent successfully!")
@@ -482,6 +558,7 @@ def step6_send_confirmation():
 
 def step7_schedule_reminders():
     """Step 7: Schedule reminders"""
+    appt = st.session_state.appointment_data
     st.markdown("## ⏰ Scheduling Reminders")
     st.markdown("=" * 30)
     
@@ -489,19 +566,19 @@ def step7_schedule_reminders():
         try:
             # Schedule 3-stage reminders
             appointment_data = {
-                'appointment_id': st.session_state.appointment_data['appointment_id'],
-                'patient_name': st.session_state.appointment_data['patient_name'],
-                'patient_email': st.session_state.appointment_data['patient_email'],
-                'patient_phone': st.session_state.appointment_data['patient_phone'],
-                'doctor_name': st.session_state.appointment_data['doctor_preference'],
-                'date': st.session_state.appointment_data['appointment_date'],
-                'time': st.session_state.appointment_data['appointment_time'],
-                'appointment_datetime': st.session_state.appointment_data['appointment_datetime'],
-                'location': st.session_state.appointment_data['location'],
-                'appointment_duration': st.session_state.appointment_data['appointment_duration']
+                'appointment_id': appt['appointment_id'],
+                'patient_name': appt['patient_name'],
+                'patient_email': appt['patient_email'],
+                'patient_phone': appt['patient_phone'],
+                'doctor_name': appt['doctor_preference'],
+                'date': appt['appointment_date'],
+                'time': appt['appointment_time'],
+                'appointment_datetime': appt['appointment_datetime'],
+                'location': appt['location'],
+                'appointment_duration': appt['appointment_duration']
             }
             
-            st.session_state.agent.reminder_system.schedule_appointment_reminders(appointment_data)
+            get_agent().reminder_system.schedule_appointment_reminders(appointment_data)
             
             st.success("✅ 3-stage reminder system scheduled!")
             st.info("""
@@ -520,12 +597,13 @@ def step7_schedule_reminders():
 
 def step8_export_data():
     """Step 8: Export data"""
+    appt = st.session_state.appointment_data
     st.markdown("## 📊 Export Data")
     st.markdown("=" * 30)
     
     with st.spinner("Exporting appointment data..."):
         try:
-            st.session_state.agent.step8_export_data(st.session_state.appointment_data)
+            get_agent().step8_export_data(appt)
             st.success("✅ Appointment data exported successfully!")
             
             st.balloons()
@@ -541,6 +619,27 @@ def step8_export_data():
         except Exception as e:
             st.error(f"❌ Export failed: {str(e)}")
 
+STEPS = (
+    "1. Patient Info",
+    "2. Patient Lookup",
+    "3. Scheduling",
+    "4. Insurance",
+    "5. Confirmation",
+    "6. Send Confirmation",
+    "7. Schedule Reminders",
+    "8. Export Data"
+)
+
+@st.cache_data(show_spinner=False)
+def _sidebar_progress(current_step: int) -> str:
+    """Progress list for the sidebar as one markdown block: done, current, and pending steps"""
+    lines = []
+    for i, step in enumerate(STEPS, 1):
+        icon = "✅" if i < current_step else ("🔵" if i == current_step else "⬜")
+        lines.append(f"{icon} {step}")
+    # Trailing double space is a markdown line break
+    return "  \n".join(lines)
+
 def main():
     """Main Streamlit app"""
     st.set_page_config(
@@ -554,24 +653,7 @@ def main():
     
     # Sidebar with progress
     st.sidebar.title("📋 Progress")
-    steps = [
-        "1. Patient Info",
-        "2. Patient Lookup", 
-        "3. Scheduling",
-        "4. Insurance",
-        "5. Confirmation",
-        "6. Send Confirmation",
-        "7. Schedule Reminders",
-        "8. Export Data"
-    ]
-    
-    for i, step in enumerate(steps, 1):
-        if i < st.session_state.current_step:
-            st.sidebar.success(step)
-        elif i == st.session_state.current_step:
-            st.sidebar.info(step)
-        else:
-            st.sidebar.text(step)
+    st.sidebar.markdown(_sidebar_progress(st.session_state.current_step))
     
     # Main content based on current step
     if st.session_state.current_step == 1:
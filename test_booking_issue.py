@@ -69,7 +69,7 @@ def test_booking_issue():
             
             # Check if the booked slot is still in the list
             booked_datetime = slots_before[0]['datetime']
-            still_available = any(slot['datetime'] == booked_datetime for slot in slots_after)
+            still_available = booked_datetime in {slot['datetime'] for slot in slots_after}
             
             if still_available:
                 print("❌ ISSUE CONFIRMED: Booked slot is still showing as available!")
@@ -88,10 +88,10 @@ def test_booking_issue():
                 print(df.head())
                 
                 # Check for booked slots
-                booked_slots = df[df['available'] == False]
+                booked_slots = df.loc[df['available'].eq(False), ['doctor', 'date', 'time', 'patient_name', 'available']]
                 print(f"\nBooked slots: {len(booked_slots)}")
                 if len(booked_slots) > 0:
-                    print(booked_slots[['doctor', 'date', 'time', 'patient_name', 'available']])
+                    print(booked_slots)
         else:
             print("Excel file does not exist")
             
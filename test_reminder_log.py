@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that reloading the reminder log does not act on past appointments
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+class RecordingService:
+    """Stands in for the email and SMS services and records every send"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_email(self, **kwargs):
+        self.sent.append(kwargs)
+        return True
+
+    def send_sms(self, **kwargs):
+        self.sent.append(kwargs)
+        return True
+
+
+def _log_entry(appointment_id: str, appointment_datetime: datetime) -> dict:
+    """Reminder log entry in the on-disk format, with the 2nd and 3rd reminders still pending"""
+    def reminder(reminder_type: str, scheduled_time: datetime, status: str) -> dict:
+        return {
+            "reminder_id": f"{appointment_id}_{reminder_type}",
+            "appointment_id": appointment_id,
+            "patient_name": "Test Patient",
+            "patient_email": "test@example.com",
+            "patient_phone": "+1234567890",
+            "appointment_datetime": appointment_datetime.isoformat(),
+            "reminder_type": reminder_type,
+            "scheduled_time": scheduled_time.isoformat(),
+            "status": status,
+            "message_content": "Test reminder",
+            "response": None,
+            "sent_time": None
+        }
+
+    return {
+        "appointment_id": appointment_id,
+        "patient_name": "Test Patient",
+        "patient_email": "test@example.com",
+        "patient_phone": "+1234567890",
+        "appointment_datetime": appointment_datetime.isoformat(),
+        "doctor_name": "Dr. Test",
+        "location": "Test Clinic",
+        "appointment_status": "pending",
+        "forms_completed": False,
+        "cancellation_reason": None,
+        "reminders": [
+            reminder("standard", appointment_datetime - timedelta(days=4), "sent"),
+            reminder("form_check", appointment_datetime - timedelta(days=1), "pending"),
+            reminder("confirmation", appointment_datetime - timedelta(hours=2), "pending")
+        ]
+    }
+
+
+def test_reloaded_past_appointment_is_left_alone():
+    """A past appointment in the log gets no reminders, no no-show mark and no reopened slot"""
+    from backend.remainders import ReminderSystem, ReminderStatus, AppointmentStatus
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            past = datetime.now().replace(microsecond=0) - timedelta(days=30)
+            future = datetime.now().replace(microsecond=0) + timedelta(days=7)
+            log_path = Path("data/exports/reminder_log.json")
+            log_path.parent.mkdir(parents=True)
+            log_path.write_text(json.dumps([_log_entry("PAST1", past), _log_entry("FUTURE1", future)]))
+
+            service = RecordingService()
+            reminders = ReminderSystem(email_service=service, sms_service=service)
+            asyncio.run(reminders.process_reminder_queue())
+            reminders.mark_no_shows()
+
+            assert service.sent == [], f"reminders were sent: {service.sent}"
+            assert not Path("data/appointments.xlsx").exists(), "a slot was reopened"
+
+            past_appointment = reminders.appointments["PAST1"]
+            assert past_appointment.appointment_status == AppointmentStatus.PENDING
+            assert [r.status for r in past_appointment.reminders] == [
+                ReminderStatus.SENT, ReminderStatus.EXPIRED, ReminderStatus.EXPIRED
+            ]
+            # Reminders still ahead of us stay queued
+            assert [r.reminder_id for r in reminders.reminder_queue] == [
+                "FUTURE1_form_check", "FUTURE1_confirmation"
+            ]
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_reloaded_past_appointment_is_left_alone()
+    print("✅ Reloaded reminder log leaves past appointments alone")
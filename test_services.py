@@ -3,113 +3,207 @@
 Test script to verify email and SMS services configuration
 """
 
+import functools
+import io
 import os
 import sys
-from pathlib import Path
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional
 
-# Load environment variables
-load_dotenv()
+# Variables reported by the environment check, in display order
+ENV_KEYS = (
+    'GROQ_API_KEY',
+    'SMTP_USERNAME',
+    'SMTP_PASSWORD',
+    'TWILIO_ACCOUNT_SID',
+    'TWILIO_AUTH_TOKEN',
+    'TWILIO_ACCOUNT_SID1',
+    'TWILIO_AUTH_TOKEN1',
+    'TWILIO_PHONE_NUMBER1',
+)
+# Environment report label, indexed by whether the variable is set
+_STATUS = ('❌ Not set', '✅ Set')
+_ENV_LINE = "{}: {}"
+# Both possible report lines per variable, formatted once at import
+_ENV_REPORT_LINES = tuple(
+    (key, (_ENV_LINE.format(key, _STATUS[False]), _ENV_LINE.format(key, _STATUS[True])))
+    for key in ENV_KEYS
+)
 
-# Add the project root to Python path
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
+# Test payloads, built once; read-only since the services only read them
+_TEST_EMAIL_DATA = MappingProxyType({
+    "appointment_id": "TEST123",
+    "datetime": "2024-01-15T10:00:00",
+    "patient_data": MappingProxyType({
+        "name": "Test Patient",
+        "email": "test@example.com"
+    }),
+    "details": MappingProxyType({
+        "doctor": "Dr. Test",
+        "location": "Test Clinic"
+    })
+})
 
-def test_services():
-    """Test email and SMS services configuration"""
-    print("🧪 Testing Medical Scheduling Agent Services")
-    print("=" * 50)
+# SMSReminder arguments other than appointment_date (which is "now" on each run) and stage
+_SMS_REMINDER_KWARGS = MappingProxyType({
+    "patient_phone": "+1234567890",  # Test number
+    "patient_name": "Test Patient",
+    "appointment_time": "10:00 AM",
+    "doctor_name": "Dr. Test",
+    "appointment_id": "TEST123"
+})
+
+@functools.lru_cache(maxsize=1)
+def _load_env_once() -> bool:
+    """Load .env into os.environ on the first call only"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return True
+
+@functools.lru_cache(maxsize=1)
+def _email_service():
+    """EmailService configured from the environment, and whether it uses real SMTP; built once"""
+    from backend.integrations.email_service import EmailService
+    
+    env = os.environ
+    username = env.get('SMTP_USERNAME')
+    smtp_config = {
+        'server': env.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'port': int(env.get('SMTP_PORT', '587')),
+        'username': username,
+        'password': env.get('SMTP_PASSWORD'),
+        'from_email': env.get('SMTP_FROM_EMAIL') or username
+    }
+    
+    use_real_email = bool(smtp_config['username'] and smtp_config['password'])
+    return EmailService(smtp_config=smtp_config, use_mock=not use_real_email), use_real_email
+
+@functools.lru_cache(maxsize=1)
+def _sms_service():
+    """SMSService configured from the environment, and whether it uses real Twilio; built once"""
+    from backend.integrations.sms_service import SMSService
+    
+    env = os.environ
+    twilio_account_sid = env.get('TWILIO_ACCOUNT_SID1')
+    twilio_auth_token = env.get('TWILIO_AUTH_TOKEN1')
+    twilio_phone_number = env.get('TWILIO_PHONE_NUMBER1')
+    
+    use_real_sms = bool(twilio_account_sid and twilio_auth_token and twilio_phone_number)
+    sms_service = SMSService(
+        account_sid=twilio_account_sid,
+        auth_token=twilio_auth_token,
+        from_number=twilio_phone_number,
+        mock_mode=not use_real_sms
+    )
+    # The service drops to mock mode by itself when the Twilio SDK is missing
+    return sms_service, use_real_sms and not sms_service.mock_mode
+
+def test_services(now: Optional[datetime] = None):
+    """
+    Test email and SMS services configuration
+    
+    Set AI_MED_SKIP_EMAIL=1 or AI_MED_SKIP_SMS=1 to skip that service (and the import of
+    its module and SDK), e.g. in CI runs that only need the environment report.
+    
+    Args:
+        now: Appointment time for the test reminder; read from the clock once if not given
+    """
+    if now is None:
+        now = datetime.now()
+    # Load environment variables only when the check actually runs, and only once per process
+    _load_env_once()
+    
+    # The report is buffered and written out in a few chunks: before each service call
+    # (whose own logging would otherwise interleave) and at the end
+    report = io.StringIO()
+    
+    def flush():
+        sys.stdout.write(report.getvalue())
+        sys.stdout.flush()
+        report.seek(0)
+        report.truncate()
+    
+    print("🧪 Testing Medical Scheduling Agent Services", file=report)
+    print("=" * 50, file=report)
+    
+    # One snapshot of the environment (after load_dotenv) for every lookup below
+    env = dict(os.environ)
     
     # Check environment variables
-    print("\n📋 Environment Variables:")
-    print(f"GROQ_API_KEY: {'✅ Set' if os.getenv('GROQ_API_KEY') else '❌ Not set'}")
-    print(f"SMTP_USERNAME: {'✅ Set' if os.getenv('SMTP_USERNAME') else '❌ Not set'}")
-    print(f"SMTP_PASSWORD: {'✅ Set' if os.getenv('SMTP_PASSWORD') else '❌ Not set'}")
-    print(f"TWILIO_ACCOUNT_SID: {'✅ Set' if os.getenv('TWILIO_ACCOUNT_SID') else '❌ Not set'}")
-    print(f"TWILIO_AUTH_TOKEN: {'✅ Set' if os.getenv('TWILIO_AUTH_TOKEN') else '❌ Not set'}")
-    print(f"TWILIO_ACCOUNT_SID1: {'✅ Set' if os.getenv('TWILIO_ACCOUNT_SID1') else '❌ Not set'}")
-    print(f"TWILIO_AUTH_TOKEN1: {'✅ Set' if os.getenv('TWILIO_AUTH_TOKEN1') else '❌ Not set'}")
-    print(f"TWILIO_PHONE_NUMBER1: {'✅ Set' if os.getenv('TWILIO_PHONE_NUMBER1') else '❌ Not set'}")
-    
-    # Test Email Service
-    print("\n📧 Testing Email Service:")
-    try:
-        from backend.integrations.email_service import EmailService
-        
-        smtp_config = {
-            'server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
-            'port': int(os.getenv('SMTP_PORT', '587')),
-            'username': os.getenv('SMTP_USERNAME'),
-            'password': os.getenv('SMTP_PASSWORD'),
-            'from_email': os.getenv('SMTP_FROM_EMAIL', os.getenv('SMTP_USERNAME'))
-        }
-        
-        use_real_email = bool(smtp_config['username'] and smtp_config['password'])
-        email_service = EmailService(smtp_config=smtp_config, use_mock=not use_real_email)
-        
-        print(f"   Status: {'Real SMTP' if use_real_email else 'Mock Mode'}")
-        
-        # Test sending a simple email
-        test_data = {
-            "appointment_id": "TEST123",
-            "datetime": "2024-01-15T10:00:00",
-            "patient_data": {
-                "name": "Test Patient",
-                "email": "test@example.com"
-            },
-            "details": {
-                "doctor": "Dr. Test",
-                "location": "Test Clinic"
-            }
-        }
-        
-        result = email_service.send_confirmation_email(test_data)
-        print(f"   Test Result: {'✅ Success' if result and result.get('success') else '⚠️ Check logs'}")
-        
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-    
-    # Test SMS Service
-    print("\n📱 Testing SMS Service:")
-    try:
-        from backend.integrations.sms_service import SMSService, SMSReminder, ReminderStage
-        from datetime import datetime
-        
-        twilio_account_sid = os.getenv('TWILIO_ACCOUNT_SID1')
-        twilio_auth_token = os.getenv('TWILIO_AUTH_TOKEN1')
-        twilio_phone_number = os.getenv('TWILIO_PHONE_NUMBER1')
-        
-        use_real_sms = bool(twilio_account_sid and twilio_auth_token and twilio_phone_number)
-        sms_service = SMSService(
-            account_sid=twilio_account_sid,
-            auth_token=twilio_auth_token,
-            from_number=twilio_phone_number,
-            mock_mode=not use_real_sms
-        )
-        
-        print(f"   Status: {'Real Twilio' if use_real_sms else 'Mock Mode'}")
-        
-        # Test sending a simple SMS
-        reminder = SMSReminder(
-            patient_phone="+1234567890",  # Test number
-            patient_name="Test Patient",
-            appointment_date=datetime.now(),
-            appointment_time="10:00 AM",
-            doctor_name="Dr. Test",
-            stage=ReminderStage.FIRST,
-            appointment_id="TEST123"
-        )
-        
-        result = sms_service.send_reminder(reminder)
-        print(f"   Test Result: {'✅ Success' if isinstance(result, dict) and result.get('success') else '⚠️ Check logs'}")
-        
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-    
-    print("\n🎯 Summary:")
-    print("   - Add missing environment variables to your .env file")
-    print("   - Check CONFIGURATION_GUIDE.md for setup instructions")
-    print("   - Run 'python interactive_agent.py' to start the agent")
+    print("\n📋 Environment Variables:", file=report)
+    report.write("\n".join([lines[bool(env.get(key))] for key, lines in _ENV_REPORT_LINES]))
+    report.write("\n")
+    
+    # Set up each service whose credentials are present (service modules are only
+    # imported then), and send both test messages together further down
+    email_service = sms_service = reminder = None
+    
+    print("\n📧 Testing Email Service:", file=report)
+    flush()
+    if env.get('AI_MED_SKIP_EMAIL'):
+        print("   Skipped (AI_MED_SKIP_EMAIL set)", file=report)
+    elif not (env.get('SMTP_USERNAME') and env.get('SMTP_PASSWORD')):
+        print("   Status: Mock Mode - skipped (no SMTP credentials)", file=report)
+    else:
+        try:
+            email_service, use_real_email = _email_service()
+            print(f"   Status: {'Real SMTP' if use_real_email else 'Mock Mode'}", file=report)
+        except Exception as e:
+            print(f"   ❌ Error: {e}", file=report)
+    
+    print("\n📱 Testing SMS Service:", file=report)
+    flush()
+    if env.get('AI_MED_SKIP_SMS'):
+        print("   Skipped (AI_MED_SKIP_SMS set)", file=report)
+    elif not (env.get('TWILIO_ACCOUNT_SID1') and env.get('TWILIO_AUTH_TOKEN1') and env.get('TWILIO_PHONE_NUMBER1')):
+        print("   Status: Mock Mode - skipped (no Twilio credentials)", file=report)
+    else:
+        try:
+            from backend.integrations.sms_service import SMSReminder, ReminderStage
+            
+            sms_service, use_real_sms = _sms_service()
+            print(f"   Status: {'Real Twilio' if use_real_sms else 'Mock Mode'}", file=report)
+            
+            reminder = SMSReminder(
+                appointment_date=now,
+                stage=ReminderStage.FIRST,
+                **_SMS_REMINDER_KWARGS
+            )
+        except Exception as e:
+            print(f"   ❌ Error: {e}", file=report)
+    flush()
+    
+    # SMTP and Twilio round-trips are independent, so overlap them
+    if email_service is not None or reminder is not None:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            email_future = executor.submit(email_service.send_confirmation_email, _TEST_EMAIL_DATA) if email_service else None
+            sms_future = executor.submit(sms_service.send_reminder, reminder) if reminder else None
+            
+            print("\n🧪 Test Results:", file=report)
+            if email_future:
+                try:
+                    result = email_future.result()
+                    print(f"   Email: {'✅ Success' if result and result.get('success') else '⚠️ Check logs'}", file=report)
+                except Exception as e:
+                    print(f"   Email: ❌ Error: {e}", file=report)
+            if sms_future:
+                try:
+                    result = sms_future.result()
+                    print(f"   SMS: {'✅ Success' if isinstance(result, dict) and result.get('success') else '⚠️ Check logs'}", file=report)
+                except Exception as e:
+                    print(f"   SMS: ❌ Error: {e}", file=report)
+    
+    print("\n🎯 Summary:", file=report)
+    print("   - Add missing environment variables to your .env file", file=report)
+    print("   - Check CONFIGURATION_GUIDE.md for setup instructions", file=report)
+    print("   - Run 'python interactive_agent.py' to start the agent", file=report)
+    flush()
 
 if __name__ == "__main__":
+    # Add the project root to Python path, unless PYTHONPATH already has it
+    project_root = os.path.dirname(os.path.abspath(__file__))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
     test_services()
@@ -0,0 +1,19 @@
+"""
+WSGI entry point for the SMS reply webhook
+Serve with a worker pool instead of the Flask development server, e.g.:
+
+    gunicorn -w 4 --threads 2 -b 0.0.0.0:8000 wsgi:app
+
+Each worker keeps its own appointments cache and starts its own file watcher on its
+first lookup, so no cross-process invalidation is needed and importing this module
+(including under --preload) starts no threads. To parse the workbook before the first
+SMS arrives, prime each worker after the fork from a gunicorn.conf.py hook:
+
+    def post_fork(server, worker):
+        from backend.webhooks.sms_webhook import prime_appointments_cache
+        prime_appointments_cache()
+"""
+
+from backend.webhooks.sms_webhook import app
+
+__all__ = ['app']